@@ -0,0 +1,66 @@
+import argparse
+import os
+import tempfile
+import time
+from typing import Any, Callable, List
+
+from bench_dump import generate_config
+
+from mlconf.binary import dump_binary, load_binary
+from mlconf.config import Config
+from mlconf.parser import parse
+
+
+def best_of(repeat: int, function: Callable[[], Any]) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def decode_all(value: Any) -> None:
+    if isinstance(value, Config):
+        for item in value._config.values():
+            decode_all(item)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            decode_all(item)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Compare binary configs with parsing the text syntax"
+    )
+    parser.add_argument("--blocks", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    config = generate_config(args.blocks, args.seed)
+    leaf = f"experiment{args.blocks // 2}"
+    text = config.dumps()
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "config.bin")
+        dump_binary(config, path)
+        if load_binary(path) != config:
+            raise SystemExit("load_binary does not round-trip through dump_binary")
+        size = os.path.getsize(path)
+        results: List[Any] = [
+            ("dumps", config.dumps),
+            ("dump_binary", lambda: dump_binary(config, path)),
+            ("parse", lambda: parse(text)),
+            ("load_binary", lambda: load_binary(path)),
+            ("load_binary+leaf", lambda: load_binary(path)[leaf].model.layers[2]),
+            ("load_binary+all", lambda: decode_all(load_binary(path))),
+        ]
+        timings = [(name, best_of(args.repeat, f)) for name, f in results]
+    print(f"blocks: {args.blocks}")
+    print(f"text: {len(text.encode()) / 1024 / 1024:.1f}MiB")
+    print(f"binary: {size / 1024 / 1024:.1f}MiB")
+    for name, seconds in timings:
+        print(f"{name:<20}{seconds * 1000:10.3f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+import argparse
+import gc
+import os
+import resource
+import subprocess
+import sys
+import tracemalloc
+from typing import Any, Dict, List
+
+from mlconf.config import Config
+from mlconf.parser import parse
+
+LEAVES_PER_BLOCK = 11
+# Reduction asked for the compact layout.
+TARGET = 3.0
+
+
+def generate_config(start: int, blocks: int) -> str:
+    lines: List[str] = []
+    for i in range(start, start + blocks):
+        lines.append(f"block{i}:")
+        lines.append(f"    name: run_{i}")
+        lines.append(f"    lr: 0.00{i % 9 + 1}")
+        lines.append(f"    dim: {i % 512}")
+        lines.append("    act: relu")
+        lines.append("    dropout: 0.1")
+        lines.append(f"    layers: [{i % 7}, 2, 3]")
+        lines.append("    optim:")
+        lines.append("        kind: adam")
+        lines.append("        betas: (0.9, 0.999)")
+    return "\n".join(lines) + "\n"
+
+
+class LegacyConfig:
+    # The node layout before __slots__, split key tables and interning.
+    def __init__(self, config: Dict[str, Any]) -> None:
+        self._config = config
+
+
+class LegacyList(List[Any]):
+    pass
+
+
+class LegacyTuple(tuple):  # type: ignore[type-arg]
+    pass
+
+
+def copy_str(value: str) -> str:
+    return value.encode().decode()
+
+
+def to_legacy(value: Any) -> Any:
+    # Every key and scalar gets an object of its own, as the old parser made.
+    if isinstance(value, Config):
+        return LegacyConfig(
+            {copy_str(key): to_legacy(item) for key, item in value.items()}
+        )
+    elif isinstance(value, list):
+        return LegacyList(to_legacy(item) for item in value)
+    elif isinstance(value, tuple):
+        return LegacyTuple(to_legacy(item) for item in value)
+    elif isinstance(value, str):
+        return copy_str(value)
+    elif isinstance(value, float):
+        return float(repr(value))
+    elif isinstance(value, int) and not isinstance(value, bool):
+        return int(str(value))
+    return value
+
+
+LAYOUTS = ["legacy", "compact"]
+
+
+def rss_kb() -> int:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") // 1024
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def measure(metric: str, representation: str, configs: int, blocks: int) -> None:
+    # Many configs stay resident, like in a scheduler, so what the parser
+    # frees is reused by the next parse and the growth is the trees.
+    # "retained" counts the bytes the trees hold with tracemalloc, "rss" the
+    # growth of the process, which also holds allocator fragmentation.
+    strings = [generate_config(i * blocks, blocks) for i in range(configs)]
+    gc.collect()
+    if metric == "retained":
+        tracemalloc.start()
+    before = rss_kb()
+    trees = []
+    for string in strings:
+        config = parse(string)
+        trees.append(to_legacy(config) if representation == "legacy" else config)
+        del config
+    gc.collect()
+    if metric == "retained":
+        print(tracemalloc.get_traced_memory()[0], len(trees))
+    else:
+        print((rss_kb() - before) * 1024, len(trees))
+
+
+def run(metric: str, representation: str, configs: int, blocks: int) -> int:
+    output = subprocess.run(
+        [sys.executable, __file__, "--measure", metric, representation]
+        + [str(configs), str(blocks)],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return int(output.split()[0])
+
+
+def report(name: str, legacy: float, compact: float, unit: str) -> None:
+    ratio = legacy / max(compact, 1e-9)
+    status = "met" if ratio >= TARGET else "below target"
+    print(
+        f"{name:<20}legacy {legacy:8.1f}{unit}  compact {compact:8.1f}{unit}  "
+        f"{ratio:.1f}x ({TARGET:.0f}x target {status})"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Compare RSS of the legacy and compact Config node layouts"
+    )
+    parser.add_argument("--leaves", type=int, default=1_000_000)
+    parser.add_argument("--configs", type=int, default=100)
+    parser.add_argument("--measure", nargs=4, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.measure:
+        metric, representation, configs, blocks = args.measure
+        measure(metric, representation, int(configs), int(blocks))
+        return
+    blocks = args.leaves // LEAVES_PER_BLOCK // args.configs
+    leaves = args.configs * blocks * LEAVES_PER_BLOCK
+    print(f"leaves: {leaves}")
+    # Retained bytes are the metric of the node layout, RSS also holds the
+    # fragmentation the parser's temporary objects leave behind.
+    retained = [run("retained", name, args.configs, blocks) for name in LAYOUTS]
+    report("retained bytes/leaf", retained[0] / leaves, retained[1] / leaves, "B")
+    rss = [run("rss", name, args.configs, blocks) / 2**20 for name in LAYOUTS]
+    report("RSS", rss[0], rss[1], "MiB")
+
+
+if __name__ == "__main__":
+    main()
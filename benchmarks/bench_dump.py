@@ -0,0 +1,99 @@
+import argparse
+import io
+import os
+import random
+import tempfile
+import time
+from typing import Any, Callable, Dict, List
+
+from mlconf.config import Config
+from mlconf.parser import parse
+
+
+def legacy_format(value: Any, indent: str = "") -> str:
+    # A plain recursive formatter that concatenates one string per block,
+    # what launchers wrote by hand before Config.dump.
+    text = ""
+    for key, item in value.items():
+        if isinstance(item, Config):
+            text += f"{indent}{key}:\n" + legacy_format(item, indent + "    ")
+        else:
+            text += f"{indent}{key}: {legacy_value(item)}\n"
+    return text
+
+
+def legacy_value(value: Any) -> str:
+    if isinstance(value, str):
+        return '"' + value + '"'
+    elif isinstance(value, list):
+        return "[" + ", ".join(legacy_value(item) for item in value) + "]"
+    elif isinstance(value, tuple):
+        return "(" + ", ".join(legacy_value(item) for item in value) + ")"
+    return str(value)
+
+
+def generate_config(blocks: int, seed: int) -> Config:
+    # Blocks shaped like experiment configs: nested sections of scalars,
+    # strings and short lists.
+    rng = random.Random(seed)
+    config: Dict[str, Any] = {}
+    for i in range(blocks):
+        config[f"experiment{i}"] = {
+            "model": {
+                "name": rng.choice(["resnet", "vit", "mlp"]) + str(i),
+                "dim": rng.choice([64, 128, 256]),
+                "dropout": round(rng.random(), 3),
+                "layers": [rng.randrange(1, 8) for _ in range(4)],
+            },
+            "optimizer": {
+                "name": rng.choice(["adam", "sgd"]),
+                "lr": rng.choice([1e-3, 3e-4, 1e-5]),
+                "betas": (0.9, 0.999),
+                "schedule": {"warmup": rng.randrange(1000), "cosine": True},
+            },
+            "data": {"path": f"/data/run{i}/shards", "batch": 32, "shuffle": None},
+        }
+    return Config(config)
+
+
+def best_of(repeat: int, function: Callable[[], Any]) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def dump_file(config: Config, path: str) -> None:
+    with open(path, "w") as fp:
+        config.dump(fp)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure Config.dump throughput")
+    parser.add_argument("--blocks", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    config = generate_config(args.blocks, args.seed)
+    text = config.dumps()
+    if parse(text) != config:
+        raise SystemExit("dumps does not round-trip through parse")
+    megabytes = len(text.encode()) / 1024 / 1024
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "dump.conf")
+        results: List[Any] = [
+            ("legacy", lambda: legacy_format(config)),
+            ("dumps", config.dumps),
+            ("dump(StringIO)", lambda: config.dump(io.StringIO())),
+            ("dump(file)", lambda: dump_file(config, path)),
+        ]
+        timings = [(name, best_of(args.repeat, f)) for name, f in results]
+    print(f"blocks: {args.blocks}  output: {megabytes:.1f}MiB")
+    for name, seconds in timings:
+        print(f"{name:<16}{seconds:8.3f}s {megabytes / seconds:8.1f}MiB/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+import argparse
+import random
+import re
+import time
+from typing import Any, Callable, List
+
+from mlconf.regex_utils import REGEX_FLOAT_MATCH, REGEX_INT_MATCH
+from mlconf.resolver import (
+    EnvironmentVariableResolver,
+    PythonDataTypeResolver,
+    ResolverPipeline,
+    StringResolver,
+    default_registry,
+)
+from mlconf.word import Word
+
+
+class LegacyDataTypeResolver:
+    # The inference before the combined regex and the literal table.
+    def resolve(self, value: Any) -> Any:
+        if isinstance(value, Word):
+            if re.match(REGEX_INT_MATCH, value.text):
+                return int(value.text)
+            elif re.match(REGEX_FLOAT_MATCH, value.text):
+                return float(value.text)
+            elif value.text == "true" or value.text == "True":
+                return True
+            elif value.text == "false" or value.text == "False":
+                return False
+            elif value.text == "none" or value.text == "null" or value.text == "None":
+                return None
+            else:
+                return value
+        else:
+            return value
+
+
+def generate_scalars(n: int, seed: int) -> List[Word]:
+    # Mostly distinct texts, so the resolvers cannot lean on a memo.
+    rng = random.Random(seed)
+    makers: List[Callable[[], str]] = [
+        lambda: str(rng.randrange(-(10**6), 10**6)),
+        lambda: f"{rng.uniform(-100, 100):.4f}",
+        lambda: f"{rng.uniform(1, 9):.1f}e-{rng.randrange(1, 9)}",
+        lambda: rng.choice(["true", "False", "null", "None"]),
+        lambda: rng.choice(["relu", "adam", "cosine", "nearest"]) + str(rng.random()),
+        lambda: f"model.layer{rng.randrange(100)}.dim",
+        lambda: rng.choice(["$HOME", "$DATA_DIR", "-", "+x", ".hidden"]),
+    ]
+    return [Word(rng.choice(makers)()) for _ in range(n)]
+
+
+def legacy_chain(value: Any, datatype: Any, env: Any, string: Any) -> Any:
+    return string.resolve(env.resolve(datatype.resolve(value)))
+
+
+def chain(value: Any, pipeline: ResolverPipeline, string: Any) -> Any:
+    # Resolvers.resolve runs the pipeline, words left are turned to strings.
+    value = pipeline.resolve(value)
+    return string.resolve(value) if type(value) is Word else value
+
+
+def best_of(repeat: int, function: Callable[[], Any]) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Compare the legacy and table-driven scalar inference"
+    )
+    parser.add_argument("--scalars", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    scalars = generate_scalars(args.scalars, args.seed)
+    legacy, current = LegacyDataTypeResolver(), PythonDataTypeResolver()
+    env, string = EnvironmentVariableResolver(), StringResolver()
+    pipeline = default_registry.compile()
+    results = [
+        ("infer", lambda: [legacy.resolve(v) for v in scalars]),
+        ("infer", lambda: [current.resolve(v) for v in scalars]),
+        ("chain", lambda: [legacy_chain(v, legacy, env, string) for v in scalars]),
+        ("chain", lambda: [chain(v, pipeline, string) for v in scalars]),
+    ]
+    timings = [best_of(args.repeat, function) for _, function in results]
+    print(f"scalars: {args.scalars}")
+    for i in range(0, len(results), 2):
+        name, old, new = results[i][0], timings[i], timings[i + 1]
+        print(f"{name}:   legacy {old:.3f}s  current {new:.3f}s  {old / new:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
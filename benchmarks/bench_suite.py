@@ -0,0 +1,236 @@
+import argparse
+import copy
+import json
+import sys
+import tempfile
+import time
+import tracemalloc
+from functools import reduce
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+from mlconf.config import Config
+from mlconf.loader import load
+from mlconf.stats import LoadStats
+
+BASELINE = Path(__file__).with_name("baseline.json")
+# Phases of LoadStats that add up to get_tokens.
+TOKEN_PHASES = ["lines", "tokens", "indentation"]
+METRICS = ["tokens", "parse_block", "resolve", "access", "deepcopy", "peak_memory"]
+
+# Files of a case by name, the first one is loaded, and the dotted paths
+# the access phase reads.
+Case = Tuple[Dict[str, str], List[str]]
+
+
+def generate_wide(scale: float) -> Case:
+    keys = [f"key{i}" for i in range(int(100_000 * scale))]
+    lines = [f"{key}: {i}" for i, key in enumerate(keys)]
+    return {"wide.conf": "\n".join(lines) + "\n"}, keys
+
+
+def generate_deep(scale: float) -> Case:
+    depth = max(int(1_000 * scale), 1)
+    lines = [f"{'    ' * i}level{i}:" for i in range(depth)]
+    lines.append(f"{'    ' * depth}leaf: 1")
+    path = ".".join([f"level{i}" for i in range(depth)] + ["leaf"])
+    return {"deep.conf": "\n".join(lines) + "\n"}, [path] * 100
+
+
+def generate_long_list(scale: float) -> Case:
+    items = ", ".join(str(i) for i in range(int(100_000 * scale)))
+    lines = [f"values: [{items}]", f"pairs: ({items})"]
+    return {"long_list.conf": "\n".join(lines) + "\n"}, ["values", "pairs"] * 1000
+
+
+def generate_references(scale: float) -> Case:
+    lines = ["block0:", "    dim: 64", "    lr: 0.1", "    act: relu"]
+    paths = []
+    for i in range(1, int(10_000 * scale)):
+        lines.append(f"block{i}:")
+        lines.append(f"    dim: block{i - 1}.dim")
+        lines.append("    lr: block0.lr")
+        lines.append(f"    act: block{i // 2}.act")
+        lines.append("    base: block0")
+        paths += [f"block{i}.dim", f"block{i}.base.lr"]
+    return {"references.conf": "\n".join(lines) + "\n"}, paths
+
+
+def generate_imports(scale: float) -> Case:
+    modules = max(int(500 * scale), 1)
+    files = {"main.conf": ""}
+    files["base.conf"] = "".join(f"key{i}: {i}\n" for i in range(50))
+    main = []
+    paths = []
+    for i in range(modules):
+        files[f"module{i}.conf"] = (
+            f"import base as base\nname: module{i}\nlr: base.key{i % 50}\n"
+        )
+        main.append(f"import module{i} as module{i}")
+        paths += [f"module{i}.lr", f"module{i}.base.key0"]
+    files["main.conf"] = "\n".join(main) + "\nmodel: module0.name\n"
+    return files, paths
+
+
+GENERATORS: Dict[str, Callable[[float], Case]] = {
+    "wide": generate_wide,
+    "deep": generate_deep,
+    "long_list": generate_long_list,
+    "references": generate_references,
+    "imports": generate_imports,
+}
+
+
+def write_case(case: Case, directory: Path) -> Path:
+    files, _ = case
+    for name, string in files.items():
+        (directory / name).write_text(string)
+    return directory / next(iter(files))
+
+
+def access(config: Config, paths: List[List[str]]) -> None:
+    for keys in paths:
+        reduce(getattr, keys, config)
+
+
+def measure_once(path: Path, paths: List[List[str]]) -> Dict[str, float]:
+    stats = LoadStats()
+    config = load(path, max_workers=1, stats=stats)
+    metrics = {
+        "tokens": sum(stats.times[phase] for phase in TOKEN_PHASES),
+        "parse_block": stats.times["parse"],
+        "resolve": stats.times["resolve"],
+    }
+    start = time.perf_counter()
+    access(config, paths)
+    metrics["access"] = time.perf_counter() - start
+    start = time.perf_counter()
+    copy.deepcopy(config)
+    metrics["deepcopy"] = time.perf_counter() - start
+    return metrics
+
+
+def peak_memory(path: Path) -> int:
+    # Measured in a run of its own, tracing slows everything down.
+    tracemalloc.start()
+    try:
+        load(path, max_workers=1)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def calibrate() -> float:
+    # A fixed workload that does not use mlconf, timings are compared relative
+    # to it, so a slower or busier machine does not read as a regression.
+    def work() -> None:
+        table: Dict[str, int] = {}
+        for i in range(100_000):
+            table[f"key{i % 1000}"] = table.get(f"key{i % 500}", 0) + i
+
+    timings = []
+    for _ in range(5):
+        start = time.perf_counter()
+        work()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def measure(name: str, scale: float, repeat: int) -> Dict[str, float]:
+    calibration = calibrate()
+    case = GENERATORS[name](scale)
+    paths = [path.split(".") for path in case[1]]
+    with tempfile.TemporaryDirectory() as directory:
+        path = write_case(case, Path(directory))
+        runs = []
+        # Calibrated between runs, so a burst of load on the machine shows in
+        # both, and the fastest of each is kept.
+        for _ in range(repeat):
+            runs.append(measure_once(path, paths))
+            calibration = min(calibration, calibrate())
+        metrics = {key: min(run[key] for run in runs) for key in runs[0]}
+        metrics["peak_memory"] = peak_memory(path)
+    metrics["calibration"] = calibration
+    return metrics
+
+
+def compare(
+    results: Dict[str, Dict[str, float]],
+    baseline: Dict[str, Dict[str, float]],
+    threshold: float,
+    min_delta: float,
+) -> List[str]:
+    # A metric regresses when it grows by more than threshold, and by more
+    # than min_delta seconds for timings, so tiny phases do not flake.
+    # Baseline timings are scaled by how much slower the machine is now, but
+    # never scaled down, a lucky calibration would otherwise flag every phase.
+    regressions = []
+    for name, metrics in results.items():
+        old_metrics = baseline.get(name, {})
+        speed = 1.0
+        if old_metrics.get("calibration"):
+            speed = max(metrics["calibration"] / old_metrics["calibration"], 1.0)
+        for metric in METRICS:
+            old = old_metrics.get(metric)
+            if old is None:
+                continue
+            value = metrics[metric]
+            slack = 0.0
+            if metric != "peak_memory":
+                old *= speed
+                slack = min_delta
+            if value > old * (1 + threshold) and value - old > slack:
+                regressions.append(f"{name}.{metric}: {old:.4g} -> {value:.4g}")
+    return regressions
+
+
+def format_metric(metric: str, value: float) -> str:
+    if metric == "peak_memory":
+        return f"{value / 1024 / 1024:8.1f}MiB"
+    return f"{value * 1000:9.1f}ms"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Time the loading phases on synthetic configs against a baseline"
+    )
+    parser.add_argument("cases", nargs="*", help=f"Any of {', '.join(GENERATORS)}")
+    parser.add_argument("--scale", type=float, default=1.0)
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument("--baseline", type=Path, default=BASELINE)
+    parser.add_argument("--save", action="store_true", help="Write the baseline")
+    parser.add_argument("--threshold", type=float, default=0.5)
+    parser.add_argument("--min-delta", type=float, default=0.05)
+    args = parser.parse_args()
+    for name in args.cases:
+        if name not in GENERATORS:
+            parser.error(f"Unknown case '{name}'")
+    # parse_block and deepcopy recurse once or more per nesting level.
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), 10_000))
+    results: Dict[str, Dict[str, Any]] = {}
+    print(f"{'case':<12}" + "".join(f"{metric:>14}" for metric in METRICS))
+    for name in args.cases or GENERATORS:
+        results[name] = measure(name, args.scale, args.repeat)
+        row = "".join(f"{format_metric(m, results[name][m]):>14}" for m in METRICS)
+        print(f"{name:<12}{row}")
+    if args.save:
+        baseline = {}
+        if args.baseline.exists():
+            baseline = json.loads(args.baseline.read_text())
+        baseline.update(results)
+        args.baseline.write_text(json.dumps(baseline, indent=4, sort_keys=True) + "\n")
+        return
+    if not args.baseline.exists():
+        print(f"No baseline at {args.baseline}, run with --save to create one")
+        return
+    regressions = compare(
+        results, json.loads(args.baseline.read_text()), args.threshold, args.min_delta
+    )
+    for regression in regressions:
+        print(f"regression: {regression}")
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+import argparse
+import resource
+import subprocess
+import sys
+from typing import List
+
+from mlconf.tokenizer import TokenTable, get_tokens
+
+
+def generate_config(blocks: int) -> str:
+    lines: List[str] = []
+    for i in range(blocks):
+        lines.append(f"block{i}:")
+        lines.append(f"    name: run_{i} # comment")
+        lines.append(f"    lr: 0.00{i % 9 + 1}")
+        lines.append('    layers: [1, 2, (3, 4), "x y"]')
+        lines.append("    sub:")
+        lines.append("        - a")
+        lines.append("        - 'b c'")
+    return "\n".join(lines) + "\n"
+
+
+def max_rss_kb() -> int:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def measure(representation: str, blocks: int) -> None:
+    string = generate_config(blocks)
+    before = max_rss_kb()
+    if representation == "tokens":
+        tokens = get_tokens(string)
+        count = len(tokens)
+    else:
+        table = TokenTable.from_string(string)
+        count = len(table)
+    print(count, max_rss_kb() - before)
+
+
+def run(representation: str, blocks: int) -> List[int]:
+    output = subprocess.run(
+        [sys.executable, __file__, "--measure", representation, str(blocks)],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return [int(value) for value in output.split()]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Compare peak RSS of List[Token] against TokenTable"
+    )
+    parser.add_argument("--blocks", type=int, default=50000)
+    parser.add_argument("--measure", nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.measure:
+        measure(args.measure[0], int(args.measure[1]))
+        return
+    count, tokens_kb = run("tokens", args.blocks)
+    _, table_kb = run("table", args.blocks)
+    print(f"tokens: {count}")
+    print(f"List[Token]: {tokens_kb / 1024:.1f} MiB")
+    print(f"TokenTable:  {table_kb / 1024:.1f} MiB")
+    print(f"ratio:       {tokens_kb / max(table_kb, 1):.1f}x")
+
+
+if __name__ == "__main__":
+    main()
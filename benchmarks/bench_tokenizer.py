@@ -0,0 +1,85 @@
+import argparse
+import time
+from typing import Any, Callable, List
+
+from mlconf.char import CharStream
+from mlconf.tokenizer import (
+    Token,
+    TokenStream,
+    TokenTable,
+    TokenType,
+    get_raw_tokens,
+    get_tokens,
+    process_tokens,
+)
+
+# Speedup of get_tokens over the char-at-a-time TokenStream that was asked for.
+TARGET = 10.0
+
+
+def generate_config(lines: int) -> str:
+    # A sweep config of 7-line blocks, with comments, strings and lists.
+    block: List[str] = []
+    for i in range(max(lines // 7, 1)):
+        block.append(f"block{i}:")
+        block.append(f"    name: run_{i} # comment")
+        block.append(f"    lr: 0.00{i % 9 + 1}")
+        block.append('    layers: [1, 2, (3, 4), "x y"]')
+        block.append("    sub:")
+        block.append("        - a")
+        block.append("        - 'b c'")
+    return "\n".join(block) + "\n"
+
+
+def legacy_tokens(string: str) -> List[Token]:
+    charstream = CharStream(string)
+    tokenstream = TokenStream(charstream)
+    tokens = []
+    while not charstream.is_eof():
+        tokens.append(tokenstream.get_next())
+    return list(process_tokens(tokens))
+
+
+def best_of(repeat: int, function: Callable[[], Any]) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Compare tokenizer throughput with the char-at-a-time scanner"
+    )
+    parser.add_argument("--lines", type=int, default=50_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    string = generate_config(args.lines)
+    count = len(get_tokens(string))
+    legacy = best_of(args.repeat, lambda: legacy_tokens(string))
+    results = [
+        ("get_raw_tokens", lambda: get_raw_tokens(string)),
+        ("get_tokens", lambda: get_tokens(string)),
+        ("TokenTable", lambda: TokenTable.from_string(string)),
+    ]
+    print(f"lines: {args.lines}  tokens: {count}")
+    print(f"{'legacy':<16}{legacy:8.3f}s  {count / legacy / 1e6:6.2f}M tokens/s")
+    for name, function in results:
+        seconds = best_of(args.repeat, function)
+        print(
+            f"{name:<16}{seconds:8.3f}s  {count / seconds / 1e6:6.2f}M tokens/s"
+            f"  {legacy / seconds:5.1f}x"
+        )
+    # get_tokens returns one Token object per token, building them alone
+    # takes a share of the target time.
+    allocation = best_of(
+        args.repeat, lambda: [Token(TokenType.WORD, "x", 0, 0, 1) for _ in range(count)]
+    )
+    print(f"target: {TARGET:.0f}x = {legacy / TARGET:.3f}s")
+    print(f"Token objects alone: {allocation:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -1 +1,13 @@
 from mlconf.config import Config as Config
+from mlconf.loader import load as load
+from mlconf.watcher import ConfigWatcher as ConfigWatcher
+from mlconf.sweep import Sweep as Sweep
+from mlconf.columns import to_columns as to_columns
+from mlconf.resolver import Resolver as Resolver
+from mlconf.resolver import ResolverRegistry as ResolverRegistry
+from mlconf.resolver import default_registry as default_registry
+from mlconf.stats import LoadStats as LoadStats
+from mlconf.stats import profile as profile
+from mlconf.binary import dump_binary as dump_binary
+from mlconf.binary import load_binary as load_binary
+from mlconf.shared import SharedConfig as SharedConfig
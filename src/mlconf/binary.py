@@ -0,0 +1,392 @@
+import mmap
+import os
+import struct
+import sys
+from typing import IO, Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+from mlconf.config import Config, new_table
+from mlconf.distributions import DISTRIBUTIONS, Distribution
+from mlconf.errors import InvalidBinaryConfigError, UnsupportedValueError
+from mlconf.extended_list_and_tuple import ExtendedList, ExtendedTuple, FrozenList
+
+# Layout, all little-endian: a header of magic, version, flags and the
+# offset of the root block, then the nodes. A value is a slot of a tag byte
+# and a 32 bit payload, which holds small ints inline and the offset of the
+# node otherwise. Children are written before the containers holding them.
+#
+#   string, big int  u32 size, bytes
+#   float            f64
+#   list, tuple      u32 n, n tags, n payloads
+#   block            u32 n, n key offsets, n tags, n payloads, n indices
+#                    of the keys in byte order
+#   distribution     u32 name offset, u32 arguments tuple offset
+MAGIC = b"MLCB"
+VERSION = 1
+HEADER = struct.Struct("<4sHHI")
+# Writes are buffered in chunks of about this many bytes.
+CHUNK_BYTES = 1 << 20
+
+NONE, FALSE, TRUE, INT, BIG_INT, FLOAT, STR, LIST, TUPLE, CONFIG, DISTRIBUTION = range(
+    11
+)
+CONTAINERS = (LIST, TUPLE, CONFIG, DISTRIBUTION)
+SIZE = struct.Struct("<I")
+DOUBLE = struct.Struct("<d")
+PAIR = struct.Struct("<II")
+INT_MIN, INT_MAX = -(1 << 31), (1 << 31) - 1
+MAX_OFFSET = (1 << 32) - 1
+
+PathLike = Union[str, "os.PathLike[str]"]
+Slot = Tuple[int, int]
+
+
+def order_code(size: int) -> str:
+    # Blocks index their keys with the smallest integer that fits.
+    return "B" if size <= 1 << 8 else "H" if size <= 1 << 16 else "I"
+
+
+class BinaryReader:
+    def __init__(self, buffer: Any, frozen: bool = False) -> None:
+        # buffer is anything struct reads from and slices to bytes, an mmap
+        # of the file or a memoryview. Frozen readers decode read-only
+        # blocks and lists.
+        self.buffer = buffer
+        self.config_type = FrozenBinaryConfig if frozen else BinaryConfig
+        self.list_type = FrozenList if frozen else ExtendedList
+        if len(buffer) < HEADER.size:
+            raise InvalidBinaryConfigError("file is too short for a binary config")
+        magic, version, _, self.root = HEADER.unpack_from(buffer, 0)
+        if magic != MAGIC:
+            raise InvalidBinaryConfigError("file is not a binary config")
+        if version != VERSION:
+            raise InvalidBinaryConfigError(
+                f"binary config version {version} is not supported, expected {VERSION}"
+            )
+        if not HEADER.size <= self.root <= len(buffer) - SIZE.size:
+            raise InvalidBinaryConfigError("binary config has no root block")
+        # Decoded containers by offset, shared nodes stay shared and changes
+        # to a decoded node are kept.
+        self.nodes: Dict[int, Any] = {}
+        # Decoded keys by offset, interned once.
+        self.keys: Dict[int, str] = {}
+        self.shapes: Dict[bytes, Tuple[str, ...]] = {}
+
+    def decode(self, tag: int, payload: int) -> Any:
+        if tag == INT:
+            return payload - ((payload & 0x80000000) << 1)
+        elif tag == STR:
+            return self.string(payload)
+        elif tag == FLOAT:
+            return DOUBLE.unpack_from(self.buffer, payload)[0]
+        elif tag == NONE:
+            return None
+        elif tag == FALSE:
+            return False
+        elif tag == TRUE:
+            return True
+        elif tag == BIG_INT:
+            size = SIZE.unpack_from(self.buffer, payload)[0]
+            data = self.buffer[payload + 4 : payload + 4 + size]
+            return int.from_bytes(data, "little", signed=True)
+        elif tag not in CONTAINERS:
+            raise InvalidBinaryConfigError(f"unknown tag {tag} at offset {payload}")
+        elif payload in self.nodes:
+            return self.nodes[payload]
+        elif tag == CONFIG:
+            node: Any = self.config_type(self, payload)
+        elif tag == DISTRIBUTION:
+            name, arguments = PAIR.unpack_from(self.buffer, payload)
+            node = DISTRIBUTIONS[self.string(name)](*self.decode(TUPLE, arguments))
+        else:
+            tags, payloads = self.slots(payload, 0)
+            items = [self.decode(*slot) for slot in zip(tags, payloads)]
+            node = self.list_type(items) if tag == LIST else ExtendedTuple(items)
+        self.nodes[payload] = node
+        return node
+
+    def slots(self, offset: int, keys: int) -> Tuple[bytes, Tuple[int, ...]]:
+        # The tags and payloads of a container, after keys key offsets.
+        size = SIZE.unpack_from(self.buffer, offset)[0]
+        start = offset + 4 + 4 * keys
+        tags = bytes(self.buffer[start : start + size])
+        return tags, struct.unpack_from(f"<{size}I", self.buffer, start + size)
+
+    def string(self, offset: int) -> str:
+        size = SIZE.unpack_from(self.buffer, offset)[0]
+        return str(self.buffer[offset + 4 : offset + 4 + size], "utf-8")
+
+    def key(self, offset: int) -> str:
+        if offset not in self.keys:
+            self.keys[offset] = sys.intern(self.string(offset))
+        return self.keys[offset]
+
+    def names(self, offset: int, size: int) -> Tuple[str, ...]:
+        # The writer shares key offsets between blocks with the same keys,
+        # so their bytes find the decoded keys.
+        data = bytes(self.buffer[offset + 4 : offset + 4 + 4 * size])
+        if data not in self.shapes:
+            offsets = struct.unpack(f"<{size}I", data)
+            self.shapes[data] = tuple(self.key(key) for key in offsets)
+        return self.shapes[data]
+
+    def lookup(self, offset: int, size: int, key: str) -> Optional[Slot]:
+        # Binary search over the keys in byte order, only the keys it
+        # compares are read.
+        buffer = self.buffer
+        tags = offset + 4 + 4 * size
+        payloads = tags + size
+        orders = payloads + 4 * size
+        order = struct.Struct(f"<{order_code(size)}")
+        encoded = key.encode("utf-8")
+        low, high = 0, size
+        while low < high:
+            middle = (low + high) // 2
+            index = order.unpack_from(buffer, orders + order.size * middle)[0]
+            position = SIZE.unpack_from(buffer, offset + 4 + 4 * index)[0]
+            length = SIZE.unpack_from(buffer, position)[0]
+            found = bytes(buffer[position + 4 : position + 4 + length])
+            if found == encoded:
+                payload = SIZE.unpack_from(buffer, payloads + 4 * index)[0]
+                return buffer[tags + index], payload
+            elif found < encoded:
+                low = middle + 1
+            else:
+                high = middle
+        return None
+
+
+class BinaryConfig(Config):
+    __slots__ = ("_reader", "_offset", "_size", "_table")
+
+    def __init__(self, reader: BinaryReader, offset: int) -> None:
+        object.__setattr__(self, "_reader", reader)
+        object.__setattr__(self, "_offset", offset)
+        object.__setattr__(self, "_size", SIZE.unpack_from(reader.buffer, offset)[0])
+        object.__setattr__(self, "_table", None)
+        object.__setattr__(self, "_templates", None)
+
+    _reader: BinaryReader
+    _offset: int
+    _size: int
+    _table: Optional[Dict[str, Any]]
+
+    # Methods that need every item decode the whole block into the table
+    # once, reads of single keys before that look the key up in the file.
+    @property
+    def _config(self) -> Dict[str, Any]:
+        table = self._table
+        if table is None:
+            reader = self._reader
+            keys = reader.names(self._offset, self._size)
+            tags, payloads = reader.slots(self._offset, self._size)
+            table = new_table(keys)
+            for key, tag, payload in zip(keys, tags, payloads):
+                if tag == INT:
+                    table[key] = payload - ((payload & 0x80000000) << 1)
+                else:
+                    table[key] = reader.decode(tag, payload)
+            object.__setattr__(self, "_table", table)
+        return table
+
+    @_config.setter
+    def _config(self, value: Dict[str, Any]) -> None:
+        object.__setattr__(self, "_table", value)
+
+    def __getitem__(self, key: str) -> Any:
+        if self._table is not None:
+            return self._table[key]
+        slot = self._reader.lookup(self._offset, self._size, key)
+        if slot is None:
+            raise KeyError(key)
+        return self._reader.decode(*slot)
+
+    def __getattr__(self, key: str) -> Any:
+        return self[key]
+
+    def __contains__(self, key: str) -> bool:
+        if self._table is not None:
+            return key in self._table
+        return self._reader.lookup(self._offset, self._size, key) is not None
+
+    def __len__(self) -> int:
+        if self._table is not None:
+            return len(self._table)
+        return self._size
+
+    def keys(self) -> List[Any]:
+        if self._table is not None:
+            return list(self._table)
+        return list(self._reader.names(self._offset, self._size))
+
+    def __reduce__(self) -> Any:
+        # Pickles as a plain config, the mapping stays with this process.
+        return Config, ({},), (None, {"_config": self._config})
+
+
+class FrozenBinaryConfig(BinaryConfig):
+    __slots__ = ()
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        raise TypeError("'FrozenBinaryConfig' object does not support item assignment")
+
+    def __setattr__(self, key: str, value: Any) -> None:
+        raise TypeError(
+            "'FrozenBinaryConfig' object does not support attribute assignment"
+        )
+
+
+class BinaryWriter:
+    def __init__(self, fp: IO[bytes]) -> None:
+        self.fp = fp
+        self.chunks: List[bytes] = []
+        self.buffered = 0
+        self.position = HEADER.size
+        # Strings and floats are written once per value, containers once
+        # per object.
+        self.strings: Dict[str, int] = {}
+        self.floats: Dict[bytes, int] = {}
+        self.nodes: Dict[int, Slot] = {}
+        self.shapes: Dict[Tuple[str, ...], Tuple[bytes, bytes]] = {}
+        # Keeps the containers alive so their ids are not reused.
+        self.written: List[Any] = []
+
+    def write(self, data: bytes) -> int:
+        offset = self.position
+        if offset + len(data) > MAX_OFFSET:
+            raise UnsupportedValueError("binary configs are limited to 4GiB")
+        self.chunks.append(data)
+        self.position += len(data)
+        self.buffered += len(data)
+        if self.buffered >= CHUNK_BYTES:
+            self.flush()
+        return offset
+
+    def flush(self) -> None:
+        self.fp.write(b"".join(self.chunks))
+        self.chunks.clear()
+        self.buffered = 0
+
+    def write_string(self, value: str) -> int:
+        if value not in self.strings:
+            data = value.encode("utf-8")
+            self.strings[value] = self.write(SIZE.pack(len(data)) + data)
+        return self.strings[value]
+
+    def encode(self, value: Any, path: str) -> Slot:
+        cls = type(value)
+        if cls is str:
+            return STR, self.write_string(value)
+        elif cls is int:
+            if INT_MIN <= value <= INT_MAX:
+                return INT, value & MAX_OFFSET
+            data = value.to_bytes(value.bit_length() // 8 + 1, "little", signed=True)
+            return BIG_INT, self.write(SIZE.pack(len(data)) + data)
+        elif cls is bool:
+            return TRUE if value else FALSE, 0
+        elif value is None:
+            return NONE, 0
+        elif cls is float:
+            # Keyed by the bits, -0.0 and 0.0 are equal but not the same.
+            data = DOUBLE.pack(value)
+            if data not in self.floats:
+                self.floats[data] = self.write(data)
+            return FLOAT, self.floats[data]
+        elif id(value) in self.nodes:
+            return self.nodes[id(value)]
+        elif isinstance(value, Config):
+            slot = CONFIG, self.write_config(value, path)
+        elif isinstance(value, (list, tuple)):
+            prefix = f"{path}.l" if isinstance(value, list) else f"{path}.t"
+            tags, payloads = self.encode_items(value, lambda i: f"{prefix}{i}")
+            slot = (
+                LIST if isinstance(value, list) else TUPLE,
+                self.write(
+                    b"".join([SIZE.pack(len(value)), tags, pack("I", payloads)])
+                ),
+            )
+        elif isinstance(value, Distribution) and value.name in DISTRIBUTIONS:
+            name = self.write_string(value.name)
+            arguments = self.encode(tuple(value.args), path)[1]
+            slot = DISTRIBUTION, self.write(PAIR.pack(name, arguments))
+        elif isinstance(value, bool):
+            return self.encode(bool(value), path)
+        elif isinstance(value, int):
+            return self.encode(int(value), path)
+        elif isinstance(value, float):
+            return self.encode(float(value), path)
+        elif isinstance(value, str):
+            return self.encode(str(value), path)
+        else:
+            raise UnsupportedValueError(f"'{path}': {value!r} has no binary encoding")
+        self.nodes[id(value)] = slot
+        self.written.append(value)
+        return slot
+
+    def encode_items(
+        self, values: Iterable[Any], path: Callable[[int], str]
+    ) -> Tuple[bytes, List[int]]:
+        # Known strings and small ints, most values, skip the call to encode.
+        strings = self.strings
+        tags = bytearray()
+        payloads = []
+        for i, value in enumerate(values):
+            cls = type(value)
+            if cls is str and value in strings:
+                tag, payload = STR, strings[value]
+            elif cls is int and INT_MIN <= value <= INT_MAX:
+                tag, payload = INT, value & MAX_OFFSET
+            else:
+                tag, payload = self.encode(value, path(i))
+            tags.append(tag)
+            payloads.append(payload)
+        return bytes(tags), payloads
+
+    def write_config(self, config: Config, path: str) -> int:
+        table = config._config
+        names = tuple(table)
+        if names not in self.shapes:
+            # Blocks with the same keys share their key offsets and order.
+            keys = [self.write_string(key) for key in names]
+            encoded = [key.encode("utf-8") for key in names]
+            order = sorted(range(len(names)), key=encoded.__getitem__)
+            self.shapes[names] = (
+                SIZE.pack(len(names)) + pack("I", keys),
+                pack(order_code(len(names)), order),
+            )
+        head, tail = self.shapes[names]
+        tags, payloads = self.encode_items(
+            table.values(), lambda i: f"{path}.{names[i]}" if path else names[i]
+        )
+        return self.write(b"".join([head, tags, pack("I", payloads), tail]))
+
+
+def pack(code: str, values: List[int]) -> bytes:
+    return struct.pack(f"<{len(values)}{code}", *values)
+
+
+def write_binary(config: Config, fp: IO[bytes]) -> None:
+    # Offsets count from the start of fp, which must be seekable, the root
+    # offset is written last.
+    config = config.resolve_all()
+    fp.write(HEADER.pack(MAGIC, VERSION, 0, 0))
+    writer = BinaryWriter(fp)
+    root = writer.write_config(config, "")
+    writer.flush()
+    fp.seek(0)
+    fp.write(HEADER.pack(MAGIC, VERSION, 0, root))
+
+
+def dump_binary(config: Config, path: PathLike) -> None:
+    with open(path, "wb") as fp:
+        write_binary(config, fp)
+
+
+def load_binary(path: PathLike) -> Config:
+    # Maps the file and reads nothing but the header, blocks decode their
+    # keys and values when they are read.
+    with open(path, "rb") as fp:
+        if os.fstat(fp.fileno()).st_size < HEADER.size:
+            raise InvalidBinaryConfigError("file is too short for a binary config")
+        buffer = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+    reader = BinaryReader(buffer)
+    return BinaryConfig(reader, reader.root)
@@ -0,0 +1,160 @@
+import hashlib
+import os
+import pickle
+import threading
+from collections import OrderedDict
+from importlib import metadata
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from mlconf.parser import ImportValue, parse_source
+from mlconf.stats import LoadStats, phase
+
+try:
+    MLCONF_VERSION = metadata.version("mlconf")
+except metadata.PackageNotFoundError:
+    MLCONF_VERSION = "unknown"
+
+CACHE_SUFFIX = ".pickle"
+
+ParsedSource = Tuple[List[ImportValue], Dict[str, Any]]
+
+
+class ParseCache:
+    def __init__(
+        self,
+        directory: Union[str, "os.PathLike[str]"],
+        max_bytes: int = 256 * 1024 * 1024,
+        max_memory_bytes: int = 64 * 1024 * 1024,
+    ) -> None:
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.max_memory_bytes = max_memory_bytes
+        # Entries are kept pickled in memory too, which hands every hit an
+        # independent AST and makes the layer easy to bound by size.
+        self.memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self.memory_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        # The loader parses files from a thread pool.
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def get_key(string: str) -> str:
+        digest = hashlib.sha256()
+        digest.update(f"{MLCONF_VERSION}:{pickle.HIGHEST_PROTOCOL}:".encode())
+        digest.update(string.encode())
+        return digest.hexdigest()
+
+    def get_path(self, key: str) -> Path:
+        return self.directory / (key + CACHE_SUFFIX)
+
+    def parse_source(
+        self, string: str, stats: Optional[LoadStats] = None
+    ) -> ParsedSource:
+        key = self.get_key(string)
+        with phase(stats, "cache"):
+            parsed = self.get(key)
+        if stats is not None:
+            stats.count("cache_misses" if parsed is None else "cache_hits")
+        if parsed is not None:
+            return parsed
+        parsed = parse_source(string, stats)
+        self.put(key, parsed)
+        return parsed
+
+    def get(self, key: str) -> Optional[ParsedSource]:
+        with self.lock:
+            data = self.memory.get(key)
+            if data is not None:
+                self.memory.move_to_end(key)
+        if data is None:
+            data = self.read(key)
+            if data is not None:
+                self.remember(key, data)
+        if data is None:
+            with self.lock:
+                self.misses += 1
+            return None
+        try:
+            parsed: ParsedSource = pickle.loads(data)
+        except Exception:
+            self.discard(key)
+            with self.lock:
+                self.misses += 1
+            return None
+        with self.lock:
+            self.hits += 1
+        return parsed
+
+    def put(self, key: str, parsed: ParsedSource) -> None:
+        data = pickle.dumps(parsed, protocol=pickle.HIGHEST_PROTOCOL)
+        self.remember(key, data)
+        self.write(key, data)
+
+    def remember(self, key: str, data: bytes) -> None:
+        with self.lock:
+            if key in self.memory:
+                self.memory_bytes -= len(self.memory.pop(key))
+            self.memory[key] = data
+            self.memory_bytes += len(data)
+            while self.memory_bytes > self.max_memory_bytes and self.memory:
+                _, evicted = self.memory.popitem(last=False)
+                self.memory_bytes -= len(evicted)
+
+    def read(self, key: str) -> Optional[bytes]:
+        path = self.get_path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            # The modification time doubles as the last use for eviction.
+            os.utime(path)
+        except OSError:
+            return None
+        return data
+
+    def write(self, key: str, data: bytes) -> None:
+        path = self.get_path(key)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}")
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        self.evict()
+
+    def evict(self) -> None:
+        entries = []
+        total = 0
+        for path in self.directory.glob("*" + CACHE_SUFFIX):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, path))
+            total += stat.st_size
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            total -= size
+
+    def discard(self, key: str) -> None:
+        with self.lock:
+            data = self.memory.pop(key, None)
+            if data is not None:
+                self.memory_bytes -= len(data)
+        try:
+            self.get_path(key).unlink()
+        except OSError:
+            pass
+
+    def clear(self) -> None:
+        with self.lock:
+            self.memory.clear()
+            self.memory_bytes = 0
+        for path in self.directory.glob("*" + CACHE_SUFFIX):
+            path.unlink()
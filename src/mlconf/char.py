@@ -11,17 +11,9 @@ class CharStream:
     def get_lines(string: str) -> List[str]:
         lines = string.split("\n")
         final_lines = []
-        for i, line in enumerate(lines):
-            is_empty = True
-            final_char = ""
-            for char in line:
-                if char != " ":
-                    is_empty = False
-                    final_char = char
-                    break
-            if final_char == "#":
-                continue
-            if not is_empty:
+        for line in lines:
+            stripped = line.lstrip(" ")
+            if stripped and not stripped.startswith("#"):
                 final_lines.append(line + "\n")
         final_lines[-1] = final_lines[-1].rstrip("\n")
         final_lines[-1] += "\0"
@@ -0,0 +1,142 @@
+import importlib
+from array import array
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+from mlconf.config import Config
+
+try:
+    numpy: Any = importlib.import_module("numpy")
+except ImportError:
+    numpy = None
+
+# array typecodes per leaf type, anything else is kept in a list.
+TYPECODES = {bool: "b", int: "q", float: "d"}
+DTYPES = {"b": "bool", "q": "int64", "d": "float64"}
+
+
+class Column:
+    def __init__(self) -> None:
+        # Missing rows hold a filler value and a 0 in the mask.
+        self.typecode: Optional[str] = None
+        self.values: Union["array[Any]", List[Any]] = []
+        self.mask = bytearray()
+        self.present = 0
+
+    def __len__(self) -> int:
+        return len(self.mask)
+
+    def pad(self, length: int) -> None:
+        missing = length - len(self.mask)
+        if missing > 0:
+            filler = None if self.typecode is None else 0
+            self.values.extend([filler] * missing)
+            self.mask.extend(bytes(missing))
+
+    def append(self, value: Any, row: int) -> None:
+        if (
+            self.present
+            and len(self.mask) == row
+            and TYPECODES.get(type(value)) == self.typecode
+            and value is not None
+        ):
+            # The common case, the next row with the type of the column.
+            try:
+                self.values.append(value)
+                self.mask.append(1)
+                self.present += 1
+                return
+            except OverflowError:
+                pass
+        self.pad(row)
+        if value is None:
+            self.pad(row + 1)
+            return
+        typecode = TYPECODES.get(type(value))
+        if self.typecode != typecode:
+            if not self.present:
+                self.retype(typecode)
+            elif self.typecode is None:
+                pass
+            elif self.typecode == "d" and typecode == "q":
+                value = float(value)
+            elif self.typecode == "q" and typecode == "d":
+                self.retype("d")
+            else:
+                self.retype(None)
+        try:
+            self.values.append(value)
+        except OverflowError:
+            self.retype(None)
+            self.values.append(value)
+        self.mask.append(1)
+        self.present += 1
+
+    def retype(self, typecode: Optional[str]) -> None:
+        if typecode is None:
+            convert = bool if self.typecode == "b" else None
+            self.values = [
+                (convert(value) if convert else value) if present else None
+                for value, present in zip(self.values, self.mask)
+            ]
+        elif self.typecode is None:
+            self.values = array(typecode, [0] * len(self.values))
+        else:
+            self.values = array(typecode, self.values)
+        self.typecode = typecode
+
+    @property
+    def dtype(self) -> str:
+        return "object" if self.typecode is None else DTYPES[self.typecode]
+
+    def __getitem__(self, row: int) -> Any:
+        if not self.mask[row]:
+            return None
+        value = self.values[row]
+        return bool(value) if self.typecode == "b" else value
+
+    def tolist(self) -> List[Any]:
+        return [self[row] for row in range(len(self))]
+
+    def to_numpy(self) -> Any:
+        # A masked array, the mask is set on missing rows.
+        if numpy is None:
+            raise ImportError("Column.to_numpy requires numpy")
+        if self.typecode is None:
+            values = numpy.array(self.values, dtype=object)
+        else:
+            values = numpy.frombuffer(self.values, dtype=DTYPES[self.typecode])
+        mask = numpy.frombuffer(self.mask, dtype="uint8") == 0
+        return numpy.ma.MaskedArray(values, mask=mask)
+
+    def __repr__(self) -> str:
+        return f"Column({self.dtype}, {self.tolist()})"
+
+
+def add_leaves(value: Any, prefix: str, row: int, columns: Dict[str, Column]) -> None:
+    if isinstance(value, Config):
+        items: Iterable[Any] = value.items()
+    else:
+        letter = "t" if isinstance(value, tuple) else "l"
+        items = ((f"{letter}{i}", item) for i, item in enumerate(value))
+    for key, item in items:
+        if isinstance(item, (Config, list, tuple)):
+            add_leaves(item, f"{prefix}{key}.", row, columns)
+            continue
+        path = prefix + key
+        column = columns.get(path)
+        if column is None:
+            column = columns[path] = Column()
+        column.append(item, row)
+
+
+def to_columns(configs: Iterable[Config]) -> Dict[str, Column]:
+    # One column per dotted leaf path, in order of first appearance. None
+    # and leaves a config does not have are missing values.
+    columns: Dict[str, Column] = {}
+    rows = 0
+    for config in configs:
+        add_leaves(config, "", rows, columns)
+        rows += 1
+    for column in columns.values():
+        column.pad(rows)
+    return columns
@@ -1,12 +1,158 @@
 import copy
-from typing import Any, Dict, List, Tuple
+import functools
+import io
+import sys
+from typing import (
+    IO,
+    TYPE_CHECKING,
+    Any,
+    Dict,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
 
-from mlconf.extended_list_and_tuple import ExtendedList, ExtendedTuple
+from mlconf.distributions import Distribution, RandomState
+from mlconf.extended_list_and_tuple import ExtendedList, ExtendedTuple, FrozenList
+
+if TYPE_CHECKING:
+    from mlconf.template import Template
+
+MISSING = object()
+
+# Templates rendered from other config values, by path in the order they
+# were rendered, with the path each placeholder refers to and the
+# environment.
+TemplateIndex = Dict[str, Tuple["Template", Dict[str, str], Mapping[str, str]]]
+
+# Blocks with the same keys share one key table: their dicts are instance
+# dicts of a class made for that key set, which CPython stores as split
+# tables that only hold the values. Key sets seen once get a plain dict.
+KEY_TABLES: Dict[Tuple[str, ...], Optional[type]] = {}
+MAX_KEY_TABLES = 4096
+MAX_TABLE_KEYS = 30
+
+
+def new_table(keys: Tuple[str, ...]) -> Dict[str, Any]:
+    # The caller inserts keys in this order, which is what lets the values
+    # share the table.
+    if keys not in KEY_TABLES:
+        if len(KEY_TABLES) < MAX_KEY_TABLES and 1 < len(keys) <= MAX_TABLE_KEYS:
+            KEY_TABLES[keys] = None
+        return {}
+    table = KEY_TABLES[keys]
+    if table is None:
+        table = KEY_TABLES[keys] = type("KeyTable", (), {})
+    values: Dict[str, Any] = table().__dict__
+    return values
+
+
+def copy_table(table: Dict[str, Any]) -> Dict[str, Any]:
+    values = new_table(tuple(table))
+    values.update(table)
+    return values
+
+
+def is_ancestor(reference: str, path: str) -> bool:
+    return path == reference or path.startswith(f"{reference}.")
+
+
+def parse_index(key: str, prefix: str) -> int:
+    index = key[1:]
+    if key.startswith(prefix) and index.isdigit() and str(int(index)) == index:
+        return int(index)
+    return -1
+
+
+class ConfigPath:
+    __slots__ = ("path", "keys", "list_indices", "tuple_indices", "segments")
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.keys = tuple(path.split("."))
+        # l<i> and t<i> segments are parsed once, -1 marks any other key.
+        self.list_indices = tuple(parse_index(key, "l") for key in self.keys)
+        self.tuple_indices = tuple(parse_index(key, "t") for key in self.keys)
+        self.segments = tuple(zip(range(len(self.keys)), self.keys, self.list_indices))
+
+    def get(self, config: "Config") -> Any:
+        value: Any = config
+        try:
+            # Plain configs and lists are inlined, step handles the rest.
+            for depth, key, index in self.segments:
+                cls = type(value)
+                if cls is Config:
+                    value = value._config[key]
+                elif cls is ExtendedList and index >= 0:
+                    value = list.__getitem__(value, index)
+                else:
+                    value = self.step(value, depth)
+        except (KeyError, IndexError):
+            raise KeyError(f"'{self.path}' not found in config") from None
+        return value
+
+    def step(self, value: Any, depth: int) -> Any:
+        # Walks one segment down from value, the tree is never cached so
+        # reads stay correct after it is mutated.
+        if type(value) is Config:
+            value = value._config.get(self.keys[depth], MISSING)
+        elif isinstance(value, Config):
+            key = self.keys[depth]
+            value = value[key] if key in value else MISSING
+        elif isinstance(value, list):
+            index = self.list_indices[depth]
+            value = value[index] if 0 <= index < len(value) else MISSING
+        elif isinstance(value, tuple):
+            index = self.tuple_indices[depth]
+            value = value[index] if 0 <= index < len(value) else MISSING
+        else:
+            value = MISSING
+        if value is MISSING:
+            raise KeyError(f"'{self.path}' not found in config")
+        return value
+
+    def __repr__(self) -> str:
+        return f"ConfigPath({self.path})"
+
+
+@functools.lru_cache(maxsize=4096)
+def compile_path(path: str) -> ConfigPath:
+    return ConfigPath(path)
+
+
+PathPlan = List[Tuple[int, int, Tuple[Tuple[int, str, int], ...], ConfigPath]]
+
+
+@functools.lru_cache(maxsize=256)
+def compile_paths(paths: Tuple[Union[str, ConfigPath], ...]) -> PathPlan:
+    # Visits the paths in sorted order so each one only walks the segments
+    # it does not share with the path before it.
+    compiled = [
+        path if isinstance(path, ConfigPath) else compile_path(path) for path in paths
+    ]
+    plan: PathPlan = []
+    previous: Tuple[str, ...] = ()
+    for i in sorted(range(len(compiled)), key=lambda i: compiled[i].keys):
+        path = compiled[i]
+        common = 0
+        limit = min(len(previous), len(path.keys))
+        while common < limit and previous[common] == path.keys[common]:
+            common += 1
+        plan.append((i, common, path.segments[common:], path))
+        previous = path.keys
+    return plan
 
 
 class Config:
+    __slots__ = ("_config", "_templates")
+
     def __init__(self, config: Dict[str, Any]) -> None:
-        self._config: Dict[str, Any] = {}
+        self._config: Dict[str, Any] = new_table(tuple(config.keys()))
+        self._templates: Optional[TemplateIndex] = None
         for key, value in config.items():
             assert isinstance(key, str), "Key must be a string"
             self.__setitem__(key, value)
@@ -18,6 +164,7 @@ class Config:
         return self._config[key]
 
     def __setitem__(self, key: str, value: Any) -> None:
+        key = sys.intern(key)
         if isinstance(value, Dict):
             self._config[key] = Config(value)
         elif isinstance(value, List):
@@ -32,6 +179,8 @@ class Config:
             self._config[key] = value
 
     def resolve_list(self, value: List[Any]) -> List[Any]:
+        # Work on a copy, nested lists may be shared with a cached AST.
+        value = list(value)
         for i, item in enumerate(value):
             if isinstance(item, Dict):
                 value[i] = Config(item)
@@ -57,8 +206,8 @@ class Config:
         return ExtendedTuple(value_list)
 
     def __setattr__(self, key: str, value: Any) -> None:
-        if key == "_config":
-            self.__dict__["_config"] = value
+        if key == "_config" or key == "_templates":
+            object.__setattr__(self, key, value)
         elif key not in self._config:
             raise AttributeError(f"'Config' object has no attribute '{key}'")
         elif isinstance(value, Dict):
@@ -69,11 +218,12 @@ class Config:
     def __eq__(self, other: Any) -> bool:
         if not isinstance(other, Config):
             return False
-        for key, value in self._config.items():
-            if key not in other._config or value != other._config[key]:
+        table, other_table = self._config, other._config
+        for key, value in table.items():
+            if key not in other_table or value != other_table[key]:
                 return False
-        for key, value in other._config.items():
-            if key not in self._config or value != self._config[key]:
+        for key, value in other_table.items():
+            if key not in table or value != table[key]:
                 return False
         return True
 
@@ -97,14 +247,325 @@ class Config:
 
     def __deepcopy__(self, memo: Dict[int, Any]) -> "Config":
         new_instance = Config({})
-        new_instance.__dict__["_config"] = copy.deepcopy(self._config, memo)
+        new_instance._config = copy_table(copy.deepcopy(self._config, memo))
+        new_instance._templates = self._templates
         return new_instance
 
+    def __getstate__(self) -> Any:
+        return None, {key: getattr(self, key) for key in get_slots(type(self))}
+
+    def __setstate__(self, state: Any) -> None:
+        # Unpickling looks attributes up before _config exists, which
+        # __getattr__ cannot answer.
+        for key, value in state[1].items():
+            if key == "_config":
+                value = copy_table(value)
+            object.__setattr__(self, key, value)
+
+    def resolve_all(self) -> "Config":
+        return self
+
+    @staticmethod
+    def compile_path(path: str) -> ConfigPath:
+        return compile_path(path)
+
+    def get_many(self, paths: Iterable[Union[str, ConfigPath]]) -> List[Any]:
+        plan = compile_paths(paths if isinstance(paths, tuple) else tuple(paths))
+        values: List[Any] = [None] * len(plan)
+        # nodes[d] is the value d segments down the previous path.
+        nodes: List[Any] = [self]
+        for i, common, segments, path in plan:
+            del nodes[common + 1 :]
+            value = nodes[-1]
+            try:
+                for depth, key, index in segments:
+                    cls = type(value)
+                    if cls is Config:
+                        value = value._config[key]
+                    elif cls is ExtendedList and index >= 0:
+                        value = list.__getitem__(value, index)
+                    else:
+                        value = path.step(value, depth)
+                    nodes.append(value)
+            except (KeyError, IndexError):
+                raise KeyError(f"'{path.path}' not found in config") from None
+            values[i] = value
+        return values
+
     def get_item_from_dot_notation(self, item: str) -> Any:
-        keys = item.split(".")
-        value = self._config
-        for key in keys:
-            if key not in value:
-                raise KeyError(f"'{item}' not found in config")
-            value = value[key]
+        return compile_path(item).get(self)
+
+    def freeze(self) -> "FrozenConfig":
+        config = self.resolve_all()
+        frozen = FrozenConfig(config._config)
+        object.__setattr__(frozen, "_templates", config._templates)
+        return frozen
+
+    def with_overrides(self, overrides: Dict[str, Any]) -> "Config":
+        # Path copying: only the nodes along the overridden paths are copied,
+        # every other subtree is shared with this config.
+        root = self.resolve_all()
+        config: Config = copy_node(root)
+        copies = {id(config)}
+        frozen = isinstance(self, FrozenConfig)
+        for path, value in overrides.items():
+            if frozen:
+                value = freeze(value, {})
+            elif isinstance(value, dict):
+                value = Config(value)
+            elif isinstance(value, list):
+                value = self.resolve_list(value)
+            elif isinstance(value, tuple):
+                value = self.resolve_tuple(value)
+            config = override(config, compile_path(path), 0, value, copies)
+        if root._templates:
+            config = render_templates(config, root._templates, list(overrides), copies)
+        return config
+
+    def sample(self, n: int, seed: Optional[int] = None) -> List["Config"]:
+        # Every distribution is drawn n times in one call, paths sharing a
+        # distribution through a reference share its draws.
+        config = self.resolve_all()
+        distributions: Dict[int, Tuple[Distribution, List[str]]] = {}
+        find_distributions(config, "", distributions)
+        state = RandomState(seed)
+        columns = [
+            (paths, distribution.sample(n, state))
+            for distribution, paths in distributions.values()
+        ]
+        return [
+            config.with_overrides(
+                {path: values[i] for paths, values in columns for path in paths}
+            )
+            for i in range(n)
+        ]
+
+    def with_overrides_many(self, batch: Iterable[Dict[str, Any]]) -> List["Config"]:
+        return [self.with_overrides(overrides) for overrides in batch]
+
+    def dump(self, fp: IO[str]) -> None:
+        # Writes the config in the syntax parse reads, in chunks of lines.
+        from mlconf.dump import dump
+
+        dump(self, fp)
+
+    def dumps(self) -> str:
+        fp = io.StringIO()
+        self.dump(fp)
+        return fp.getvalue()
+
+
+def freeze(value: Any, memo: Dict[int, Any]) -> Any:
+    # memo maps ids of already frozen nodes so shared subtrees stay shared.
+    if id(value) in memo:
+        return memo[id(value)]
+    if isinstance(value, FrozenConfig) or type(value) is FrozenList:
         return value
+    elif isinstance(value, (dict, Config)):
+        frozen: Any = FrozenConfig(
+            value._config if isinstance(value, Config) else value, memo
+        )
+    elif isinstance(value, list):
+        frozen = FrozenList(freeze(item, memo) for item in value)
+    elif isinstance(value, tuple):
+        frozen = ExtendedTuple([freeze(item, memo) for item in value])
+    else:
+        return value
+    memo[id(value)] = frozen
+    return frozen
+
+
+def thaw(value: Any) -> Any:
+    if isinstance(value, FrozenConfig):
+        return value.thaw()
+    elif isinstance(value, list):
+        return ExtendedList([thaw(item) for item in value])
+    elif isinstance(value, tuple):
+        return ExtendedTuple([thaw(item) for item in value])
+    return value
+
+
+def find_distributions(
+    value: Any, path: str, found: Dict[int, Tuple[Distribution, List[str]]]
+) -> None:
+    if isinstance(value, Distribution):
+        found.setdefault(id(value), (value, []))[1].append(path)
+    elif isinstance(value, Config):
+        for key, item in value._config.items():
+            find_distributions(item, f"{path}.{key}" if path else key, found)
+    elif isinstance(value, (list, tuple)):
+        prefix = "t" if isinstance(value, tuple) else "l"
+        for i, item in enumerate(value):
+            find_distributions(item, f"{path}.{prefix}{i}", found)
+
+
+def get_slots(cls: type) -> List[str]:
+    return [key for base in cls.__mro__ for key in getattr(base, "__slots__", ())]
+
+
+def render_templates(
+    config: Config, templates: TemplateIndex, changed: List[str], copies: Set[int]
+) -> Config:
+    # Templates below an overridden path were replaced with it. Of the
+    # others, only those referring to a changed path are rendered again,
+    # which changes their own path in turn. Passes repeat until nothing
+    # changes, the load order makes that one pass for most configs.
+    kept = {
+        path: entry
+        for path, entry in templates.items()
+        if not any(is_ancestor(other, path) for other in changed)
+    }
+    pending = dict(kept)
+    rendered = True
+    while rendered:
+        rendered = False
+        for path, (template, references, environment) in list(pending.items()):
+            if not any(
+                is_ancestor(reference, other) or is_ancestor(other, reference)
+                for reference in references.values()
+                for other in changed
+            ):
+                continue
+            del pending[path]
+            values = {
+                name: get_reference(config, reference, path)
+                for name, reference in references.items()
+            }
+            value = template.render(environment, values)
+            config = override(config, compile_path(path), 0, value, copies)
+            changed.append(path)
+            rendered = True
+    object.__setattr__(config, "_templates", kept)
+    return config
+
+
+def get_reference(config: Config, reference: str, path: str) -> Any:
+    # Like the variable resolver, a template never refers to itself or a
+    # block holding it.
+    if is_ancestor(reference, path):
+        return MISSING
+    try:
+        return compile_path(reference).get(config)
+    except KeyError:
+        return MISSING
+
+
+def copy_node(node: Any) -> Any:
+    if isinstance(node, FrozenConfig):
+        config: Config = FrozenConfig({})
+        object.__setattr__(config, "_config", copy_table(node._config))
+        return config
+    elif isinstance(node, Config):
+        config = Config({})
+        config._config = copy_table(node._config)
+        return config
+    elif isinstance(node, FrozenList):
+        return FrozenList(node)
+    return ExtendedList(node)
+
+
+def override(
+    node: Any, path: ConfigPath, depth: int, value: Any, copies: Set[int]
+) -> Any:
+    # Returns node with the value set at path, copying node unless it is
+    # already a copy made for this config. Tuples are rebuilt instead.
+    if depth == len(path.keys):
+        return value
+    key = path.keys[depth]
+    if isinstance(node, Config):
+        child = node._config.get(key, MISSING)
+    elif isinstance(node, (list, tuple)):
+        if isinstance(node, list):
+            index = path.list_indices[depth]
+        else:
+            index = path.tuple_indices[depth]
+        child = node[index] if 0 <= index < len(node) else MISSING
+    else:
+        child = MISSING
+    if child is MISSING:
+        raise KeyError(f"'{path.path}' not found in config")
+    child = override(child, path, depth + 1, value, copies)
+    if isinstance(node, tuple):
+        items = list(node)
+        items[index] = child
+        return ExtendedTuple(items)
+    if id(node) not in copies:
+        node = copy_node(node)
+        copies.add(id(node))
+    if isinstance(node, Config):
+        node._config[key] = child
+    else:
+        list.__setitem__(node, index, child)
+    return node
+
+
+class FrozenConfig(Config):
+    __slots__ = ("_hash",)
+
+    def __init__(
+        self, config: Dict[str, Any], memo: Optional[Dict[int, Any]] = None
+    ) -> None:
+        if memo is None:
+            memo = {}
+        for key in config:
+            assert isinstance(key, str), "Key must be a string"
+        table = new_table(tuple(config))
+        for key, value in config.items():
+            table[sys.intern(key)] = freeze(value, memo)
+        object.__setattr__(self, "_config", table)
+        object.__setattr__(self, "_templates", None)
+        object.__setattr__(self, "_hash", None)
+
+    _hash: Optional[int]
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        raise TypeError("'FrozenConfig' object does not support item assignment")
+
+    def __setattr__(self, key: str, value: Any) -> None:
+        raise TypeError("'FrozenConfig' object does not support attribute assignment")
+
+    def __hash__(self) -> int:
+        # Computed once per node, nested frozen nodes reuse their own cache.
+        if self._hash is None:
+            object.__setattr__(self, "_hash", hash(frozenset(self._config.items())))
+        return self._hash  # type: ignore[return-value]
+
+    def __eq__(self, other: Any) -> bool:
+        if self is other:
+            return True
+        if isinstance(other, FrozenConfig):
+            try:
+                if hash(self) != hash(other):
+                    return False
+            except TypeError:
+                # An unhashable leaf, fall back to comparing the items.
+                pass
+        return super().__eq__(other)
+
+    def __repr__(self) -> str:
+        return f"FrozenConfig({self._config})"
+
+    def __getstate__(self) -> Any:
+        # String hashes differ between processes, so the hash is not kept.
+        return None, {
+            "_config": self._config,
+            "_templates": self._templates,
+            "_hash": None,
+        }
+
+    def __copy__(self) -> "FrozenConfig":
+        return self
+
+    def __deepcopy__(self, memo: Dict[int, Any]) -> "FrozenConfig":
+        return self
+
+    def freeze(self) -> "FrozenConfig":
+        return self
+
+    def thaw(self) -> Config:
+        config = Config({})
+        config._config = copy_table(
+            {key: thaw(value) for key, value in self._config.items()}
+        )
+        config._templates = self._templates
+        return config
@@ -0,0 +1,156 @@
+import importlib
+import math
+import random
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Type
+
+from mlconf.errors import InvalidDistributionError
+
+try:
+    numpy: Any = importlib.import_module("numpy")
+except ImportError:
+    numpy = None
+
+
+def to_list(values: Any) -> List[Any]:
+    # Configs hold Python numbers, not NumPy scalars.
+    result: List[Any] = values.tolist()
+    return result
+
+
+class RandomState:
+    def __init__(self, seed: Optional[int] = None) -> None:
+        # NumPy draws a whole batch per call, the fallback one value at a
+        # time. The two backends give different samples for the same seed.
+        self.generator = None if numpy is None else numpy.random.default_rng(seed)
+        self.random = random.Random(seed)
+
+    def uniform(self, low: float, high: float, n: int) -> List[Any]:
+        if self.generator is not None:
+            return to_list(self.generator.uniform(low, high, n))
+        uniform = self.random.uniform
+        return [uniform(low, high) for _ in range(n)]
+
+    def loguniform(self, low: float, high: float, n: int) -> List[Any]:
+        if self.generator is not None:
+            values = self.generator.uniform(math.log(low), math.log(high), n)
+            return to_list(numpy.exp(values))
+        low, high = math.log(low), math.log(high)
+        uniform, exp = self.random.uniform, math.exp
+        return [exp(uniform(low, high)) for _ in range(n)]
+
+    def normal(self, mean: float, std: float, n: int) -> List[Any]:
+        if self.generator is not None:
+            return to_list(self.generator.normal(mean, std, n))
+        gauss = self.random.gauss
+        return [gauss(mean, std) for _ in range(n)]
+
+    def integers(self, low: int, high: int, n: int) -> List[Any]:
+        # Draws from [low, high).
+        if self.generator is not None:
+            return to_list(self.generator.integers(low, high, n))
+        randrange = self.random.randrange
+        return [randrange(low, high) for _ in range(n)]
+
+
+class Distribution(ABC):
+    name = ""
+
+    def __init__(self, *args: Any) -> None:
+        self.args = args
+
+    @abstractmethod
+    def sample(self, n: int, state: RandomState) -> List[Any]:
+        raise NotImplementedError
+
+    def __repr__(self) -> str:
+        return f"{self.name}({', '.join(repr(arg) for arg in self.args)})"
+
+    def __eq__(self, other: Any) -> bool:
+        if type(self) is not type(other):
+            return False
+        return bool(self.args == other.args)
+
+    def __hash__(self) -> int:
+        return hash((self.name, repr(self.args)))
+
+
+def get_number(distribution: str, value: Any) -> float:
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise InvalidDistributionError(f"{distribution} expects numbers, got {value!r}")
+    return value
+
+
+class Uniform(Distribution):
+    name = "uniform"
+
+    def __init__(self, low: Any, high: Any) -> None:
+        super().__init__(low, high)
+        self.low = get_number(self.name, low)
+        self.high = get_number(self.name, high)
+
+    def sample(self, n: int, state: RandomState) -> List[Any]:
+        return state.uniform(self.low, self.high, n)
+
+
+class LogUniform(Distribution):
+    name = "loguniform"
+
+    def __init__(self, low: Any, high: Any) -> None:
+        super().__init__(low, high)
+        self.low = get_number(self.name, low)
+        self.high = get_number(self.name, high)
+        if self.low <= 0 or self.high <= 0:
+            raise InvalidDistributionError("loguniform expects positive bounds")
+
+    def sample(self, n: int, state: RandomState) -> List[Any]:
+        return state.loguniform(self.low, self.high, n)
+
+
+class Normal(Distribution):
+    name = "normal"
+
+    def __init__(self, mean: Any, std: Any) -> None:
+        super().__init__(mean, std)
+        self.mean = get_number(self.name, mean)
+        self.std = get_number(self.name, std)
+
+    def sample(self, n: int, state: RandomState) -> List[Any]:
+        return state.normal(self.mean, self.std, n)
+
+
+class RandInt(Distribution):
+    name = "randint"
+
+    def __init__(self, low: Any, high: Any) -> None:
+        super().__init__(low, high)
+        if not all(isinstance(value, int) for value in (low, high)) or low >= high:
+            raise InvalidDistributionError("randint expects integers low < high")
+        self.low = low
+        self.high = high
+
+    def sample(self, n: int, state: RandomState) -> List[Any]:
+        return state.integers(self.low, self.high, n)
+
+
+class Choice(Distribution):
+    name = "choice"
+
+    def __init__(self, *options: Any) -> None:
+        super().__init__(*options)
+        if not options:
+            raise InvalidDistributionError("choice expects at least one option")
+        self.options = options
+
+    def sample(self, n: int, state: RandomState) -> List[Any]:
+        options = self.options
+        return [options[i] for i in state.integers(0, len(options), n)]
+
+
+DISTRIBUTIONS: Dict[str, Type[Distribution]] = {
+    "uniform": Uniform,
+    "loguniform": LogUniform,
+    "normal": Normal,
+    "randint": RandInt,
+    "choice": Choice,
+}
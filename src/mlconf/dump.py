@@ -0,0 +1,208 @@
+import math
+import re
+from decimal import Decimal
+from typing import IO, Any, Callable, Dict, List, Optional, Set
+
+from mlconf.config import Config
+from mlconf.distributions import Distribution
+from mlconf.errors import UnsupportedValueError
+from mlconf.resolver import default_registry
+from mlconf.tokenizer import KEY_WORDS, WORD_CHARS
+from mlconf.word import Word
+
+INDENT = "    "
+# Lines are buffered and written to the file in chunks of this many.
+CHUNK_LINES = 4096
+KEY_MATCH = re.compile(f"[{re.escape(WORD_CHARS)}]+").fullmatch
+# Characters a string needs more than double quotes for.
+SPECIAL_CHAR = re.compile('[$"\n\0]').search
+
+
+def format_float(value: float) -> str:
+    if not math.isfinite(value):
+        raise UnsupportedValueError(f"{value!r} reads back as a string")
+    text = repr(value)
+    if "e" in text:
+        # Exponents are only read in call arguments, 1e-05 is written as
+        # 0.00001 and 1e+16 as 10000000000000000.0.
+        text = format(Decimal(text), "f")
+        if "." not in text:
+            text += ".0"
+    return text
+
+
+# Items of lists and tuples that need no checks.
+SCALARS: Dict[type, Callable[[Any], str]] = {
+    int: int.__repr__,
+    bool: bool.__repr__,
+    type(None): repr,
+    float: format_float,
+}
+
+
+class Writer:
+    def __init__(self, fp: IO[str], root: Config) -> None:
+        self.fp = fp
+        self.root = root
+        self.lines: List[str] = []
+        # Keys already checked to be words.
+        self.keys: Set[str] = set()
+        # Paths of the blocks, found when a list holds a block.
+        self.blocks: Optional[Dict[int, str]] = None
+
+    def write_block(
+        self, config: Config, indent: str, path: str, head: Optional[str] = None
+    ) -> None:
+        # head replaces the indent of the first key, "- " for a block that
+        # is an item of a list.
+        if not config._config and path:
+            raise UnsupportedValueError(
+                f"'{path}' is an empty block, which has no syntax"
+            )
+        lines, keys = self.lines, self.keys
+        prefix = indent if head is None else head
+        for key, value in config._config.items():
+            if key not in keys:
+                if not KEY_MATCH(key) or key.upper() in KEY_WORDS:
+                    raise UnsupportedValueError(
+                        f"'{join(path, key)}' is not a valid key"
+                    )
+                keys.add(key)
+            cls = type(value)
+            if cls is str and SPECIAL_CHAR(value) is None:
+                lines.append(f'{prefix}{key}: "{value}"\n')
+            elif cls is int or cls is bool or value is None:
+                lines.append(f"{prefix}{key}: {value}\n")
+            elif cls is float and math.isfinite(value):
+                lines.append(f"{prefix}{key}: {format_float(value)}\n")
+            elif isinstance(value, Config):
+                lines.append(f"{prefix}{key}:\n")
+                self.write_block(value, indent + INDENT, join(path, key))
+            elif isinstance(value, list) and not is_flat(value):
+                lines.append(f"{prefix}{key}:\n")
+                self.write_list(value, indent + INDENT, join(path, key))
+            else:
+                lines.append(f"{prefix}{key}: {self.format_item(value, path, key)}\n")
+            prefix = indent
+            if len(lines) >= CHUNK_LINES:
+                self.flush()
+
+    def write_list(self, value: List[Any], indent: str, path: str) -> None:
+        # Lists of lists read better as "- " items. Only the last item can be
+        # a block, the block ends the list.
+        items = list(value)
+        last = items.pop() if isinstance(items[-1], Config) else None
+        for i, item in enumerate(items):
+            self.lines.append(f"{indent}- {self.format_item(item, path, f'l{i}')}\n")
+        if last is not None:
+            self.write_block(last, indent, f"{path}.l{len(items)}", f"{indent}- ")
+
+    def format_item(self, value: Any, path: str, key: str) -> str:
+        try:
+            return self.format_value(value)
+        except UnsupportedValueError as error:
+            raise UnsupportedValueError(f"'{join(path, key)}': {error}") from None
+
+    def flush(self) -> None:
+        self.fp.write("".join(self.lines))
+        self.lines.clear()
+
+    def format_value(self, value: Any, call: bool = False) -> str:
+        # Outside call arguments, strings are read back as templates, so
+        # their ${ are escaped, and words as references.
+        cls = type(value)
+        if cls is str:
+            return format_string(value, call)
+        elif cls is int or cls is bool or value is None:
+            return str(value)
+        elif cls is float:
+            return format_float(value)
+        elif isinstance(value, list):
+            return f"[{self.format_items(value, call)}]"
+        elif isinstance(value, tuple):
+            return f"({self.format_items(value, call)})"
+        elif isinstance(value, Config) and not call:
+            return self.format_reference(value)
+        elif isinstance(value, Distribution):
+            arguments = ", ".join(self.format_value(arg, True) for arg in value.args)
+            return f"{value.name}({arguments})"
+        elif isinstance(value, bool):
+            return str(bool(value))
+        elif isinstance(value, int):
+            return str(int(value))
+        elif isinstance(value, float):
+            return format_float(float(value))
+        elif isinstance(value, str):
+            return format_string(str(value), call)
+        raise UnsupportedValueError(f"{value!r} has no syntax")
+
+    def format_items(self, value: Any, call: bool) -> str:
+        if not value:
+            raise UnsupportedValueError("empty lists and tuples have no syntax")
+        return ", ".join(
+            [
+                SCALARS[type(item)](item)
+                if type(item) in SCALARS
+                else self.format_value(item, call)
+                for item in value
+            ]
+        )
+
+    def format_reference(self, config: Config) -> str:
+        # Blocks in lists have no syntax of their own. They come from
+        # references to blocks, which share the block, so they are written
+        # as a reference to the path the block is written at.
+        if self.blocks is None:
+            self.blocks = find_blocks(self.root, "", {})
+        path = self.blocks.get(id(config))
+        if (
+            path is None
+            or type(default_registry.compile().resolve(Word(path))) is not Word
+        ):
+            raise UnsupportedValueError("blocks inside lists have no syntax")
+        return path
+
+
+def find_blocks(config: Config, path: str, blocks: Dict[int, str]) -> Dict[int, str]:
+    for key, value in config._config.items():
+        if isinstance(value, Config) and id(value) not in blocks:
+            blocks[id(value)] = join(path, key)
+            find_blocks(value, join(path, key), blocks)
+    return blocks
+
+
+def is_flat(value: List[Any]) -> bool:
+    # Lists written inline, blocks before the last item are references.
+    for item in value:
+        if isinstance(item, (list, tuple)):
+            return False
+    return not value or not isinstance(value[-1], Config)
+
+
+def join(path: str, key: str) -> str:
+    return f"{path}.{key}" if path else key
+
+
+def format_string(value: str, call: bool) -> str:
+    # Strings have no escapes, only the other quote can be written inside.
+    if SPECIAL_CHAR(value) is None:
+        return f'"{value}"'
+    if not call and "${" in value:
+        value = value.replace("${", "$${")
+    if "\n" in value and any(
+        line.lstrip(" ")[:1] in ("", "#") for line in f"{value}'".split("\n")[1:]
+    ):
+        # The reader skips blank and comment lines, also inside strings.
+        raise UnsupportedValueError(f"{value!r} has a blank or comment line")
+    if '"' not in value and "\0" not in value:
+        return f'"{value}"'
+    elif "'" not in value and "\0" not in value:
+        return f"'{value}'"
+    raise UnsupportedValueError(f"{value!r} has both quotes or a NUL character")
+
+
+def dump(config: Config, fp: IO[str]) -> None:
+    config = config.resolve_all()
+    writer = Writer(fp, config)
+    writer.write_block(config, "", "")
+    writer.flush()
@@ -1,2 +1,30 @@
 class InvalidImportLocationError(Exception):
     pass
+
+
+class ImportCycleError(Exception):
+    pass
+
+
+class ReferenceCycleError(Exception):
+    pass
+
+
+class InvalidSweepError(Exception):
+    pass
+
+
+class InvalidDistributionError(Exception):
+    pass
+
+
+class MissingEnvironmentVariableError(Exception):
+    pass
+
+
+class UnsupportedValueError(Exception):
+    pass
+
+
+class InvalidBinaryConfigError(Exception):
+    pass
@@ -1,7 +1,9 @@
-from typing import Any, List, Tuple
+from typing import Any, Dict, Iterable, List, NoReturn, Optional, Tuple
 
 
 class ExtendedList(List[Any]):
+    __slots__ = ()
+
     def __getitem__(self, key: Any) -> Any:
         if isinstance(key, int):
             return super().__getitem__(key)
@@ -31,6 +33,8 @@ class ExtendedList(List[Any]):
 
 
 class ExtendedTuple(Tuple[Any]):
+    __slots__ = ()
+
     def __getitem__(self, key: Any) -> Any:
         if isinstance(key, int):
             return super().__getitem__(key)
@@ -57,3 +61,53 @@ class ExtendedTuple(Tuple[Any]):
     def __contains__(self, key: object, /) -> bool:
         keys = [f"t{i}" for i in range(len(self))]
         return super().__contains__(key) or key in keys
+
+
+class FrozenList(ExtendedList):
+    # Keeps the l<i> keys of ExtendedList so paths work the same on frozen
+    # configs, every mutating list method raises instead.
+    __slots__ = ("_hash",)
+
+    def __init__(self, items: Iterable[Any] = ()) -> None:
+        super().__init__(items)
+        self._hash: Optional[int] = None
+
+    def __hash__(self) -> int:  # type: ignore[override]
+        if self._hash is None:
+            self._hash = hash(tuple(self))
+        return self._hash
+
+    def __eq__(self, other: object) -> bool:
+        if self is other:
+            return True
+        if isinstance(other, FrozenList) and hash(self) != hash(other):
+            return False
+        return super().__eq__(other)
+
+    def __ne__(self, other: object) -> bool:
+        return not self.__eq__(other)
+
+    def __copy__(self) -> "FrozenList":
+        return self
+
+    def __deepcopy__(self, memo: Dict[int, Any]) -> "FrozenList":
+        return self
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        return (FrozenList, (list(self),))
+
+    def immutable(self, *args: Any, **kwargs: Any) -> NoReturn:
+        raise TypeError("'FrozenList' object is immutable")
+
+    __setitem__ = immutable
+    __delitem__ = immutable
+    __iadd__ = immutable
+    __imul__ = immutable
+    append = immutable
+    extend = immutable
+    insert = immutable
+    pop = immutable
+    remove = immutable
+    clear = immutable
+    sort = immutable
+    reverse = immutable
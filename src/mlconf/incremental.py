@@ -0,0 +1,261 @@
+import os
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Set
+
+from mlconf.config import Config
+from mlconf.errors import InvalidImportLocationError
+from mlconf.parser import parse, parse_block, parse_imports
+from mlconf.resolver import Resolvers, resolve
+from mlconf.template import compile_template
+from mlconf.tokenizer import ParseTokenStream, TokenTable
+from mlconf.word import Word
+
+
+def get_indent(line: str) -> int:
+    stripped = line.lstrip(" ")
+    if not stripped or stripped.startswith("#"):
+        return -1
+    return len(line) - len(stripped)
+
+
+def get_base_indent(lines: Iterable[str]) -> int:
+    for line in lines:
+        indent = get_indent(line)
+        if indent >= 0:
+            return indent
+    return -1
+
+
+def get_references(value: Any, references: Set[str]) -> Set[str]:
+    if isinstance(value, Word):
+        references.add(value.text.split(".", 1)[0])
+    elif isinstance(value, str):
+        template = compile_template(value)
+        if template is not None:
+            references.update(name.split(".", 1)[0] for name in template.names)
+    elif isinstance(value, dict):
+        for item in value.values():
+            get_references(item, references)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            get_references(item, references)
+    return references
+
+
+class Block:
+    def __init__(self, start: int, lines: List[str], row: int = 0) -> None:
+        # A top-level key together with everything indented below it, as the
+        # source line range [start, end). row counts the lines before it that
+        # hold more than a comment, which is how the tokenizer numbers lines.
+        self.start = start
+        self.end = start + len(lines)
+        self.row = row
+        self.rows = sum(1 for line in lines if get_indent(line) >= 0)
+        self.index = 0
+        self.table: Optional[TokenTable] = None
+        self.ast: Dict[str, Any] = {}
+        # Environment variables the resolved values of the block read.
+        self.variables: Set[str] = set()
+        if get_base_indent(lines) >= 0:
+            # Errors report the line numbers of the whole source.
+            self.table = TokenTable.from_string("\n".join(lines), row)
+            token_stream = ParseTokenStream(self.table)
+            if parse_imports(token_stream):
+                raise InvalidImportLocationError(
+                    "Imports are not supported by IncrementalParser"
+                )
+            self.ast = parse_block(token_stream, till_dedent=False)
+        self.references = get_references(self.ast, set())
+
+
+class IncrementalParser:
+    def __init__(
+        self, string: str, environment: Optional[Mapping[str, str]] = None
+    ) -> None:
+        self.lines: List[str] = []
+        self.environment = dict(os.environ if environment is None else environment)
+        self.rebuild(string.split("\n"))
+
+    @property
+    def source(self) -> str:
+        return "\n".join(self.lines)
+
+    def rebuild(self, lines: Optional[List[str]] = None) -> Config:
+        # New lines are only kept once they parse, a failed edit leaves the
+        # parser as it was.
+        lines = self.lines if lines is None else lines
+        base_indent = get_base_indent(lines)
+        blocks = self.split_blocks(0, lines, base_indent)
+        self.lines, self.base_indent, self.blocks = lines, base_indent, blocks
+        self.key_blocks: Dict[str, Block] = {}
+        self.referrers: Dict[str, Set[Block]] = {}
+        self.unique_keys = self.index_blocks(0, [], self.blocks)
+        if not self.unique_keys:
+            # A repeated top-level key overrides the earlier one, which per
+            # block bookkeeping cannot express, so fall back to parse().
+            self.config = parse(self.source)
+            return self.config
+        self.config = Config({})
+        self.resolve_blocks(self.blocks)
+        return self.config
+
+    def split_blocks(
+        self,
+        offset: int,
+        lines: List[str],
+        base_indent: Optional[int] = None,
+        row: int = 0,
+    ) -> List[Block]:
+        if base_indent is None:
+            base_indent = self.base_indent
+        starts = [i for i, line in enumerate(lines) if get_indent(line) == base_indent]
+        if not starts or starts[0] != 0:
+            starts.insert(0, 0)
+        ends = starts[1:] + [len(lines)]
+        blocks = []
+        for start, end in zip(starts, ends):
+            if end > start:
+                blocks.append(Block(offset + start, lines[start:end], row))
+                row += blocks[-1].rows
+        return blocks
+
+    def index_blocks(
+        self, first: int, old_blocks: List[Block], new_blocks: List[Block]
+    ) -> bool:
+        for block in old_blocks:
+            for key in block.ast:
+                if self.key_blocks.get(key) is block:
+                    del self.key_blocks[key]
+            for reference in block.references:
+                self.referrers[reference].discard(block)
+        for idx in range(first, len(self.blocks)):
+            self.blocks[idx].index = idx
+        unique = True
+        for block in new_blocks:
+            for key in block.ast:
+                unique = unique and key not in self.key_blocks
+                self.key_blocks[key] = block
+            for reference in block.references:
+                self.referrers.setdefault(reference, set()).add(block)
+        return unique
+
+    def resolve_blocks(self, blocks: Iterable[Block]) -> None:
+        # References to keys of other blocks read their resolved values.
+        keys = []
+        for block in blocks:
+            block.variables = set()
+            for key, value in block.ast.items():
+                self.config[key] = value
+                keys.append(key)
+        sources = {key: block.ast[key] for key, block in self.key_blocks.items()}
+        resolvers = Resolvers(self.config, environment=self.environment)
+        resolve(self.config, resolvers, keys, sources)
+        for path, variables in resolvers.dependencies.items():
+            self.key_blocks[path.split(".", 1)[0]].variables.update(variables)
+
+    def update_environment(
+        self, environment: Optional[Mapping[str, str]] = None
+    ) -> Config:
+        # Re-resolves the blocks that read a changed variable and the blocks
+        # referring to them, the others keep their values.
+        environment = dict(os.environ if environment is None else environment)
+        changed = {
+            name
+            for name in self.environment.keys() | environment.keys()
+            if self.environment.get(name) != environment.get(name)
+        }
+        self.environment = environment
+        if not self.unique_keys:
+            return self.rebuild()
+        blocks = [block for block in self.blocks if block.variables & changed]
+        if blocks:
+            keys = [key for block in blocks for key in block.ast]
+            self.resolve_blocks(self.get_dependent_blocks(blocks, keys))
+        return self.config
+
+    def find_block(self, line: int) -> int:
+        for idx, block in enumerate(self.blocks):
+            if line < block.end:
+                return idx
+        return len(self.blocks) - 1
+
+    def edit(self, start: int, end: int, text: str) -> Config:
+        # Replaces source lines [start, end) with the lines of text.
+        return self.replace_lines(start, end, text.splitlines())
+
+    def update(self, string: str) -> Config:
+        lines = string.split("\n")
+        prefix = 0
+        limit = min(len(lines), len(self.lines))
+        while prefix < limit and lines[prefix] == self.lines[prefix]:
+            prefix += 1
+        suffix = 0
+        while (
+            suffix < limit - prefix
+            and lines[len(lines) - suffix - 1]
+            == self.lines[len(self.lines) - suffix - 1]
+        ):
+            suffix += 1
+        if prefix == len(lines) == len(self.lines):
+            return self.config
+        return self.replace_lines(
+            prefix, len(self.lines) - suffix, lines[prefix : len(lines) - suffix]
+        )
+
+    def replace_lines(self, start: int, end: int, new_lines: List[str]) -> Config:
+        if not self.blocks or not self.unique_keys:
+            return self.rebuild(self.lines[:start] + new_lines + self.lines[end:])
+        first = self.find_block(start)
+        last = self.find_block(max(start, end - 1))
+        while True:
+            region_start, region_end = self.blocks[first].start, self.blocks[last].end
+            region = (
+                self.lines[region_start:start] + new_lines + self.lines[end:region_end]
+            )
+            base_indent = get_base_indent(region)
+            if first == 0 or base_indent == self.base_indent:
+                break
+            # The edited lines no longer start with a top-level key, they
+            # belong to the block above.
+            first -= 1
+        if first == 0 and base_indent != self.base_indent and base_indent >= 0:
+            return self.rebuild(self.lines[:start] + new_lines + self.lines[end:])
+
+        # Parsed before anything changes, so a failed edit keeps the old
+        # lines and blocks.
+        new_blocks = self.split_blocks(region_start, region, row=self.blocks[first].row)
+        self.lines[start:end] = new_lines
+        old_blocks = self.blocks[first : last + 1]
+        delta = len(new_lines) - (end - start)
+        rows = sum(block.rows for block in new_blocks) - sum(
+            block.rows for block in old_blocks
+        )
+        for block in self.blocks[last + 1 :]:
+            block.start += delta
+            block.end += delta
+            block.row += rows
+        self.blocks[first : last + 1] = new_blocks
+        if not self.index_blocks(first, old_blocks, new_blocks):
+            return self.rebuild()
+
+        old_keys = [key for block in old_blocks for key in block.ast]
+        new_keys = [key for block in new_blocks for key in block.ast]
+        if old_keys != new_keys:
+            values = self.config._config
+            self.config._config = {
+                key: values.get(key) for block in self.blocks for key in block.ast
+            }
+        self.resolve_blocks(self.get_dependent_blocks(new_blocks, old_keys + new_keys))
+        return self.config
+
+    def get_dependent_blocks(
+        self, blocks: List[Block], changed_keys: List[str]
+    ) -> List[Block]:
+        affected = set(blocks)
+        pending = list(changed_keys)
+        while pending:
+            key = pending.pop()
+            for block in self.referrers.get(key, ()):
+                if block not in affected:
+                    affected.add(block)
+                    pending.extend(block.ast)
+        return sorted(affected, key=lambda block: block.index)
@@ -0,0 +1,227 @@
+import sys
+from typing import Any, Dict, List, Mapping, Optional, Set
+
+from mlconf.config import MISSING, Config, TemplateIndex, is_ancestor, new_table
+from mlconf.errors import ReferenceCycleError
+from mlconf.extended_list_and_tuple import ExtendedList, ExtendedTuple
+from mlconf.resolver import Resolvers, get_child, get_index
+from mlconf.stats import LoadStats
+from mlconf.template import Template
+from mlconf.word import Word
+
+LAZY_ATTRIBUTES = {"_config", "_templates", "_pending", "_resolver", "_path"}
+
+
+def join_path(path: str, key: str) -> str:
+    return f"{path}.{key}" if path else key
+
+
+def resolve_nested(value: Any) -> None:
+    if isinstance(value, Config):
+        value.resolve_all()
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            resolve_nested(item)
+
+
+class LazyResolver:
+    def __init__(
+        self,
+        ast: Dict[str, Any],
+        stats: Optional[LoadStats] = None,
+        environment: Optional[Mapping[str, str]] = None,
+    ) -> None:
+        self.root = LazyConfig(ast, self, "")
+        # Values resolve on access, so stats record the resolver calls and
+        # references as values are read.
+        self.stats = stats
+        self.resolvers = Resolvers(
+            self.root,
+            calls=None if stats is None else stats.resolver_calls,
+            environment=environment,
+        )
+        # Rendered templates, in the order they were rendered.
+        self.templates: TemplateIndex = {}
+        self.root._templates = self.templates
+        # Paths being resolved, innermost last, to report reference cycles.
+        self.chain: List[str] = []
+        # Items of lists and tuples resolved before their whole sequence.
+        self.items: Dict[str, Any] = {}
+        # Paths whose value was replaced by the container they refer to,
+        # references never follow paths through them.
+        self.references: Set[str] = set()
+
+    def enter(self, path: str) -> None:
+        if path in self.chain:
+            cycle = self.chain[self.chain.index(path) :] + [path]
+            raise ReferenceCycleError("Reference cycle: " + " -> ".join(cycle))
+        self.chain.append(path)
+
+    def resolve(self, value: Any, path: str) -> Any:
+        self.enter(path)
+        try:
+            return self.resolve_value(value, path)
+        finally:
+            self.chain.pop()
+
+    def resolve_value(self, value: Any, path: str) -> Any:
+        if isinstance(value, dict):
+            return LazyConfig(value, self, path)
+        elif isinstance(value, (list, tuple)):
+            prefix = "t" if isinstance(value, tuple) else "l"
+            paths = [join_path(path, f"{prefix}{i}") for i in range(len(value))]
+            for item, item_path in zip(value, paths):
+                if item_path not in self.items:
+                    self.items[item_path] = self.resolve(item, item_path)
+            items = [self.items.pop(item_path) for item_path in paths]
+            if isinstance(value, tuple):
+                return ExtendedTuple(items)
+            return ExtendedList(items)
+        value = self.resolvers.resolve(value)
+        if isinstance(value, Template):
+            references = self.resolvers.references[value]
+            values = {
+                reference: MISSING
+                if is_ancestor(reference, path)
+                else self.get(reference)
+                for reference in references
+            }
+            if self.stats is not None:
+                found = sum(value is not MISSING for value in values.values())
+                self.stats.count("references", found)
+            self.templates[path] = (
+                value,
+                {reference: reference for reference in references},
+                self.resolvers.environment,
+            )
+            return self.resolvers.render_template(value, values)
+        if isinstance(value, Word) and not is_ancestor(value.text, path):
+            target = self.get(value.text)
+            if target is not MISSING:
+                value = target
+                if self.stats is not None:
+                    self.stats.count("references")
+                if isinstance(value, (Config, list, tuple)):
+                    self.references.add(path)
+        return self.resolvers.string_resolver.resolve(value)
+
+    def get(self, reference: str) -> Any:
+        keys = reference.split(".")
+        node: Any = self.root
+        path = ""
+        for i, key in enumerate(keys):
+            path = join_path(path, key)
+            last = i == len(keys) - 1
+            if isinstance(node, LazyConfig):
+                if key not in node._config:
+                    return MISSING
+                raw = node._config[key]
+                if key not in node._pending or isinstance(raw, (dict, Config)) or last:
+                    node = node[key]
+                elif isinstance(raw, (list, tuple)):
+                    # Only resolve the item referred to, not the whole list.
+                    node = raw
+                else:
+                    return MISSING
+            elif isinstance(node, (ExtendedList, ExtendedTuple, Config)):
+                node = get_child(node, key)
+            elif isinstance(node, (list, tuple)):
+                index = get_index(node, key)
+                if index < 0:
+                    return MISSING
+                raw = node[index]
+                if path in self.items or isinstance(raw, dict) or last:
+                    if path not in self.items:
+                        self.items[path] = self.resolve(raw, path)
+                    node = self.items[path]
+                elif isinstance(raw, (list, tuple)):
+                    node = raw
+                else:
+                    return MISSING
+            else:
+                return MISSING
+            if node is MISSING or (not last and path in self.references):
+                return MISSING
+        if isinstance(node, (Config, list, tuple)):
+            # A container is only complete once everything in it is resolved.
+            self.enter(reference)
+            try:
+                resolve_nested(node)
+            finally:
+                self.chain.pop()
+        # Copy sequences like Config.__setitem__ does for the eager resolver.
+        if isinstance(node, list):
+            return self.root.resolve_list(node)
+        elif isinstance(node, tuple):
+            return self.root.resolve_tuple(node)
+        return node
+
+
+class LazyConfig(Config):
+    __slots__ = ("_pending", "_resolver", "_path")
+
+    def __init__(
+        self, config: Dict[str, Any], resolver: LazyResolver, path: str
+    ) -> None:
+        table = new_table(tuple(config))
+        for key, value in config.items():
+            table[sys.intern(key)] = value
+        object.__setattr__(self, "_config", table)
+        object.__setattr__(self, "_templates", None)
+        object.__setattr__(self, "_pending", set(config))
+        object.__setattr__(self, "_resolver", resolver)
+        object.__setattr__(self, "_path", path)
+
+    _pending: Set[str]
+    _resolver: LazyResolver
+    _path: str
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self._pending:
+            self._config[key] = self._resolver.resolve(
+                self._config[key], join_path(self._path, key)
+            )
+            self._pending.discard(key)
+        return self._config[key]
+
+    def __getattr__(self, key: str) -> Any:
+        return self[key]
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        super().__setitem__(key, value)
+        self._pending.discard(key)
+
+    def __setattr__(self, key: str, value: Any) -> None:
+        if key in LAZY_ATTRIBUTES:
+            object.__setattr__(self, key, value)
+            return
+        super().__setattr__(key, value)
+        self._pending.discard(key)
+
+    def __eq__(self, other: Any) -> bool:
+        self.resolve_all()
+        if isinstance(other, Config):
+            other.resolve_all()
+        return super().__eq__(other)
+
+    def __repr__(self) -> str:
+        self.resolve_all()
+        return super().__repr__()
+
+    def __str__(self) -> str:
+        self.resolve_all()
+        return super().__str__()
+
+    def __deepcopy__(self, memo: Dict[int, Any]) -> Config:
+        self.resolve_all()
+        return super().__deepcopy__(memo)
+
+    def items(self) -> Any:
+        for key in self.keys():
+            self[key]
+        return super().items()
+
+    def resolve_all(self) -> Config:
+        for key in self.keys():
+            resolve_nested(self[key])
+        return self
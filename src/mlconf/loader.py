@@ -0,0 +1,173 @@
+import copy
+import os
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple, Union
+
+from mlconf.cache import ParseCache
+from mlconf.config import Config
+from mlconf.errors import ImportCycleError
+from mlconf.parser import ImportValue, build_config, parse_source
+from mlconf.stats import LoadStats, get_stats, phase
+from mlconf.template import EnvironmentSnapshot
+
+CONFIG_SUFFIX = ".conf"
+
+
+def get_import_path(importer: Path, import_value: ImportValue) -> Path:
+    parts = import_value.path.split(".")
+    path = importer.parent.joinpath(*parts[:-1], parts[-1] + CONFIG_SUFFIX)
+    return path.resolve()
+
+
+class ParsedFile:
+    def __init__(
+        self, path: Path, imports: List[ImportValue], ast: Dict[str, Any]
+    ) -> None:
+        self.path = path
+        self.imports = imports
+        self.ast = ast
+        self.targets = [get_import_path(path, value) for value in imports]
+
+
+def parse_file(
+    path: Path, cache: Optional[ParseCache] = None, stats: Optional[LoadStats] = None
+) -> ParsedFile:
+    with phase(stats, "read"):
+        with open(path) as f:
+            string = f.read()
+    if stats is not None:
+        stats.count("sources")
+    if cache is not None:
+        imports, ast = cache.parse_source(string, stats)
+    else:
+        imports, ast = parse_source(string, stats)
+    return ParsedFile(path, imports, ast)
+
+
+class Loader:
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        cache: Optional[ParseCache] = None,
+        stats: Optional[LoadStats] = None,
+    ) -> None:
+        self.max_workers = max_workers
+        self.cache = cache
+        # Stats are recorded when passed or when loading inside
+        # mlconf.profile().
+        self.stats = stats
+
+    def load(self, path: Union[str, "os.PathLike[str]"]) -> Config:
+        root = Path(path).resolve()
+        with phase(get_stats(self.stats), "total"):
+            return self.build_configs(root, self.parse_import_graph(root))[root]
+
+    def build_configs(
+        self,
+        root: Path,
+        parsed_files: Dict[Path, ParsedFile],
+        configs: Optional[Dict[Path, Config]] = None,
+    ) -> Dict[Path, Config]:
+        # Configs passed in are reused as they are, callers drop the ones
+        # built from a file that changed or that imports one.
+        stats = get_stats(self.stats)
+        # Every file of a load reads the same environment snapshot.
+        environment = EnvironmentSnapshot()
+        configs = dict(configs or {})
+        for file in self.sort_import_graph(root, parsed_files):
+            if file in configs:
+                continue
+            parsed = parsed_files[file]
+            with phase(stats, "copy"):
+                imported = {
+                    value.alias: copy.deepcopy(configs[target])
+                    for value, target in zip(parsed.imports, parsed.targets)
+                }
+            configs[file] = build_config(
+                parsed.ast, imported, stats=stats, environment=environment
+            )
+        return configs
+
+    def parse_import_graph(
+        self, root: Path, parsed_files: Optional[Dict[Path, ParsedFile]] = None
+    ) -> Dict[Path, ParsedFile]:
+        # Every file is read and tokenized once, no matter how many files
+        # import it, and independent files are parsed concurrently. Files in
+        # parsed_files are not read again.
+        stats = get_stats(self.stats)
+        known = parsed_files or {}
+        parsed_files = {}
+        seen = {root}
+        queue = [root]
+        with ThreadPoolExecutor(self.max_workers) as executor:
+            pending: Set["Future[ParsedFile]"] = set()
+            while queue or pending:
+                paths, queue = queue, []
+                for path in paths:
+                    if path in known:
+                        queue.extend(
+                            self.add_parsed_file(known[path], parsed_files, seen)
+                        )
+                    else:
+                        pending.add(
+                            executor.submit(parse_file, path, self.cache, stats)
+                        )
+                if not pending:
+                    continue
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    queue.extend(
+                        self.add_parsed_file(future.result(), parsed_files, seen)
+                    )
+        return parsed_files
+
+    def add_parsed_file(
+        self, parsed: ParsedFile, parsed_files: Dict[Path, ParsedFile], seen: Set[Path]
+    ) -> List[Path]:
+        parsed_files[parsed.path] = parsed
+        targets = []
+        for target in parsed.targets:
+            if target not in seen:
+                seen.add(target)
+                targets.append(target)
+        return targets
+
+    def sort_import_graph(
+        self, root: Path, parsed_files: Dict[Path, ParsedFile]
+    ) -> List[Path]:
+        order: List[Path] = []
+        done: Set[Path] = set()
+        chain: List[Path] = []
+        # Iterative depth first search, so deep import chains cannot hit the
+        # recursion limit.
+        stack: List[Tuple[Path, int]] = [(root, 0)]
+        while stack:
+            path, idx = stack.pop()
+            if idx == 0:
+                chain.append(path)
+            targets = parsed_files[path].targets
+            if idx < len(targets):
+                stack.append((path, idx + 1))
+                target = targets[idx]
+                if target in chain:
+                    cycle = chain[chain.index(target) :] + [target]
+                    raise ImportCycleError(
+                        "Import cycle: " + " -> ".join(str(item) for item in cycle)
+                    )
+                if target not in done:
+                    stack.append((target, 0))
+            else:
+                chain.pop()
+                done.add(path)
+                order.append(path)
+        return order
+
+
+def load(
+    path: Union[str, "os.PathLike[str]"],
+    max_workers: Optional[int] = None,
+    cache: Optional[ParseCache] = None,
+    stats: Optional[LoadStats] = None,
+) -> Config:
+    return Loader(max_workers, cache, stats).load(path)
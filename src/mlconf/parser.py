@@ -1,12 +1,45 @@
-from typing import Any, Dict, List, Tuple
+import re
+from typing import TYPE_CHECKING, Any, Dict, List, Mapping, Optional, Tuple
 
-from mlconf.config import Config
+from mlconf.config import Config, TemplateIndex
+from mlconf.errors import InvalidImportLocationError
+from mlconf.lazy import LazyResolver
+from mlconf.regex_utils import REGEX_FLOAT_EXPONENT_MATCH
 from mlconf.resolver import Resolvers, resolve
-from mlconf.tokenizer import ParseTokenStream, Token, TokenType
-from mlconf.word import Word
+from mlconf.stats import LoadStats, get_stats, phase
+from mlconf.tokenizer import (
+    KeyWords,
+    ParseTokenStream,
+    Scanner,
+    Token,
+    TokenType,
+    process_tokens,
+)
+from mlconf.word import Call, Word
+
+if TYPE_CHECKING:
+    from mlconf.cache import ParseCache
 
 INLINE_LIST_DELIMITER = Token(TokenType.PUNC, "]")
 INLINE_LIST_SEPARATOR = Token(TokenType.PUNC, ",")
+CALL_START = Token(TokenType.PUNC, "(")
+CALL_END = Token(TokenType.PUNC, ")")
+CALL_SEPARATOR = Token(TokenType.PUNC, ",")
+EXPONENT_SIGN = Token(TokenType.PUNC, "-")
+
+
+class ImportValue:
+    def __init__(self, path: str, alias: str) -> None:
+        self.path = path
+        self.alias = alias
+
+    def __repr__(self) -> str:
+        return f"ImportValue({self.path}, {self.alias})"
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, ImportValue):
+            return False
+        return self.path == other.path and self.alias == other.alias
 
 
 def skip_tokens(token_stream: ParseTokenStream, token_types: List[TokenType]) -> None:
@@ -62,9 +95,11 @@ def parse_block(
             token_stream.next()
         elif token.token_type == TokenType.EOF:
             break
-        # elif token.token_type == TokenType.KEY_WORD and till_dedent is False:
-        #     if token.value == KeyWords.IMPORT:
-        #         parse_
+        elif token.token_type == TokenType.KEY_WORD and token.value == KeyWords.IMPORT:
+            raise InvalidImportLocationError(
+                f"Error at line {token.line}: imports must come before any key"
+                f"\n{token_stream.get_line(token.line)}"
+            )
         else:
             token_stream.croak(
                 f"Expected WORD or NEWLINE token, but got {token.token_type}"
@@ -72,6 +107,37 @@ def parse_block(
     return ast
 
 
+def parse_imports(token_stream: ParseTokenStream) -> List[ImportValue]:
+    imports: List[ImportValue] = []
+    while not token_stream.is_eof():
+        token = token_stream.peek()
+        if token.token_type == TokenType.NEWLINE:
+            token_stream.next()
+        elif token.token_type == TokenType.KEY_WORD and token.value == KeyWords.IMPORT:
+            token_stream.next()
+            path = expect_word(token_stream, "import path")
+            token = token_stream.peek()
+            if token.token_type != TokenType.KEY_WORD or token.value != KeyWords.AS:
+                token_stream.croak(f"Expected 'as' after import {path}, got {token}")
+            token_stream.next()
+            alias = expect_word(token_stream, "import alias")
+            token = token_stream.peek()
+            if token.token_type not in [TokenType.NEWLINE, TokenType.EOF]:
+                token_stream.croak(f"Expected NEWLINE after import, got {token}")
+            imports.append(ImportValue(path, alias))
+        else:
+            break
+    return imports
+
+
+def expect_word(token_stream: ParseTokenStream, name: str) -> str:
+    token = token_stream.peek()
+    if token.token_type != TokenType.WORD:
+        token_stream.croak(f"Expected {name}, but got {token}")
+    token_stream.next()
+    return str(token.value)
+
+
 def parse_yaml_list(token_stream: ParseTokenStream) -> List[Any]:
     res: List[Any] = []
     while not token_stream.is_eof():
@@ -80,20 +146,28 @@ def parse_yaml_list(token_stream: ParseTokenStream) -> List[Any]:
             token_stream.next()
             next_token = token_stream.peek_next()
             if next_token.token_type == TokenType.PUNC and next_token.value == ":":
+                # The block consumes the dedent that ends the list.
                 res += [parse_block(token_stream, till_dedent=True)]
+                break
             else:
                 res += [parse_inline_expression(token_stream)]
                 token_stream.next()
         elif token.token_type == TokenType.NEWLINE:
             token_stream.next()
-        elif token.token_type == TokenType.EOF or token.token_type == TokenType.DEDENT:
+        elif token.token_type == TokenType.DEDENT:
+            # Back out of the indent before the first item.
+            token_stream.next()
+            break
+        elif token.token_type == TokenType.EOF:
             break
         else:
             token_stream.croak(f"Expected PUNC token, but got {token}")
     return res
 
 
-def parse_inline_expression(token_stream: ParseTokenStream) -> Any:
+def parse_inline_expression(token_stream: ParseTokenStream, call: bool = False) -> Any:
+    # call is set in the arguments of calls, the only place floats can have
+    # an exponent.
     res = ""
     is_word = False
     while not token_stream.is_eof():
@@ -101,6 +175,26 @@ def parse_inline_expression(token_stream: ParseTokenStream) -> Any:
         if token.token_type == TokenType.WORD:
             is_word = True
             res += token.value
+            next_token = token_stream.peek_next()
+            if next_token == CALL_START and not res.startswith("-"):
+                # name(args) calls, like loguniform(1e-5, 1e-2).
+                token_stream.next()
+                token_stream.next()
+                return Call(
+                    res, parse_list(token_stream, CALL_END, CALL_SEPARATOR, True)
+                )
+            elif (
+                call
+                and next_token == EXPONENT_SIGN
+                and re.match(REGEX_FLOAT_EXPONENT_MATCH, res)
+            ):
+                # 1e-5 is scanned as 1e, - and 5.
+                token_stream.next()
+                token_stream.next()
+                token = token_stream.peek()
+                if token.token_type != TokenType.WORD or not token.value.isdigit():
+                    token_stream.croak(f"Expected exponent, but got {token}")
+                res += "-" + token.value
             break
         elif token.token_type == TokenType.PUNC and token.value == "-":
             is_word = True
@@ -112,11 +206,11 @@ def parse_inline_expression(token_stream: ParseTokenStream) -> Any:
         elif token.token_type == TokenType.PUNC and token.value == "[":
             token_stream.next()
             return parse_list(
-                token_stream, INLINE_LIST_DELIMITER, INLINE_LIST_SEPARATOR
+                token_stream, INLINE_LIST_DELIMITER, INLINE_LIST_SEPARATOR, call
             )
         elif token.token_type == TokenType.PUNC and token.value == "(":
             token_stream.next()
-            return parse_tuple(token_stream)
+            return parse_tuple(token_stream, call)
         elif token.token_type in [TokenType.NEWLINE, TokenType.EOF, TokenType.DEDENT]:
             break
         else:
@@ -127,13 +221,16 @@ def parse_inline_expression(token_stream: ParseTokenStream) -> Any:
 
 
 def parse_list(
-    token_stream: ParseTokenStream, delimiter: Token, separator: Token
+    token_stream: ParseTokenStream,
+    delimiter: Token,
+    separator: Token,
+    call: bool = False,
 ) -> List[Any]:
     res: List[Any] = []
     delimited = False
     while not token_stream.is_eof():
         token = token_stream.peek()
-        res += [parse_inline_expression(token_stream)]
+        res += [parse_inline_expression(token_stream, call)]
         token_stream.next()
         token = token_stream.peek()
         if token.token_type == delimiter.token_type and token.value == delimiter.value:
@@ -153,19 +250,128 @@ def parse_list(
     return res
 
 
-def parse_tuple(token_stream: ParseTokenStream) -> Tuple[Any]:
+def parse_tuple(token_stream: ParseTokenStream, call: bool = False) -> Tuple[Any]:
     res = parse_list(
-        token_stream, Token(TokenType.PUNC, ")"), Token(TokenType.PUNC, ",")
+        token_stream, Token(TokenType.PUNC, ")"), Token(TokenType.PUNC, ","), call
     )
     res_tuple = tuple(res)
     return res_tuple
 
 
-def parse(string: str) -> Config:
+def parse_source(
+    string: str, stats: Optional[LoadStats] = None
+) -> Tuple[List[ImportValue], Dict[str, Any]]:
+    if stats is not None:
+        return profile_source(string, stats)
     parse_token_stream = ParseTokenStream(string)
-    # vars = parse_imports(parse_token_stream) TODO: Activate
+    imports = parse_imports(parse_token_stream)
     ast = parse_block(parse_token_stream, till_dedent=False)
-    config = Config(ast)
-    resolvers = Resolvers(config)
-    config = resolve(config, resolvers)
+    return imports, ast
+
+
+def profile_source(
+    string: str, stats: LoadStats
+) -> Tuple[List[ImportValue], Dict[str, Any]]:
+    # The streaming stages run one after another so each can be timed.
+    with stats.phase("lines"):
+        scanner = Scanner(string)
+    with stats.phase("tokens"):
+        raw_tokens = list(scanner)
+    with stats.phase("indentation"):
+        tokens = list(process_tokens(raw_tokens))
+    with stats.phase("parse"):
+        parse_token_stream = ParseTokenStream.from_tokens(scanner.lines, tokens)
+        imports = parse_imports(parse_token_stream)
+        ast = parse_block(parse_token_stream, till_dedent=False)
+    stats.count("chars", len(string))
+    stats.count("lines", len(scanner.lines))
+    stats.count("tokens", len(raw_tokens))
+    stats.count("nodes", count_nodes(ast))
+    return imports, ast
+
+
+def count_nodes(ast: Dict[str, Any]) -> int:
+    # Blocks, lists, tuples and leaves below the root block.
+    count = 0
+    stack: List[Any] = [ast]
+    while stack:
+        value = stack.pop()
+        items = value.values() if isinstance(value, dict) else value
+        for item in items:
+            count += 1
+            if isinstance(item, (dict, list, tuple)):
+                stack.append(item)
+    return count
+
+
+def build_config(
+    ast: Dict[str, Any],
+    imported: Optional[Dict[str, Config]] = None,
+    lazy: bool = False,
+    stats: Optional[LoadStats] = None,
+    environment: Optional[Mapping[str, str]] = None,
+) -> Config:
+    # Imported configs come first so the variable resolver has already seen
+    # them by the time the importing file references them.
+    templates = imported_templates(imported or {}, ast)
+    if lazy:
+        resolver = LazyResolver({**(imported or {}), **ast}, stats, environment)
+        resolver.templates.update(templates)
+        return resolver.root
+    config = Config({**(imported or {}), **ast})
+    if stats is None:
+        resolve(config, Resolvers(config, environment=environment))
+    else:
+        with stats.phase("resolve"):
+            resolvers = Resolvers(
+                config, calls=stats.resolver_calls, environment=environment
+            )
+            resolve(config, resolvers)
+        stats.count("references", resolvers.variable_resolver.resolved)
+    if templates:
+        config._templates = {**templates, **(config._templates or {})}
     return config
+
+
+def imported_templates(
+    imported: Dict[str, Config], ast: Dict[str, Any]
+) -> TemplateIndex:
+    # The templates of an imported config move below its alias, along with
+    # the paths they refer to.
+    templates: TemplateIndex = {}
+    for alias, config in imported.items():
+        if alias in ast or not config._templates:
+            continue
+        for path, (template, references, environment) in config._templates.items():
+            templates[f"{alias}.{path}"] = (
+                template,
+                {
+                    name: f"{alias}.{reference}"
+                    for name, reference in references.items()
+                },
+                environment,
+            )
+    return templates
+
+
+def parse(
+    string: str,
+    cache: Optional["ParseCache"] = None,
+    lazy: bool = False,
+    stats: Optional[LoadStats] = None,
+) -> Config:
+    # Stats are recorded when passed or when called inside mlconf.profile().
+    stats = get_stats(stats)
+    with phase(stats, "total"):
+        if stats is not None:
+            stats.count("sources")
+        if cache is not None:
+            imports, ast = cache.parse_source(string, stats)
+        else:
+            imports, ast = parse_source(string, stats)
+        if imports:
+            raise InvalidImportLocationError(
+                "Imports are resolved relative to the importing file, "
+                "use mlconf.load(path) to load configs with imports"
+            )
+        return build_config(ast, lazy=lazy, stats=stats)
@@ -1,2 +1,13 @@
 REGEX_INT_MATCH = r"^[+-]?\d+$"
 REGEX_FLOAT_MATCH = r"^[+-]?(\d+\.?\d*|\.\d+)$"
+# Floats in call arguments can have an exponent, like loguniform(1e-5, 1).
+REGEX_EXPONENT_FLOAT_MATCH = r"^[+-]?(\d+\.?\d*|\.\d+)([eE][+-]?\d+)?$"
+# A float whose negative exponent the tokenizer split off at the "-".
+REGEX_FLOAT_EXPONENT_MATCH = r"^[+-]?(\d+\.?\d*|\.\d+)[eE]$"
+# One pattern for both, the int group is set when the text is an int.
+REGEX_NUMBER_MATCH = r"[+-]?(?:(?P<int>\d+)|\d+\.?\d*|\.\d+)"
+# ${NAME}, ${path.to.key} or either with :-default in a string, $${ is a
+# literal ${.
+REGEX_PLACEHOLDER = (
+    r"\$\$\{|\$\{([A-Za-z_][A-Za-z0-9_]*(?:\.[A-Za-z0-9_]+)*)(?::-([^}]*))?\}"
+)
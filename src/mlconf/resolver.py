@@ -1,14 +1,38 @@
 import os
 import re
 from abc import ABC, abstractmethod
-from typing import Any, List, Set, Tuple
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
 
-from mlconf.config import Config
-from mlconf.regex_utils import REGEX_FLOAT_MATCH, REGEX_INT_MATCH
-from mlconf.word import Word
+from mlconf.config import MISSING, Config, TemplateIndex, is_ancestor, parse_index
+from mlconf.distributions import DISTRIBUTIONS
+from mlconf.errors import InvalidDistributionError, ReferenceCycleError
+from mlconf.extended_list_and_tuple import ExtendedList, ExtendedTuple
+from mlconf.regex_utils import REGEX_EXPONENT_FLOAT_MATCH, REGEX_NUMBER_MATCH
+from mlconf.template import EnvironmentSnapshot, Template, compile_template
+from mlconf.word import Call, Word
+
+
+SCALAR_TYPES = {type(None), bool, int, float, str}
 
 
 class Resolver(ABC):
+    # The words a resolver is routed to, those starting with one of the prefixes
+    # and matching the pattern. None matches every word.
+    prefixes: Optional[Tuple[str, ...]] = None
+    pattern: Optional[str] = None
+
     def __init__(self) -> None:
         pass
 
@@ -16,31 +40,60 @@ class Resolver(ABC):
     def resolve(self, value: Word) -> Any:
         raise NotImplementedError
 
+    def bind(self, environment: Mapping[str, str]) -> "Resolver":
+        # The resolver used for one load, resolvers that read environment
+        # variables read them from the snapshot taken for the load.
+        return self
+
+
+NUMBER_MATCH = re.compile(REGEX_NUMBER_MATCH).fullmatch
+EXPONENT_FLOAT_MATCH = re.compile(REGEX_EXPONENT_FLOAT_MATCH).match
+# Characters a number can start with. Words are ASCII, the tokenizer rejects
+# other characters outside strings.
+NUMBER_CHARS = frozenset("0123456789+-.")
+LITERALS = {
+    "true": True,
+    "True": True,
+    "false": False,
+    "False": False,
+    "none": None,
+    "null": None,
+    "None": None,
+}
+LITERAL_CHARS = frozenset(text[0] for text in LITERALS)
+
 
 class PythonDataTypeResolver(Resolver):
     def resolve(self, value: Word) -> Any:
-        if isinstance(value, Word):
-            if re.match(REGEX_INT_MATCH, value.text):
-                return int(value.text)
-            elif re.match(REGEX_FLOAT_MATCH, value.text):
-                return float(value.text)
-            elif value.text == "true" or value.text == "True":
-                return True
-            elif value.text == "false" or value.text == "False":
-                return False
-            elif value.text == "none" or value.text == "null" or value.text == "None":
-                return None
-            else:
-                return value
-        else:
+        if type(value) is not Word:
             return value
+        # Dispatches on the first character, most words are neither numbers
+        # nor literals and skip the regex.
+        text = value.text
+        first = text[:1]
+        if first in NUMBER_CHARS:
+            match = NUMBER_MATCH(text)
+            if match is None:
+                return value
+            return int(text) if match.lastgroup == "int" else float(text)
+        elif first in LITERAL_CHARS:
+            return LITERALS.get(text, value)
+        return value
 
 
 class EnvironmentVariableResolver(Resolver):
+    prefixes = ("$",)
+
+    def __init__(self, environment: Optional[Mapping[str, str]] = None) -> None:
+        self.environment = os.environ if environment is None else environment
+
+    def bind(self, environment: Mapping[str, str]) -> Resolver:
+        return EnvironmentVariableResolver(environment)
+
     def resolve(self, value: Word) -> Any:
         if isinstance(value, Word):
-            if value.text.startswith("$") and value.text[1:] in os.environ:
-                return os.environ[value.text[1:]]
+            if value.text.startswith("$") and value.text[1:] in self.environment:
+                return self.environment[value.text[1:]]
             else:
                 return value
         else:
@@ -55,80 +108,587 @@ class StringResolver(Resolver):
             return value
 
 
+# Orders of the built-in resolvers, lower orders run first.
+DATATYPE_ORDER = 100
+ENVIRONMENT_ORDER = 200
+DEFAULT_ORDER = 1000
+
+ResolveFunction = Callable[[Word], Any]
+Route = Tuple[Resolver, Optional[Tuple[str, ...]]]
+
+
+class ResolverPipeline:
+    def __init__(
+        self, table: Dict[str, ResolveFunction], default: ResolveFunction
+    ) -> None:
+        # The resolvers a word is routed to by its first character, chained
+        # into one function per character.
+        self.table = table
+        self.default = default
+
+    def resolve(self, value: Word) -> Any:
+        return self.table.get(value.text[:1], self.default)(value)
+
+    def get(self, first: Optional[str]) -> ResolveFunction:
+        return self.default if first is None else self.table[first]
+
+    def set(self, first: Optional[str], function: ResolveFunction) -> None:
+        if first is None:
+            self.default = function
+        else:
+            self.table[first] = function
+
+
+class ResolverRegistry:
+    def __init__(self) -> None:
+        self.entries: List[Tuple[int, int, Resolver]] = []
+        self.count = 0
+        self.routes: Dict[Optional[str], List[Route]] = {}
+        # First characters routed to a resolver that binds to the environment.
+        self.bound: List[Optional[str]] = []
+        self.pipeline: Optional[ResolverPipeline] = None
+
+    def register(self, resolver: Resolver, order: int = DEFAULT_ORDER) -> Resolver:
+        # Resolvers of equal order run in the order they were registered.
+        if resolver.prefixes is not None and not all(resolver.prefixes):
+            raise ValueError("Resolver prefixes must not be empty")
+        self.entries.append((order, self.count, resolver))
+        self.entries.sort(key=lambda entry: entry[:2])
+        self.count += 1
+        self.pipeline = None
+        return resolver
+
+    def unregister(self, resolver: Resolver) -> None:
+        self.entries = [entry for entry in self.entries if entry[2] is not resolver]
+        self.pipeline = None
+
+    def __iter__(self) -> Iterator[Resolver]:
+        return (resolver for _, _, resolver in self.entries)
+
+    def compile(
+        self,
+        calls: Optional[Dict[str, int]] = None,
+        environment: Optional[Mapping[str, str]] = None,
+    ) -> ResolverPipeline:
+        # With calls, a pipeline of its own counts the calls per resolver
+        # class, the cached one has no counting overhead. With an environment
+        # snapshot, the resolvers reading it are bound to the snapshot.
+        if self.pipeline is None:
+            self.routes = self.plan()
+            self.bound = [
+                first
+                for first, routes in self.routes.items()
+                if any(binds(resolver) for resolver, _ in routes)
+            ]
+            self.pipeline = self.build(None, None)
+        if calls is None and environment is None:
+            return self.pipeline
+        return self.build(calls, environment)
+
+    def plan(self) -> Dict[Optional[str], List[Route]]:
+        # The resolvers each first character is routed to, None for the
+        # characters no prefix starts with.
+        firsts: List[Optional[str]] = [None]
+        firsts += {prefix[0] for resolver in self for prefix in resolver.prefixes or ()}
+        routes: Dict[Optional[str], List[Route]] = {}
+        for first in firsts:
+            routes[first] = []
+            for resolver in self:
+                prefixes = resolver.prefixes
+                if prefixes is not None:
+                    prefixes = tuple(p for p in prefixes if p[0] == first)
+                    if not prefixes:
+                        continue
+                routes[first].append((resolver, prefixes))
+        return routes
+
+    def build(
+        self,
+        calls: Optional[Dict[str, int]],
+        environment: Optional[Mapping[str, str]],
+    ) -> ResolverPipeline:
+        if calls is None and self.pipeline is not None:
+            pipeline = ResolverPipeline(
+                dict(self.pipeline.table), self.pipeline.default
+            )
+        else:
+            pipeline = ResolverPipeline({}, keep)
+            for first, routes in self.routes.items():
+                pipeline.set(
+                    first, chain([guard(r, first, p, calls) for r, p in routes])
+                )
+        if environment is not None:
+            for first in self.bound:
+                routes = self.routes[first]
+                function = bind_later(pipeline, first, routes, calls, environment)
+                pipeline.set(first, function)
+        return pipeline
+
+
+def binds(resolver: Resolver) -> bool:
+    return type(resolver).bind is not Resolver.bind
+
+
+def bind_later(
+    pipeline: ResolverPipeline,
+    first: Optional[str],
+    routes: List[Route],
+    calls: Optional[Dict[str, int]],
+    environment: Mapping[str, str],
+) -> ResolveFunction:
+    # Binds the resolvers of a route when its first word shows up, most loads
+    # never read an environment variable.
+    def resolve(value: Word) -> Any:
+        function = chain(
+            [guard(r.bind(environment), first, p, calls) for r, p in routes]
+        )
+        pipeline.set(first, function)
+        return function(value)
+
+    return resolve
+
+
+def keep(value: Word) -> Any:
+    return value
+
+
+def chain(functions: List[ResolveFunction]) -> ResolveFunction:
+    # The first resolver that turns the word into something else wins.
+    if not functions:
+        return keep
+    elif len(functions) == 1:
+        return functions[0]
+
+    def resolve(value: Word) -> Any:
+        for function in functions:
+            value = function(value)
+            if type(value) is not Word:
+                break
+        return value
+
+    return resolve
+
+
+def count_calls(
+    function: ResolveFunction, name: str, calls: Dict[str, int]
+) -> ResolveFunction:
+    def resolve(value: Word) -> Any:
+        calls[name] = calls.get(name, 0) + 1
+        return function(value)
+
+    return resolve
+
+
+def guard(
+    resolver: Resolver,
+    first: Optional[str],
+    prefixes: Optional[Tuple[str, ...]],
+    calls: Optional[Dict[str, int]] = None,
+) -> ResolveFunction:
+    # The first character is matched by the table, only longer prefixes and
+    # patterns are checked before the call.
+    if prefixes == (first,):
+        prefixes = None
+    match = None if resolver.pattern is None else re.compile(resolver.pattern).fullmatch
+    function: ResolveFunction = resolver.resolve
+    if calls is not None:
+        function = count_calls(function, type(resolver).__name__, calls)
+    if prefixes is None and match is None:
+        return function
+
+    def resolve(value: Word) -> Any:
+        text = value.text
+        if prefixes is not None and not text.startswith(prefixes):
+            return value
+        if match is not None and match(text) is None:
+            return value
+        return function(value)
+
+    return resolve
+
+
+default_registry = ResolverRegistry()
+default_registry.register(PythonDataTypeResolver(), DATATYPE_ORDER)
+default_registry.register(EnvironmentVariableResolver(), ENVIRONMENT_ORDER)
+
+
+class DistributionResolver(Resolver):
+    def __init__(self, pipeline: ResolverPipeline) -> None:
+        self.pipeline = pipeline
+        self.string_resolver = StringResolver()
+
+    def resolve(self, value: Any) -> Any:
+        if isinstance(value, Call):
+            if value.name not in DISTRIBUTIONS:
+                raise InvalidDistributionError(
+                    f"Unknown distribution '{value.name}', expected one of "
+                    + ", ".join(DISTRIBUTIONS)
+                )
+            args = [self.resolve_argument(arg) for arg in value.args]
+            return DISTRIBUTIONS[value.name](*args)
+        else:
+            return value
+
+    def resolve_argument(self, value: Any) -> Any:
+        # Arguments are literals, words in them are never references.
+        if isinstance(value, list):
+            return [self.resolve_argument(item) for item in value]
+        elif isinstance(value, tuple):
+            return tuple(self.resolve_argument(item) for item in value)
+        if isinstance(value, Word):
+            value = self.pipeline.resolve(value)
+            # Elsewhere words with an exponent, like 1e5, stay strings.
+            if isinstance(value, Word) and EXPONENT_FLOAT_MATCH(value.text):
+                return float(value.text)
+        return self.string_resolver.resolve(value)
+
+
 class VariableResolver:
     def __init__(self, cfg: Config) -> None:
         self.cfg = cfg
-        self.vars: Set[str] = set()
+        # References whose target was found, over every resolve call.
+        self.resolved = 0
+        self.reset()
 
-    def resolve(self, value: Word, var_path: str) -> Any:
-        self.vars.add(var_path)
-        if isinstance(value, Word):
-            if value.text in self.vars:
-                return self.cfg.get_item_from_dot_notation(value.text)
-        return value
+    def reset(self) -> None:
+        self.references: Dict[str, Tuple[Any, Any, Word]] = {}
+        # Strings with references to config values, rendered once the values
+        # they refer to are resolved.
+        self.templates: Dict[str, Tuple[Any, Any, Template, Tuple[str, ...]]] = {}
+        # Memoized path lookups, the value of a container is the container.
+        self.values: Dict[str, Any] = {}
+        # Tuples are swapped for lists while their items are resolved.
+        self.tuples: Set[int] = set()
+        self.keys: Set[str] = set()
+        self.sources: Optional[Dict[str, Any]] = None
+        self.constant_tuples: Dict[Tuple[int, ...], ExtendedTuple] = {}
 
+    def resolve(
+        self,
+        keys: Iterable[str],
+        resolvers: "Resolvers",
+        sources: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        # Other keys of the config are already resolved, sources holds their
+        # unresolved values so references only follow paths written in the
+        # config, never through another reference.
+        self.reset()
+        keys = list(keys)
+        self.keys = set(keys)
+        self.sources = sources
+        self.collect(keys, resolvers)
+        rendered: TemplateIndex = {}
+        for path in self.sort():
+            if path in self.references:
+                self.resolve_reference(path, resolvers)
+            elif path in self.templates:
+                self.render_template(path, resolvers)
+                _, _, template, references = self.templates[path]
+                rendered[path] = (
+                    template,
+                    {reference: reference for reference in references},
+                    resolvers.environment,
+                )
+        seen: Set[int] = set()
+        for key in keys:
+            self.cfg._config[key] = self.finalize(self.cfg._config[key], seen)
+        # Kept for with_overrides, templates of the keys resolved again are
+        # replaced by the ones rendered now.
+        templates = {
+            path: entry
+            for path, entry in (self.cfg._templates or {}).items()
+            if path.split(".", 1)[0] not in self.keys
+        }
+        self.cfg._templates = {**templates, **rendered} or None
+        self.reset()
 
-class Resolvers:
-    def __init__(self, cfg: Config) -> None:
-        self.python_datatype_resolver = PythonDataTypeResolver()
-        self.environment_variable_resolver = EnvironmentVariableResolver()
-        self.variable_resolver = VariableResolver(cfg)
-        self.string_resolver = StringResolver()
+    def collect(self, keys: List[str], resolvers: "Resolvers") -> None:
+        # Resolves every plain value in place and records the references.
+        stack: List[Tuple[Any, Any, str]] = [
+            (self.cfg._config, key, key) for key in reversed(keys)
+        ]
+        while stack:
+            parent, slot, path = stack.pop()
+            value = parent[slot]
+            if isinstance(value, Config):
+                stack.extend(
+                    (value._config, key, f"{path}.{key}")
+                    for key in reversed(list(value._config))
+                )
+            elif isinstance(value, (list, tuple)):
+                prefix = "l"
+                if isinstance(value, tuple):
+                    prefix = "t"
+                    value = list(value)
+                    parent[slot] = value
+                    self.tuples.add(id(value))
+                stack.extend(
+                    (value, i, f"{path}.{prefix}{i}")
+                    for i in reversed(range(len(value)))
+                )
+            else:
+                value = resolvers.resolve(value, path)
+                if isinstance(value, Word):
+                    self.references[path] = (parent, slot, value)
+                elif isinstance(value, Template):
+                    references = resolvers.references[value]
+                    self.templates[path] = (parent, slot, value, references)
+                parent[slot] = value
+
+    def get_dependencies(self, path: str) -> List[str]:
+        # A value referring to its own path or a block holding it stays as
+        # written, like a reference to a missing path.
+        if path in self.references:
+            target = self.references[path][2].text
+            if is_ancestor(target, path) or self.lookup(target) is MISSING:
+                return []
+            return [target]
+        elif path in self.templates:
+            references = self.templates[path][3]
+            return [
+                p
+                for p in references
+                if not is_ancestor(p, path) and self.lookup(p) is not MISSING
+            ]
+        value = self.lookup(path)
+        if isinstance(value, Config):
+            return [f"{path}.{key}" for key in value._config]
+        elif isinstance(value, list):
+            prefix = "t" if id(value) in self.tuples else "l"
+            return [f"{path}.{prefix}{i}" for i in range(len(value))]
+        return []
+
+    def sort(self) -> List[str]:
+        # Iterative depth first search from every reference, each path comes
+        # after everything it depends on: references after their targets,
+        # containers after their items. Plain values depend on nothing.
+        order: List[str] = []
+        done: Set[str] = set()
+        chain: List[str] = []
+        on_chain: Set[str] = set()
+        for root in [*self.references, *self.templates]:
+            if root in done:
+                continue
+            stack = [(root, iter(self.get_dependencies(root)))]
+            chain.append(root)
+            on_chain.add(root)
+            while stack:
+                path, dependencies = stack[-1]
+                dependency = next(dependencies, None)
+                if dependency is None:
+                    stack.pop()
+                    chain.pop()
+                    on_chain.discard(path)
+                    done.add(path)
+                    order.append(path)
+                elif dependency in on_chain:
+                    cycle = chain[chain.index(dependency) :] + [dependency]
+                    raise ReferenceCycleError("Reference cycle: " + " -> ".join(cycle))
+                elif dependency not in done and (
+                    dependency in self.references
+                    or dependency in self.templates
+                    or isinstance(self.lookup(dependency), (Config, list))
+                ):
+                    stack.append((dependency, iter(self.get_dependencies(dependency))))
+                    chain.append(dependency)
+                    on_chain.add(dependency)
+        return order
 
-    def resolve(self, value: Any, var_path: str = "") -> Any:
-        value = self.python_datatype_resolver.resolve(value)
-        value = self.environment_variable_resolver.resolve(value)
-        value = self.variable_resolver.resolve(value, var_path)
-        value = self.string_resolver.resolve(value)
+    def lookup(self, path: str) -> Any:
+        if path in self.values:
+            return self.values[path]
+        head, _, key = path.rpartition(".")
+        if path.split(".", 1)[0] not in self.keys:
+            # A path outside the keys being resolved, its value is final.
+            if self.sources is not None and get_path(self.sources, path) is MISSING:
+                value = MISSING
+            else:
+                value = get_path(self.cfg, path)
+        elif not head:
+            value = self.cfg._config[key]
+        else:
+            parent = self.lookup(head)
+            if head in self.references:
+                value = MISSING
+            elif isinstance(parent, list) and id(parent) in self.tuples:
+                index = get_index(parent, key, "t")
+                value = parent[index] if index >= 0 else MISSING
+            else:
+                value = get_child(parent, key)
+        self.values[path] = value
         return value
 
-    def update_vars(self, prefix: str) -> None:
-        self.variable_resolver.vars.add(prefix)
+    def resolve_reference(self, path: str, resolvers: "Resolvers") -> None:
+        parent, slot, word = self.references[path]
+        value: Any = MISSING
+        if not is_ancestor(word.text, path):
+            value = self.lookup(word.text)
+        if value is MISSING:
+            value = word
+        else:
+            self.resolved += 1
+        value = resolvers.string_resolver.resolve(value)
+        parent[slot] = value
+        self.values[path] = value
 
+    def render_template(self, path: str, resolvers: "Resolvers") -> None:
+        parent, slot, template, references = self.templates[path]
+        values = {
+            reference: MISSING
+            if is_ancestor(reference, path)
+            else self.restore(self.lookup(reference))
+            for reference in references
+        }
+        self.resolved += sum(value is not MISSING for value in values.values())
+        value = resolvers.render_template(template, values)
+        parent[slot] = value
+        self.values[path] = value
 
-def resolve(config: Config, resolvers: Resolvers, prefix: str = "") -> Any:
-    for key, value in config.items():
+    def restore(self, value: Any) -> Any:
+        # A copy with the tuples swapped for lists turned back into tuples,
+        # so templates render them as lazy configs do.
         if isinstance(value, Config):
-            resolve(value, resolvers, prefix + key + ".")
-        elif isinstance(value, List):
-            config[key] = resolve_list(value, resolvers, prefix + key + ".")
-        elif isinstance(value, tuple):
-            config[key] = resolve_tuple(value, resolvers, prefix + key + ".")
-        else:
-            value = resolvers.resolve(value, prefix + key)
-            config[key] = value
-    resolvers.update_vars(prefix[:-1])
-    return config
+            return Config(
+                {key: self.restore(item) for key, item in value._config.items()}
+            )
+        elif isinstance(value, list):
+            items = [self.restore(item) for item in value]
+            return tuple(items) if id(value) in self.tuples else items
+        return value
 
+    def finalize(self, value: Any, seen: Set[int]) -> Any:
+        # Configs are shared between the paths referring to them, lists and
+        # tuples are copied like Config.__setitem__ does.
+        if isinstance(value, Config):
+            if id(value) not in seen:
+                seen.add(id(value))
+                for key, item in value._config.items():
+                    value._config[key] = self.finalize(item, seen)
+            return value
+        elif isinstance(value, (list, tuple)):
+            items = [self.finalize(item, seen) for item in value]
+            if isinstance(value, tuple) or id(value) in self.tuples:
+                if all(type(item) in SCALAR_TYPES for item in items):
+                    # Tuples of the same scalar objects are shared, the key
+                    # stays valid as the shared tuple keeps its items alive.
+                    return self.constant_tuples.setdefault(
+                        tuple(map(id, items)), ExtendedTuple(items)
+                    )
+                return ExtendedTuple(items)
+            return ExtendedList(items)
+        return value
 
-def resolve_list(value: List[Any], resolvers: Resolvers, prefix: str = "") -> List[Any]:
-    for i, item in enumerate(value):
-        if isinstance(item, Config):
-            resolve(item, resolvers, prefix + "l" + str(i) + ".")
-        elif isinstance(item, List):
-            value[i] = resolve_list(item, resolvers, prefix + "l" + str(i) + ".")
-        elif isinstance(item, tuple):
-            value[i] = resolve_tuple(item, resolvers, prefix + "l" + str(i) + ".")
-        else:
-            item = resolvers.resolve(item, prefix + "l" + str(i))
-            value[i] = item
-    resolvers.update_vars(prefix[:-1])
+
+def get_path(value: Any, path: str) -> Any:
+    for key in path.split("."):
+        value = get_child(value, key)
+        if value is MISSING:
+            break
     return value
 
 
-def resolve_tuple(
-    value: Tuple[Any], resolvers: Resolvers, prefix: str = ""
-) -> Tuple[Any]:
-    value_list: List[Any] = list(value)
-    for i, item in enumerate(value):
-        if isinstance(item, Config):
-            resolve(item, resolvers, prefix + "t" + str(i) + ".")
-        elif isinstance(item, List):
-            value_list[i] = resolve_list(item, resolvers, prefix + "t" + str(i) + ".")
-        elif isinstance(item, tuple):
-            value_list[i] = resolve_tuple(item, resolvers, prefix + "t" + str(i) + ".")
+def get_child(value: Any, key: str) -> Any:
+    if isinstance(value, Config):
+        return value._config.get(key, MISSING)
+    elif isinstance(value, dict):
+        return value.get(key, MISSING)
+    elif isinstance(value, (list, tuple)):
+        index = get_index(value, key)
+        return value[index] if index >= 0 else MISSING
+    return MISSING
+
+
+def get_index(value: Any, key: str, prefix: Optional[str] = None) -> int:
+    if prefix is None:
+        prefix = "t" if isinstance(value, tuple) else "l"
+    index = parse_index(key, prefix)
+    return index if index < len(value) else -1
+
+
+class Resolvers:
+    def __init__(
+        self,
+        cfg: Config,
+        registry: Optional[ResolverRegistry] = None,
+        calls: Optional[Dict[str, int]] = None,
+        environment: Optional[Mapping[str, str]] = None,
+    ) -> None:
+        # One snapshot of the environment for everything resolved here.
+        self.environment = EnvironmentSnapshot() if environment is None else environment
+        registry = default_registry if registry is None else registry
+        self.pipeline = registry.compile(calls, self.environment)
+        self.distribution_resolver = DistributionResolver(self.pipeline)
+        self.variable_resolver = VariableResolver(cfg)
+        self.string_resolver = StringResolver()
+        # Equal scalars resolve to one shared object, keyed by source text.
+        self.constants: Dict[str, Any] = {}
+        self.strings: Dict[str, Union[str, Template]] = {}
+        # Placeholders of each template that refer to config values.
+        self.references: Dict[Template, Tuple[str, ...]] = {}
+        # Environment variables read by a source text, and by each path
+        # whose value was resolved from such a text.
+        self.variables: Dict[str, Tuple[str, ...]] = {}
+        self.dependencies: Dict[str, Tuple[str, ...]] = {}
+
+    def resolve(self, value: Any, path: str = "") -> Any:
+        # Words left after this are references or plain strings, which the
+        # variable resolver tells apart once every path is known.
+        if isinstance(value, Word):
+            text = value.text
+            constant = self.constants.get(text, MISSING)
+            if constant is MISSING:
+                constant = self.pipeline.resolve(value)
+                self.constants[text] = constant
+                if text[:1] == "$":
+                    self.variables[text] = (text[1:],)
+        elif isinstance(value, str):
+            text = value
+            constant = self.strings.get(text)
+            if constant is None:
+                constant = self.strings[text] = self.render(text)
         else:
-            item = resolvers.resolve(item, prefix + "t" + str(i))
-            value_list[i] = item
-    resolvers.update_vars(prefix[:-1])
-    return tuple(value_list)
+            return self.distribution_resolver.resolve(value)
+        if self.variables and path and text in self.variables:
+            self.dependencies[path] = self.variables[text]
+        return constant
+
+    def render(self, string: str) -> Union[str, Template]:
+        # Strings with references to config values stay templates until the
+        # variable resolver has resolved the values they refer to.
+        # - A dotted name, or a name that is a top-level key, refers to the
+        #   config. A top-level key named like a variable, say HOME, wins
+        #   over the variable in ${HOME}. Only $HOME as a whole value still
+        #   reads the variable then.
+        # - Any other name is an environment variable. Unlike a bare $NAME
+        #   word, which stays as written when unset, since any word may start
+        #   with $, an unset ${NAME} without a default raises.
+        #   ${NAME:-} renders it empty instead.
+        template = compile_template(string)
+        if template is None:
+            return string
+        config = self.variable_resolver.cfg._config
+        references = tuple(
+            name for name in template.names if "." in name or name in config
+        )
+        variables = tuple(name for name in template.names if name not in references)
+        if variables:
+            self.variables[string] = variables
+        if references:
+            self.references[template] = references
+            return template
+        return template.render(self.environment)
+
+    def render_template(self, template: Template, values: Mapping[str, Any]) -> str:
+        return template.render(self.environment, values)
+
+
+def resolve(
+    config: Config,
+    resolvers: Resolvers,
+    keys: Optional[Iterable[str]] = None,
+    sources: Optional[Dict[str, Any]] = None,
+) -> Config:
+    resolvers.variable_resolver.resolve(
+        config.keys() if keys is None else keys, resolvers, sources
+    )
+    return config
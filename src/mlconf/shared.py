@@ -0,0 +1,66 @@
+import io
+import sys
+from multiprocessing import shared_memory
+from typing import Any, Optional
+
+from mlconf.binary import BinaryReader, FrozenBinaryConfig, write_binary
+from mlconf.config import Config
+
+
+class SharedConfig:
+    # A config published once in shared memory in the binary format. Every
+    # process maps the same pages and decodes values on access into a
+    # read-only view. The creating process owns the segment: close releases
+    # the mapping of this process, unlink frees the segment once every
+    # process closed it.
+    def __init__(self, memory: shared_memory.SharedMemory, owner: bool) -> None:
+        self.memory = memory
+        self.owner = owner
+        reader = BinaryReader(memory.buf, frozen=True)
+        self.config: Config = FrozenBinaryConfig(reader, reader.root)
+
+    @classmethod
+    def create(cls, config: Config, name: Optional[str] = None) -> "SharedConfig":
+        fp = io.BytesIO()
+        write_binary(config, fp)
+        data = fp.getvalue()
+        memory = shared_memory.SharedMemory(name, create=True, size=len(data))
+        buffer = memory.buf
+        assert buffer is not None, "Shared memory is closed"
+        buffer[: len(data)] = data
+        return cls(memory, True)
+
+    @classmethod
+    def attach(cls, name: str) -> "SharedConfig":
+        # The owner unlinks the segment, attaching processes do not track it.
+        if sys.version_info >= (3, 13):
+            memory = shared_memory.SharedMemory(name, track=False)
+        else:
+            memory = shared_memory.SharedMemory(name)
+        return cls(memory, False)
+
+    @property
+    def name(self) -> str:
+        return self.memory.name
+
+    def close(self) -> None:
+        # Values not decoded yet can no longer be read after this.
+        self.memory.close()
+
+    def unlink(self) -> None:
+        self.memory.unlink()
+
+    def __enter__(self) -> "SharedConfig":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+        if self.owner:
+            self.unlink()
+
+    def __reduce__(self) -> Any:
+        # Sent to another process by name, which attaches there.
+        return SharedConfig.attach, (self.name,)
+
+    def __repr__(self) -> str:
+        return f"SharedConfig({self.name!r})"
@@ -0,0 +1,82 @@
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from typing import Callable, ContextManager, Dict, Iterator, Optional
+
+PHASES = ["total", "read", "cache", "lines", "tokens", "indentation", "parse"]
+PHASES += ["copy", "resolve"]
+COUNTS = ["sources", "chars", "lines", "tokens", "nodes", "references"]
+COUNTS += ["cache_hits", "cache_misses"]
+
+
+class LoadStats:
+    def __init__(self) -> None:
+        # Wall time per phase in seconds, summed over every source. The loader
+        # parses files on threads, so phases can add up to more than total.
+        self.times: Dict[str, float] = dict.fromkeys(PHASES, 0.0)
+        self.counts: Dict[str, int] = dict.fromkeys(COUNTS, 0)
+        # Calls per resolver class, values memoized within a config are
+        # resolved once.
+        self.resolver_calls: Dict[str, int] = {}
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - start)
+
+    def add_time(self, name: str, seconds: float) -> None:
+        with self.lock:
+            self.times[name] = self.times.get(name, 0.0) + seconds
+
+    def count(self, name: str, n: int = 1) -> None:
+        with self.lock:
+            self.counts[name] = self.counts.get(name, 0) + n
+
+    def as_dict(self) -> Dict[str, float]:
+        # Flat metric names, e.g. "time.parse" or "resolver_calls.StringResolver".
+        with self.lock:
+            metrics: Dict[str, float] = {f"time.{k}": v for k, v in self.times.items()}
+            metrics.update((f"count.{k}", v) for k, v in self.counts.items())
+            metrics.update(
+                (f"resolver_calls.{k}", v) for k, v in self.resolver_calls.items()
+            )
+        return metrics
+
+    def __repr__(self) -> str:
+        times = ", ".join(f"{k}={v * 1000:.2f}ms" for k, v in self.times.items() if v)
+        counts = ", ".join(f"{k}={v}" for k, v in self.counts.items() if v)
+        return f"LoadStats({times}; {counts}; resolver_calls={self.resolver_calls})"
+
+
+current_stats: ContextVar[Optional[LoadStats]] = ContextVar(
+    "current_stats", default=None
+)
+
+
+@contextmanager
+def profile(
+    hook: Optional[Callable[[LoadStats], None]] = None,
+) -> Iterator[LoadStats]:
+    # parse and load calls in the block record into the stats it yields, the
+    # hook receives them once the block exits without an error.
+    stats = LoadStats()
+    token = current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        current_stats.reset(token)
+    if hook is not None:
+        hook(stats)
+
+
+def get_stats(stats: Optional[LoadStats] = None) -> Optional[LoadStats]:
+    return current_stats.get() if stats is None else stats
+
+
+def phase(stats: Optional[LoadStats], name: str) -> ContextManager[None]:
+    return nullcontext() if stats is None else stats.phase(name)
@@ -0,0 +1,127 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+from mlconf.cache import ParseCache
+from mlconf.config import Config, compile_path, copy_node
+from mlconf.errors import InvalidSweepError
+from mlconf.loader import load
+from mlconf.parser import parse
+
+SWEEP_KEY = "sweep"
+
+Axis = Tuple[Tuple[str, ...], List[Tuple[Any, ...]]]
+
+
+class Sweep:
+    def __init__(
+        self,
+        base: Config,
+        grid: Optional[Dict[str, Any]] = None,
+        zipped: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        self.base = base
+        # Every grid path is an axis of its own, the zipped paths share one
+        # axis. The last axis varies fastest, like itertools.product.
+        self.axes: List[Axis] = [
+            ((path,), [(value,) for value in get_values(path, values)])
+            for path, values in (grid or {}).items()
+        ]
+        if zipped:
+            columns = [get_values(path, values) for path, values in zipped.items()]
+            if len({len(column) for column in columns}) > 1:
+                raise InvalidSweepError("Zipped sweep values must have equal lengths")
+            self.axes.append((tuple(zipped), list(zip(*columns))))
+        for paths, _ in self.axes:
+            for path in paths:
+                compile_path(path).get(base)
+        self.length = 1
+        for _, values in self.axes:
+            self.length *= len(values)
+
+    @classmethod
+    def from_config(cls, config: Config) -> "Sweep":
+        # The sweep block is removed from the base config the variants share.
+        if SWEEP_KEY not in config:
+            raise InvalidSweepError(f"Config has no '{SWEEP_KEY}' block")
+        sweep = config[SWEEP_KEY]
+        if not isinstance(sweep, Config) or set(sweep.keys()) - {"grid", "zip"}:
+            raise InvalidSweepError(
+                f"'{SWEEP_KEY}' must be a block with 'grid' and 'zip' blocks"
+            )
+        axes = [sweep[key] if key in sweep else Config({}) for key in ["grid", "zip"]]
+        if not all(isinstance(axis, Config) for axis in axes):
+            raise InvalidSweepError("'grid' and 'zip' must map paths to values")
+        base: Config = copy_node(config.resolve_all())
+        del base._config[SWEEP_KEY]
+        return cls(base, dict(axes[0].items()), dict(axes[1].items()))
+
+    @classmethod
+    def from_string(cls, string: str, cache: Optional[ParseCache] = None) -> "Sweep":
+        return cls.from_config(parse(string, cache))
+
+    @classmethod
+    def from_file(
+        cls,
+        path: Union[str, "os.PathLike[str]"],
+        max_workers: Optional[int] = None,
+        cache: Optional[ParseCache] = None,
+    ) -> "Sweep":
+        return cls.from_config(load(path, max_workers, cache))
+
+    def __len__(self) -> int:
+        return self.length
+
+    def overrides(self, index: int) -> Dict[str, Any]:
+        if index < 0:
+            index += self.length
+        if not 0 <= index < self.length:
+            raise IndexError("Sweep index out of range")
+        overrides: Dict[str, Any] = {}
+        for paths, values in reversed(self.axes):
+            index, position = divmod(index, len(values))
+            overrides.update(zip(paths, values[position]))
+        return overrides
+
+    def __getitem__(self, index: int) -> Config:
+        # Variants are built on access and share structure with the base.
+        return self.base.with_overrides(self.overrides(index))
+
+    def __iter__(self) -> Iterator[Config]:
+        for index in range(self.length):
+            yield self[index]
+
+    def map(
+        self,
+        function: Callable[[Config], Any],
+        max_workers: Optional[int] = None,
+        chunksize: int = 256,
+    ) -> Iterator[Any]:
+        # Workers receive the sweep once and build their variants from the
+        # index, only the results travel back.
+        with ProcessPoolExecutor(
+            max_workers, initializer=set_worker_sweep, initargs=(self,)
+        ) as executor:
+            yield from executor.map(
+                partial(run_variant, function), range(self.length), chunksize=chunksize
+            )
+
+
+def get_values(path: str, values: Any) -> List[Any]:
+    if not isinstance(values, (list, tuple)):
+        raise InvalidSweepError(f"Sweep values of '{path}' must be a list or tuple")
+    return list(values)
+
+
+worker_sweep: Optional[Sweep] = None
+
+
+def set_worker_sweep(sweep: Sweep) -> None:
+    global worker_sweep
+    worker_sweep = sweep
+
+
+def run_variant(function: Callable[[Config], Any], index: int) -> Any:
+    assert worker_sweep is not None, "Sweep worker was not initialized"
+    return function(worker_sweep[index])
@@ -0,0 +1,116 @@
+import functools
+import os
+import re
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Tuple, Union
+
+from mlconf.config import MISSING
+from mlconf.errors import MissingEnvironmentVariableError
+from mlconf.regex_utils import REGEX_PLACEHOLDER
+
+PLACEHOLDER = re.compile(REGEX_PLACEHOLDER)
+
+
+class EnvironmentSnapshot(Mapping[str, str]):
+    def __init__(self) -> None:
+        # Each variable is read from os.environ on first use and keeps that
+        # value, copying the whole environment costs more than most loads.
+        self.read: Dict[str, Optional[str]] = {}
+
+    def __getitem__(self, name: str) -> str:
+        if name in self.read:
+            value = self.read[name]
+        else:
+            value = self.read[name] = os.environ.get(name)
+        if value is None:
+            raise KeyError(name)
+        return value
+
+    def __iter__(self) -> Iterator[str]:
+        for name in list(os.environ):
+            self.get(name)
+        return (name for name, value in self.read.items() if value is not None)
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+
+class Placeholder:
+    def __init__(self, name: str, default: Optional[str] = None) -> None:
+        self.name = name
+        self.default = default
+
+    def render(self, environment: Mapping[str, str], values: Mapping[str, Any]) -> str:
+        # values holds the config values of the placeholders that are
+        # references, a reference to a missing path renders its default or
+        # stays as written, like a reference word does.
+        if self.name in values or "." in self.name:
+            value = values.get(self.name, MISSING)
+            if value is MISSING:
+                return repr(self) if self.default is None else self.default
+            return value if isinstance(value, str) else str(value)
+        # Like the shell, the default also replaces an empty variable.
+        value = environment.get(self.name)
+        if value:
+            return value
+        elif self.default is not None:
+            return self.default
+        elif value is not None:
+            return value
+        raise MissingEnvironmentVariableError(
+            f"Environment variable '{self.name}' is not set and has no default"
+        )
+
+    def __repr__(self) -> str:
+        if self.default is None:
+            return f"${{{self.name}}}"
+        return f"${{{self.name}:-{self.default}}}"
+
+
+class Template:
+    def __init__(self, segments: List[Union[str, Placeholder]]) -> None:
+        self.segments = segments
+        self.names: Tuple[str, ...] = tuple(
+            dict.fromkeys(
+                segment.name for segment in segments if isinstance(segment, Placeholder)
+            )
+        )
+
+    def render(
+        self, environment: Mapping[str, str], values: Optional[Mapping[str, Any]] = None
+    ) -> str:
+        values = {} if values is None else values
+        return "".join(
+            segment if isinstance(segment, str) else segment.render(environment, values)
+            for segment in self.segments
+        )
+
+    def __repr__(self) -> str:
+        return f"Template({self.segments!r})"
+
+
+@functools.lru_cache(maxsize=4096)
+def compile_template(string: str) -> Optional[Template]:
+    # Splits a string into literal and placeholder segments once, strings
+    # without placeholders or escapes are no template.
+    if "${" not in string:
+        return None
+    segments: List[Union[str, Placeholder]] = []
+    literal: List[str] = []
+    position = 0
+    for match in PLACEHOLDER.finditer(string):
+        literal.append(string[position : match.start()])
+        position = match.end()
+        if match.group(1) is None:
+            literal.append("${")
+            continue
+        if any(literal):
+            segments.append("".join(literal))
+        literal = []
+        segments.append(Placeholder(match.group(1), match.group(2)))
+    literal.append(string[position:])
+    if any(literal):
+        segments.append("".join(literal))
+    if len(segments) == 1 and isinstance(segments[0], str):
+        # Escapes only, or placeholders of no known form.
+        return None if segments[0] == string else Template(segments)
+    return Template(segments)
@@ -1,8 +1,32 @@
+import itertools
+import re
+from array import array
+from collections import deque
 from enum import Enum
-from typing import Any, List
+from typing import (
+    Any,
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
 
 from mlconf.char import CharStream
 
+WORD_CHARS = (
+    "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789!@#$%^&*_+=<>?/\\|;."
+)
+PUNC_CHARS = "[]():,-"
+
+# token_type, value, line, start and end of a token.
+TokenFields = Tuple["TokenType", Any, int, int, int]
+# Tokens TokenTable stores per extend of its arrays.
+TABLE_CHUNK = 4096
+
 
 class TokenType(Enum):
     WORD = 1
@@ -35,10 +59,22 @@ class KeyWords(Enum):
 
 
 class Token:
-    def __init__(self, token_type: TokenType, value: Any, line: int = -1) -> None:
+    __slots__ = ("token_type", "value", "line", "start", "end")
+
+    def __init__(
+        self,
+        token_type: TokenType,
+        value: Any,
+        line: int = -1,
+        start: int = -1,
+        end: int = -1,
+    ) -> None:
         self.token_type = token_type
         self.value = value
         self.line = line
+        # Offsets of the value in the scanned source, -1 for synthesized tokens.
+        self.start = start
+        self.end = end
 
     def __str__(self) -> str:
         return f"Token({self.token_type}, {self.value})"
@@ -70,7 +106,7 @@ class TokenStream:
             elif ch == " ":
                 self.ch.next()
                 continue
-            elif ch in "[]():,-":
+            elif ch in PUNC_CHARS:
                 self.ch.next()
                 return Token(TokenType.PUNC, ch, self.ch.row)
             elif ch == "#":
@@ -81,10 +117,7 @@ class TokenStream:
                 string_token = self.get_string(delimiter=ch)
                 self.ch.next()
                 return string_token
-            elif (
-                ch
-                in "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789!@#$%^&*_+=<>?/\\|;."
-            ):
+            elif ch in WORD_CHARS:
                 token = self.get_word()
                 if KeyWords.contains(token.value):
                     token = Token(
@@ -99,10 +132,7 @@ class TokenStream:
         word = ""
         while not self.ch.is_eof():
             ch = self.ch.peek()
-            if (
-                ch
-                in "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789!@#$%^&*_+=<>?/\\|;."
-            ):
+            if ch in WORD_CHARS:
                 word += ch
                 self.ch.next()
             else:
@@ -145,107 +175,320 @@ class TokenStream:
         return Token(TokenType.WHITESPACE_INDENT, str(len(indent)), self.ch.row)
 
 
+KEY_WORDS: Dict[str, KeyWords] = {item.name: item for item in KeyWords}
+
+TOKEN_REGEX = re.compile(
+    r" *(?:"
+    r"(?P<comment>#[^\n\0]*)"
+    rf"|(?P<keyword>(?i:{'|'.join(KEY_WORDS)}))(?![{re.escape(WORD_CHARS)}])"
+    rf"|(?P<word>[{re.escape(WORD_CHARS)}]+)"
+    rf"|(?P<punc>[{re.escape(PUNC_CHARS)}])"
+    r"|\n(?P<indent> *)"
+    r"|\"(?P<dstring>[^\"\0]*)\""
+    r"|'(?P<sstring>[^'\0]*)'"
+    r"|(?P<eof>\0)"
+    r"|(?P<error>[\s\S])"
+    r")"
+)
+INDENT_REGEX = re.compile(r" *")
+
+
+class Scanner:
+    def __init__(self, string: str, line_offset: int = 0) -> None:
+        # line_offset numbers the lines of a string cut out of a larger
+        # source, as in that source.
+        self.lines = CharStream.get_lines(string)
+        self.text = "".join(self.lines)
+        self.line_offset = line_offset
+
+    def __iter__(self) -> Iterator[Token]:
+        text = self.text
+        if text.startswith("\0"):
+            return
+        # Bind the hot names locally, this loop runs once per token.
+        token, word, punc = Token, TokenType.WORD, TokenType.PUNC
+        row = self.line_offset
+        indent = INDENT_REGEX.match(text)
+        assert indent is not None
+        yield token(
+            TokenType.WHITESPACE_INDENT, str(indent.end()), row, 0, indent.end()
+        )
+        comment = False
+        for match in TOKEN_REGEX.finditer(text, indent.end()):
+            kind = match.lastgroup
+            if kind == "word":
+                value, end = match[kind], match.end()
+                yield token(word, value, row, end - len(value), end)
+            elif kind == "punc":
+                end = match.end()
+                yield token(punc, match[kind], row, end - 1, end)
+            elif kind == "indent":
+                row += 1
+                yield token(TokenType.NEWLINE, "NEWLINE", row)
+                start, end = match.span(kind)
+                yield token(
+                    TokenType.WHITESPACE_INDENT, str(end - start), row, start, end
+                )
+            elif kind == "dstring" or kind == "sstring":
+                value, end = match[kind], match.end() - 1
+                row += value.count("\n")
+                yield token(TokenType.STRING, value, row, end - len(value), end)
+            elif kind == "keyword":
+                keyword = KEY_WORDS[match[kind].upper()]
+                start, end = match.span(kind)
+                yield token(TokenType.KEY_WORD, keyword, row, start, end)
+            elif kind == "comment":
+                comment = True
+                continue
+            elif kind == "eof":
+                # TokenStream emits a trailing EOF token only when it had to skip
+                # spaces or a comment to reach the end of the buffer.
+                if comment or match.start(kind) > match.start():
+                    yield token(TokenType.EOF, "", row + 1)
+                return
+            elif match["error"] in "\"'":
+                self.croak(text.index("\0", match.start()), "Unterminated string")
+            else:
+                self.croak(match.start("error"), "Unknown character")
+            comment = False
+
+    def tokens(self) -> Iterator[Token]:
+        # The tokens of process_tokens(self).
+        return itertools.starmap(Token, self.fields())
+
+    def fields(self) -> Iterator[TokenFields]:
+        # process_tokens in the same pass as the scan: indents turn straight
+        # into INDENT and DEDENT tokens, without the WHITESPACE_INDENT and
+        # EOF tokens in between. Yields the arguments of each Token, so
+        # TokenTable stores tokens without building them.
+        text = self.text
+        if text.startswith("\0"):
+            return
+        word, punc = TokenType.WORD, TokenType.PUNC
+        newline, indent_type, dedent = (
+            TokenType.NEWLINE,
+            TokenType.INDENT,
+            TokenType.DEDENT,
+        )
+        row = self.line_offset
+        first = INDENT_REGEX.match(text)
+        assert first is not None
+        # Indents of the open blocks, the first line sets the minimum.
+        indents = [first.end()]
+        # Indents before the first word or punctuation are dropped.
+        started = False
+        for match in TOKEN_REGEX.finditer(text, first.end()):
+            kind = match.lastgroup
+            if kind == "word":
+                value, end = match[kind], match.end()
+                yield (word, value, row, end - len(value), end)
+                started = True
+            elif kind == "punc":
+                end = match.end()
+                yield (punc, match[kind], row, end - 1, end)
+                started = True
+            elif kind == "indent":
+                row += 1
+                yield (newline, "NEWLINE", row, -1, -1)
+                start, end = match.span(kind)
+                indent = end - start
+                if indent > indents[-1]:
+                    if started:
+                        yield (indent_type, "", row, -1, -1)
+                    indents.append(indent)
+                while indent < indents[-1]:
+                    yield (dedent, "", row, -1, -1)
+                    indents.pop()
+                    if not indents:
+                        raise below_minimum_indent_error(row, first.end())
+                    if indent > indents[-1]:
+                        raise indent_mismatch_error(row)
+            elif kind == "dstring" or kind == "sstring":
+                value, end = match[kind], match.end() - 1
+                row += value.count("\n")
+                yield (TokenType.STRING, value, row, end - len(value), end)
+            elif kind == "keyword":
+                keyword = KEY_WORDS[match[kind].upper()]
+                start, end = match.span(kind)
+                yield (TokenType.KEY_WORD, keyword, row, start, end)
+            elif kind == "comment":
+                continue
+            elif kind == "eof":
+                break
+            elif match["error"] in "\"'":
+                self.croak(text.index("\0", match.start()), "Unterminated string")
+            else:
+                self.croak(match.start("error"), "Unknown character")
+        for _ in indents[1:]:
+            yield (dedent, "", row, -1, -1)
+
+    def croak(self, pos: int, message: str) -> None:
+        row = self.text.count("\n", 0, pos)
+        col = pos - (self.text.rfind("\n", 0, pos) + 1)
+        raise Exception(
+            f"Error: {row + self.line_offset},{col} - {self.lines[row]}: {message}"
+        )
+
+
+TOKEN_TYPES: Dict[int, TokenType] = {item.value: item for item in TokenType}
+TOKEN_TYPE_VALUES: Dict[TokenType, int] = {item: item.value for item in TokenType}
+SPAN_TOKEN_TYPES = (TokenType.WORD, TokenType.PUNC, TokenType.STRING)
+
+
+class TokenTable:
+    def __init__(self, scanner: Scanner) -> None:
+        self.lines = scanner.lines
+        self.text = scanner.text
+        self.line_offset = scanner.line_offset
+        # One entry per token, values are sliced out of text when requested.
+        self.kinds = array("B")
+        self.starts = array("I")
+        self.ends = array("I")
+        self.token_lines = array("i")
+
+    @classmethod
+    def from_string(cls, string: str, line_offset: int = 0) -> "TokenTable":
+        scanner = Scanner(string, line_offset)
+        table = cls(scanner)
+        fields = scanner.fields()
+        while True:
+            chunk = list(itertools.islice(fields, TABLE_CHUNK))
+            if not chunk:
+                return table
+            token_types, _, lines, starts, ends = zip(*chunk)
+            table.kinds.extend(map(TOKEN_TYPE_VALUES.__getitem__, token_types))
+            # Synthesized tokens have no offsets.
+            table.starts.extend(map(max, starts, itertools.repeat(0)))
+            table.ends.extend(map(max, ends, itertools.repeat(0)))
+            table.token_lines.extend(lines)
+
+    def extend(self, tokens: Iterable[Token]) -> None:
+        kinds, starts, ends = self.kinds, self.starts, self.ends
+        token_lines = self.token_lines
+        for token in tokens:
+            kinds.append(token.token_type.value)
+            starts.append(max(token.start, 0))
+            ends.append(max(token.end, 0))
+            token_lines.append(token.line)
+
+    def get_value(self, idx: int) -> Any:
+        token_type = TOKEN_TYPES[self.kinds[idx]]
+        if token_type in SPAN_TOKEN_TYPES:
+            return self.text[self.starts[idx] : self.ends[idx]]
+        elif token_type == TokenType.KEY_WORD:
+            return KEY_WORDS[self.text[self.starts[idx] : self.ends[idx]].upper()]
+        elif token_type == TokenType.NEWLINE:
+            return "NEWLINE"
+        elif token_type == TokenType.WHITESPACE_INDENT:
+            return str(self.ends[idx] - self.starts[idx])
+        return ""
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+    def __getitem__(self, idx: int) -> Token:
+        return Token(
+            TOKEN_TYPES[self.kinds[idx]],
+            self.get_value(idx),
+            self.token_lines[idx],
+            self.starts[idx],
+            self.ends[idx],
+        )
+
+    def __iter__(self) -> Iterator[Token]:
+        for idx in range(len(self.kinds)):
+            yield self[idx]
+
+
 def get_raw_tokens(string: str) -> List[Token]:
-    charstream = CharStream(string)
-    tokenstream = TokenStream(charstream)
-    tokens = []
-    while not charstream.is_eof():
-        tokens.append(tokenstream.get_next())
-    return tokens
+    return list(Scanner(string))
 
 
 def get_tokens(string: str) -> List[Token]:
-    tokens = get_raw_tokens(string)
-    tokens = strip_eof_tokens(tokens)
-    tokens = replace_whitespace_with_indent_dedent_tokens(tokens)
-    tokens = strip_indent_tokens(tokens)
-    return tokens
+    return list(Scanner(string).tokens())
 
 
-def strip_eof_tokens(tokens: List[Token]) -> List[Token]:
-    if tokens[-1].token_type == TokenType.EOF:
-        return tokens[:-1]
-    return tokens
+def process_tokens(tokens: Iterable[Token]) -> Iterator[Token]:
+    stream = strip_eof_tokens(tokens)
+    stream = replace_whitespace_with_indent_dedent_tokens(stream)
+    stream = strip_indent_tokens(stream)
+    return stream
 
 
-def strip_indent_dedent_tokens(tokens: List[Token]) -> List[Token]:
-    if tokens[-1].token_type == TokenType.DEDENT:
-        tokens = tokens[:-1]
-    if tokens[0].token_type == TokenType.INDENT:
-        tokens = tokens[1:]
-    return tokens
+def strip_eof_tokens(tokens: Iterable[Token]) -> Iterator[Token]:
+    for token in tokens:
+        if token.token_type != TokenType.EOF:
+            yield token
 
 
-def strip_newline_or_indent_tokens(tokens: List[Token]) -> List[Token]:
-    tokens = strip_indent_tokens(tokens)
-    return tokens
+def strip_indent_dedent_tokens(tokens: Iterable[Token]) -> Iterator[Token]:
+    previous: Optional[Token] = None
+    for i, token in enumerate(tokens):
+        if i == 0 and token.token_type == TokenType.INDENT:
+            continue
+        if previous is not None:
+            yield previous
+        previous = token
+    if previous is not None and previous.token_type != TokenType.DEDENT:
+        yield previous
 
 
-def strip_newline_tokens(tokens: List[Token]) -> List[Token]:
-    res_tokens: List[Token] = []
-    encountered_word = False
-    for token in tokens:
-        if token.token_type == TokenType.NEWLINE and not encountered_word:
-            continue
-        if token.token_type == TokenType.WORD or token.token_type == TokenType.PUNC:
-            encountered_word = True
-        res_tokens.append(token)
-    encountered_word = False
-    for token in reversed(res_tokens):
-        if token.token_type == TokenType.NEWLINE:
-            res_tokens.remove(token)
-        if token.token_type == TokenType.WORD or token.token_type == TokenType.PUNC:
-            encountered_word = True
-            break
-    return res_tokens
+def strip_newline_or_indent_tokens(tokens: Iterable[Token]) -> Iterator[Token]:
+    return strip_indent_tokens(tokens)
 
 
-def strip_indent_tokens(tokens: List[Token]) -> List[Token]:
-    res_tokens: List[Token] = []
+def strip_indent_tokens(tokens: Iterable[Token]) -> Iterator[Token]:
     encountered_word = False
-    count = 0
     for token in tokens:
         if token.token_type == TokenType.INDENT and not encountered_word:
-            count += 1
             continue
         elif token.token_type == TokenType.WORD or token.token_type == TokenType.PUNC:
             encountered_word = True
-        res_tokens.append(token)
-    return res_tokens
+        yield token
 
 
-def filter_nonindent_whitespace_tokens(tokens: List[Token]) -> List[Token]:
-    invalid_idxs = []
-    for i, token in enumerate(tokens):
-        if token.token_type == TokenType.WHITESPACE:
-            if tokens[i - 1].token_type == TokenType.NEWLINE:
-                continue
-            else:
-                invalid_idxs.append(i)
-    return [token for i, token in enumerate(tokens) if i not in invalid_idxs]
-
-
-def get_first_whitespace_indent_token(tokens: List[Token]) -> Token:
-    encountered_word = False
+def get_first_whitespace_indent_token(
+    tokens: Iterator[Token], head: List[Token]
+) -> Token:
     for token in tokens:
-        if token.token_type == TokenType.WHITESPACE_INDENT and not encountered_word:
+        head.append(token)
+        if token.token_type == TokenType.WHITESPACE_INDENT:
             return token
         if token.token_type == TokenType.WORD:
-            encountered_word = True
             break
     return Token(TokenType.WHITESPACE_INDENT, "0")
 
 
-def replace_whitespace_with_indent_dedent_tokens(tokens: List[Token]) -> List[Token]:
+def indent_mismatch_error(line: int) -> IndentationError:
+    return IndentationError(
+        f"Error at line {line}: IndentationError, Indent does not match any outer indentation level"
+    )
+
+
+def below_minimum_indent_error(line: int, minimum_indent: int) -> IndentationError:
+    return IndentationError(
+        f"Error at line {line + 1}: Indentation is\
+                            lesser than minimum indentation level {minimum_indent} set at start of file.\
+                            To fix remove all leading whitespaces/ tabs from the start of the file"
+    )
+
+
+def replace_whitespace_with_indent_dedent_tokens(
+    tokens: Iterable[Token],
+) -> Iterator[Token]:
+    stream = iter(tokens)
+    # Tokens read while looking for the first indent are replayed below.
+    head: List[Token] = []
     white_space_tokens: List[Token] = []
-    white_space_tokens.append(get_first_whitespace_indent_token(tokens))
+    white_space_tokens.append(get_first_whitespace_indent_token(stream, head))
     minimum_indent = int(white_space_tokens[0].value)
-    res_tokens: List[Token] = []
-    for i, token in enumerate(tokens):
+    last_line = -1
+    for token in itertools.chain(head, stream):
+        last_line = token.line
         if token.token_type == TokenType.WHITESPACE_INDENT:
             top_token = white_space_tokens[-1]
             if int(token.value) > int(top_token.value):
-                res_tokens.append(Token(TokenType.INDENT, "", token.line))
+                yield Token(TokenType.INDENT, "", token.line)
                 white_space_tokens.append(token)
             elif int(token.value) == int(top_token.value):
                 continue
@@ -254,50 +497,83 @@ def replace_whitespace_with_indent_dedent_tokens(tokens: List[Token]) -> List[To
                     if int(token.value) == int(top_token.value):
                         break
                     if int(token.value) > int(top_token.value):
-                        raise IndentationError(
-                            f"Error at line {token.line}: IndentationError, Indent does not match any outer indentation level"
-                        )
-                    res_tokens.append(Token(TokenType.DEDENT, "", token.line))
+                        raise indent_mismatch_error(token.line)
+                    yield Token(TokenType.DEDENT, "", token.line)
                     white_space_tokens.pop()
                     if len(white_space_tokens) == 0:
-                        raise IndentationError(f"Error at line {token.line+1}: Indentation is\
-                            lesser than minimum indentation level {minimum_indent} set at start of file.\
-                            To fix remove all leading whitespaces/ tabs from the start of the file")
+                        raise below_minimum_indent_error(token.line, minimum_indent)
                     top_token = white_space_tokens[-1]
         else:
-            res_tokens.append(token)
+            yield token
     while len(white_space_tokens) > 1:
         white_space_tokens.pop()
-        res_tokens.append(Token(TokenType.DEDENT, "", tokens[-1].line))
-    return res_tokens
+        yield Token(TokenType.DEDENT, "", last_line)
 
 
 class ParseTokenStream:
-    def __init__(self, string: str):
-        self.lines = CharStream.get_lines(string)
-        self.tokens = get_tokens(string)
+    def __init__(self, string: Union[str, TokenTable]):
+        if isinstance(string, TokenTable):
+            self.start(string.lines, string, string.line_offset)
+        else:
+            scanner = Scanner(string)
+            self.start(scanner.lines, scanner.tokens())
+
+    @classmethod
+    def from_tokens(
+        cls, lines: List[str], tokens: Iterable[Token]
+    ) -> "ParseTokenStream":
+        # Tokens that already went through process_tokens.
+        stream = cls.__new__(cls)
+        stream.start(lines, tokens)
+        return stream
+
+    def start(
+        self, lines: List[str], tokens: Iterable[Token], line_offset: int = 0
+    ) -> None:
+        self.lines = lines
+        self.line_offset = line_offset
+        self.tokens: Iterator[Token] = iter(tokens)
+        # Bounded lookahead, peek_next never needs more than two tokens.
+        self.lookahead: Deque[Token] = deque()
         self.idx = 0
 
+    def fill(self, count: int) -> bool:
+        while len(self.lookahead) < count:
+            token = next(self.tokens, None)
+            if token is None:
+                return False
+            self.lookahead.append(token)
+        return True
+
     def peek(self) -> Token:
-        if self.is_eof():
+        if not self.fill(1):
             return Token(TokenType.EOF, "")
-        return self.tokens[self.idx]
+        return self.lookahead[0]
 
     def next(self) -> None:
+        if self.fill(1):
+            self.lookahead.popleft()
         self.idx += 1
 
     def peek_next(self) -> Token:
         assert not self.is_eof()
-        if self.idx + 1 >= len(self.tokens):
+        if not self.fill(2):
             return Token(TokenType.EOF, "")
-        return self.tokens[self.idx + 1]
+        return self.lookahead[1]
 
     def is_eof(self) -> bool:
-        return self.idx >= len(self.tokens)
+        return not self.fill(1)
 
     def croak(self, message: str) -> None:
-        line = self.tokens[self.idx].line
-        raise Exception(f"Error at line {line}: {message}\n{self.lines[line]}")
+        if self.fill(1):
+            line = self.lookahead[0].line
+        else:
+            line = self.line_offset + len(self.lines) - 1
+        raise Exception(f"Error at line {line}: {message}\n{self.get_line(line)}")
+
+    def get_line(self, line: int) -> str:
+        return self.lines[line - self.line_offset]
 
     def get_tokens_left(self) -> List[Token]:
-        return self.tokens[self.idx :]
+        self.lookahead.extend(self.tokens)
+        return list(self.lookahead)
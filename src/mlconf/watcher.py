@@ -0,0 +1,215 @@
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple, Union
+
+from mlconf.cache import ParseCache
+from mlconf.config import MISSING, Config
+from mlconf.extended_list_and_tuple import ExtendedList, ExtendedTuple
+from mlconf.loader import Loader, ParsedFile
+
+FileSignature = Optional[Tuple[int, int]]
+
+
+def get_signature(path: Path) -> FileSignature:
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def get_changed_paths(old: Any, new: Any, path: str = "") -> List[str]:
+    items: List[Tuple[str, Any, Any]]
+    if isinstance(old, Config) and isinstance(new, Config):
+        keys = {**old._config, **new._config}
+        items = [
+            (key, old._config.get(key, MISSING), new._config.get(key, MISSING))
+            for key in keys
+        ]
+    elif isinstance(old, ExtendedList) and isinstance(new, ExtendedList):
+        items = get_indexed_items("l", old, new)
+    elif isinstance(old, ExtendedTuple) and isinstance(new, ExtendedTuple):
+        items = get_indexed_items("t", old, new)
+    elif type(old) is type(new) and old == new:
+        return []
+    else:
+        return [path]
+    changed: List[str] = []
+    for key, old_value, new_value in items:
+        changed.extend(
+            get_changed_paths(old_value, new_value, f"{path}.{key}" if path else key)
+        )
+    return changed
+
+
+def get_indexed_items(prefix: str, old: Any, new: Any) -> List[Tuple[str, Any, Any]]:
+    return [
+        (
+            f"{prefix}{i}",
+            old[i] if i < len(old) else MISSING,
+            new[i] if i < len(new) else MISSING,
+        )
+        for i in range(max(len(old), len(new)))
+    ]
+
+
+class ConfigChange:
+    def __init__(self, config: Config, paths: List[str], files: List[Path]) -> None:
+        self.config = config
+        self.paths = paths
+        self.files = files
+
+    def __contains__(self, path: str) -> bool:
+        # A path changed if it, something below it or something above it did.
+        return any(
+            changed == path
+            or changed.startswith(path + ".")
+            or path.startswith(changed + ".")
+            for changed in self.paths
+        )
+
+    def __repr__(self) -> str:
+        return f"ConfigChange({self.paths})"
+
+
+Subscriber = Callable[[ConfigChange], None]
+
+
+class ConfigWatcher:
+    def __init__(
+        self,
+        path: Union[str, "os.PathLike[str]"],
+        interval: float = 1.0,
+        debounce: float = 0.1,
+        max_workers: Optional[int] = None,
+        cache: Optional[ParseCache] = None,
+    ) -> None:
+        self.root = Path(path).resolve()
+        self.interval = interval
+        self.debounce = debounce
+        self.loader = Loader(max_workers, cache)
+        self.subscribers: List[Subscriber] = []
+        self.error: Optional[Exception] = None
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+        self.parsed_files = self.loader.parse_import_graph(self.root)
+        self.configs = self.loader.build_configs(self.root, self.parsed_files)
+        self.config = self.configs[self.root]
+        self.signatures = self.get_signatures(self.parsed_files)
+
+    def subscribe(self, callback: Subscriber) -> Subscriber:
+        self.subscribers.append(callback)
+        return callback
+
+    def unsubscribe(self, callback: Subscriber) -> None:
+        self.subscribers.remove(callback)
+
+    def get_signatures(self, paths: Iterable[Path]) -> Dict[Path, FileSignature]:
+        return {path: get_signature(path) for path in paths}
+
+    def poll(self) -> Optional[ConfigChange]:
+        with self.lock:
+            signatures = self.get_signatures(self.signatures)
+            if signatures == self.signatures:
+                return None
+            # Editors and checkpoints often write a file in several steps,
+            # wait until the files stop changing before reading them.
+            while True:
+                time.sleep(self.debounce)
+                settled = self.get_signatures(self.signatures)
+                if settled == signatures:
+                    break
+                signatures = settled
+            changed = [
+                path
+                for path, signature in signatures.items()
+                if signature != self.signatures[path]
+            ]
+            # A file that fails to load is not retried until it changes again.
+            self.signatures = signatures
+            change = self.reload(changed)
+        if change is not None:
+            for callback in list(self.subscribers):
+                callback(change)
+        return change
+
+    def reload(self, changed: List[Path]) -> Optional[ConfigChange]:
+        parsed_files = self.loader.parse_import_graph(
+            self.root,
+            {
+                path: parsed
+                for path, parsed in self.parsed_files.items()
+                if path not in changed
+            },
+        )
+        stale = self.get_importers(changed, parsed_files)
+        configs = self.loader.build_configs(
+            self.root,
+            parsed_files,
+            {
+                path: config
+                for path, config in self.configs.items()
+                if path in parsed_files and path not in stale
+            },
+        )
+        old_config, self.config = self.config, configs[self.root]
+        self.parsed_files = parsed_files
+        self.configs = configs
+        self.signatures = {
+            path: self.signatures[path]
+            if path in self.signatures
+            else get_signature(path)
+            for path in parsed_files
+        }
+        paths = get_changed_paths(old_config, self.config)
+        if not paths:
+            return None
+        return ConfigChange(self.config, paths, changed)
+
+    def get_importers(
+        self, paths: List[Path], parsed_files: Dict[Path, ParsedFile]
+    ) -> Set[Path]:
+        importers: Dict[Path, Set[Path]] = {}
+        for parsed in parsed_files.values():
+            for target in parsed.targets:
+                importers.setdefault(target, set()).add(parsed.path)
+        stale = set(paths)
+        pending = list(paths)
+        while pending:
+            for importer in importers.get(pending.pop(), ()):
+                if importer not in stale:
+                    stale.add(importer)
+                    pending.append(importer)
+        return stale
+
+    def start(self) -> None:
+        if self.thread is not None:
+            return
+        self.stopped.clear()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def stop(self) -> None:
+        self.stopped.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def run(self) -> None:
+        while not self.stopped.wait(self.interval):
+            try:
+                self.poll()
+                self.error = None
+            except Exception as error:
+                # Keep serving the last good config until the files are fixed.
+                self.error = error
+
+    def __enter__(self) -> "ConfigWatcher":
+        self.start()
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.stop()
@@ -1,3 +1,6 @@
+from typing import Any, List
+
+
 class Word:
     def __init__(self, text: str) -> None:
         self.text = text
@@ -7,3 +10,17 @@ class Word:
 
     def __repr__(self) -> str:
         return f"Word({self.text})"
+
+
+class Call:
+    def __init__(self, name: str, args: List[Any]) -> None:
+        self.name = name
+        self.args = args
+
+    def __repr__(self) -> str:
+        return f"Call({self.name}, {self.args})"
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, Call):
+            return False
+        return self.name == other.name and self.args == other.args
@@ -0,0 +1,83 @@
+import pickle
+
+import pytest
+
+from mlconf import dump_binary, load, load_binary
+from mlconf.binary import VERSION, BinaryConfig
+from mlconf.config import Config
+from mlconf.distributions import Choice
+from mlconf.errors import InvalidBinaryConfigError, UnsupportedValueError
+from mlconf.extended_list_and_tuple import ExtendedList, ExtendedTuple
+from mlconf.parser import parse
+
+
+def test_binary_round_trip(tmp_path, test1_config_str, config_dir):
+    path = tmp_path / "config.bin"
+    for config in [
+        parse(test1_config_str, lazy=True),
+        load(config_dir / "test_var.conf"),
+        load(config_dir / "test_imports/test.conf"),
+    ]:
+        dump_binary(config, path)
+        assert load_binary(path) == config
+    config = Config(
+        {
+            "a": {"b": [1, (2.5, "x"), [None, True]], "c": -0.0},
+            "ints": [-(2**31), 2**31, -(10**30), 10**30],
+            "unicode": "ünï",
+            "d": Choice(1, "a", (2, 3)),
+        }
+    )
+    config["e"] = config.a
+    dump_binary(config, path)
+    binary = load_binary(path)
+    assert binary == config
+    assert type(binary.a.b) is ExtendedList
+    assert type(binary.a.b[1]) is ExtendedTuple
+    assert str(binary.a.c) == "-0.0"
+    assert binary.e is binary.a
+    assert pickle.loads(pickle.dumps(binary)) == config
+    assert type(pickle.loads(pickle.dumps(binary))) is Config
+
+
+def test_load_binary_is_lazy(tmp_path):
+    path = tmp_path / "config.bin"
+    config = Config({f"key{i}": {"a": i, "b": [i, str(i)]} for i in range(1000)})
+    dump_binary(config, path)
+    binary = load_binary(path)
+    assert isinstance(binary, BinaryConfig)
+    assert binary.key500.b == [500, "500"]
+    assert "key999" in binary and "key1000" not in binary
+    assert len(binary) == 1000
+    assert binary.keys() == config.keys()
+    # Only the nodes on the path were decoded.
+    assert binary._table is None
+    assert len(binary._reader.nodes) == 2
+    with pytest.raises(KeyError):
+        binary["missing"]
+
+    binary.key1.a = 5
+    binary["key2"] = {"c": 1}
+    assert binary.key1.a == 5
+    assert binary.key2 == Config({"c": 1})
+    assert binary._table is not None
+    assert binary.with_overrides({"key3.a": 0}).key3.a == 0
+    assert binary.key3.a == 3
+
+
+def test_binary_errors(tmp_path):
+    path = tmp_path / "config.bin"
+    with pytest.raises(UnsupportedValueError, match="'a.l1'"):
+        dump_binary(Config({"a": [1, object()]}), path)
+    path.write_bytes(b"")
+    with pytest.raises(InvalidBinaryConfigError):
+        load_binary(path)
+    path.write_bytes(b"not a binary config")
+    with pytest.raises(InvalidBinaryConfigError):
+        load_binary(path)
+    dump_binary(Config({"a": 1}), path)
+    data = bytearray(path.read_bytes())
+    data[4] = VERSION + 1
+    path.write_bytes(bytes(data))
+    with pytest.raises(InvalidBinaryConfigError, match="version"):
+        load_binary(path)
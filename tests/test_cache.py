@@ -0,0 +1,102 @@
+import os
+
+import pytest
+
+from mlconf import load
+from mlconf.cache import ParseCache
+from mlconf.parser import parse
+
+
+@pytest.fixture
+def count_parses(monkeypatch):
+    import mlconf.cache
+
+    calls = []
+    parse_source = mlconf.cache.parse_source
+
+    def counting_parse_source(string, stats=None):
+        calls.append(string)
+        return parse_source(string, stats)
+
+    monkeypatch.setattr(mlconf.cache, "parse_source", counting_parse_source)
+    return calls
+
+
+def test_cache_hit_skips_parsing(tmp_path, test1_config_str, count_parses):
+    cache = ParseCache(tmp_path / "cache")
+    first = parse(test1_config_str, cache=cache)
+    second = parse(test1_config_str, cache=cache)
+    assert first == second == parse(test1_config_str)
+    assert len(count_parses) == 1
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    # A new process starts with an empty memory layer and reads from disk.
+    disk_cache = ParseCache(tmp_path / "cache")
+    assert parse(test1_config_str, cache=disk_cache) == first
+    assert len(count_parses) == 1
+    assert disk_cache.hits == 1
+
+
+def test_cache_resolves_environment_fresh(tmp_path, monkeypatch, count_parses):
+    cache = ParseCache(tmp_path)
+    monkeypatch.setenv("MLCONF_CACHE_TEST", "first")
+    assert parse("a: $MLCONF_CACHE_TEST", cache=cache).a == "first"
+    monkeypatch.setenv("MLCONF_CACHE_TEST", "second")
+    assert parse("a: $MLCONF_CACHE_TEST", cache=cache).a == "second"
+    assert len(count_parses) == 1
+
+
+def test_cache_hits_are_independent(tmp_path):
+    cache = ParseCache(tmp_path)
+    string = "a: [1, [2, [3]], (4, 5)]"
+    first = parse(string, cache=cache)
+    first.a[1][1].append(6)
+    assert parse(string, cache=cache).a == [1, [2, [3]], (4, 5)]
+
+
+def test_cache_key_depends_on_content_and_version(monkeypatch):
+    key = ParseCache.get_key("a: 1")
+    assert key == ParseCache.get_key("a: 1")
+    assert key != ParseCache.get_key("a: 2")
+    monkeypatch.setattr("mlconf.cache.MLCONF_VERSION", "0.0.0-other")
+    assert key != ParseCache.get_key("a: 1")
+
+
+def test_cache_memory_eviction(tmp_path):
+    cache = ParseCache(tmp_path, max_memory_bytes=1)
+    parse("a: 1", cache=cache)
+    assert cache.memory_bytes == 0 and not cache.memory
+    cache = ParseCache(tmp_path)
+    for i in range(3):
+        parse(f"a: {i}", cache=cache)
+    size = cache.memory_bytes // 3
+    cache.max_memory_bytes = 2 * size
+    parse("a: 3", cache=cache)
+    assert list(cache.memory) == [ParseCache.get_key(f"a: {i}") for i in (2, 3)]
+
+
+def test_cache_disk_eviction(tmp_path):
+    cache = ParseCache(tmp_path)
+    parse("a: 0", cache=cache)
+    parse("a: 1", cache=cache)
+    size = cache.get_path(ParseCache.get_key("a: 0")).stat().st_size
+    cache.max_bytes = 2 * size
+    os.utime(cache.get_path(ParseCache.get_key("a: 0")), (0, 0))
+    parse("a: 2", cache=cache)
+    remaining = {path.name for path in tmp_path.iterdir()}
+    assert remaining == {ParseCache.get_key(f"a: {i}") + ".pickle" for i in (1, 2)}
+
+
+def test_cache_corrupt_entry(tmp_path):
+    cache = ParseCache(tmp_path)
+    cache.get_path(ParseCache.get_key("a: 1")).write_bytes(b"not a pickle")
+    assert parse("a: 1", cache=cache).a == 1
+    assert parse("a: 1", cache=ParseCache(tmp_path)).a == 1
+
+
+def test_load_with_cache(tmp_path, config_dir, count_parses):
+    cache = ParseCache(tmp_path)
+    first = load(config_dir / "test_imports/test.conf", cache=cache)
+    second = load(config_dir / "test_imports/test.conf", cache=cache)
+    assert first == second
+    assert len(count_parses) == 4
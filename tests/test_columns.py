@@ -0,0 +1,42 @@
+from array import array
+
+from mlconf import Config, to_columns
+from mlconf.columns import Column
+
+
+def test_to_columns():
+    configs = [
+        Config({"a": {"b": 1, "c": [0.5, "x"]}, "d": (True,)}),
+        Config({"a": {"b": 2, "c": [1.5]}, "e": None}),
+        Config({"a": {"b": 3.5, "c": [2, "y"]}, "d": ("z",)}),
+    ]
+    columns = to_columns(configs)
+    assert list(columns) == ["a.b", "a.c.l0", "a.c.l1", "d.t0", "e"]
+    assert columns["a.b"].dtype == "float64"
+    assert columns["a.b"].tolist() == [1.0, 2.0, 3.5]
+    assert columns["a.c.l0"].tolist() == [0.5, 1.5, 2.0]
+    assert columns["a.c.l1"].dtype == "object"
+    assert columns["a.c.l1"].tolist() == ["x", None, "y"]
+    assert columns["d.t0"].tolist() == [True, None, "z"]
+    assert columns["e"].tolist() == [None, None, None]
+    assert all(len(column) == 3 for column in columns.values())
+    assert to_columns([]) == {}
+
+
+def test_column_types():
+    column = Column()
+    for row, value in enumerate([None, 1, 2, None, 3]):
+        column.append(value, row)
+    column.pad(6)
+    assert column.dtype == "int64" and isinstance(column.values, array)
+    assert column.tolist() == [None, 1, 2, None, 3, None]
+    assert bytes(column.mask) == b"\x00\x01\x01\x00\x01\x00"
+    column.append(2**70, 6)
+    assert column.dtype == "object"
+    assert column.tolist() == [None, 1, 2, None, 3, None, 2**70]
+    flags = Column()
+    flags.append(True, 0)
+    flags.append(False, 2)
+    assert flags.dtype == "bool" and flags.tolist() == [True, None, False]
+    flags.append(1, 3)
+    assert flags.tolist() == [True, None, False, 1]
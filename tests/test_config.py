@@ -1,8 +1,11 @@
+import pickle
 from copy import deepcopy as copy
 
 import pytest
 
 from mlconf import Config
+from mlconf.config import FrozenConfig, new_table
+from mlconf.parser import parse
 
 
 @pytest.fixture
@@ -140,3 +143,117 @@ def test_tuples(config):
 def test_len(config):
     config = Config(config)
     assert len(config) == 1
+
+
+def test_compile_path():
+    config = Config({"model": {"layers": [{"dim": 1}, {"dim": 2}], "l0": (3, 4)}})
+    dim = config.compile_path("model.layers.l1.dim")
+    assert dim.get(config) == 2
+    assert Config.compile_path("model.l0.t1").get(config) == 4
+    config.model.layers[1]["dim"] = 5
+    assert dim.get(config) == 5
+    config["model"] = {"layers": [{"dim": 6}, {"dim": 7}]}
+    assert dim.get(config) == 7
+    assert config.get_item_from_dot_notation("model.layers.l0.dim") == 6
+    for path in ["model.layers.l2.dim", "model.layers.t0", "model.layers.l01"]:
+        with pytest.raises(KeyError):
+            config.compile_path(path).get(config)
+
+
+def test_get_many():
+    config = Config({"a": {"b": [1, {"c": 2}], "d": 3}, "e": 4})
+    paths = ["e", "a.b.l1.c", "a.d", "a.b.l0", "a"]
+    assert config.get_many(paths) == [4, 2, 3, 1, config.a]
+    assert config.get_many([config.compile_path("a.d"), "e"]) == [3, 4]
+    assert config.get_many([]) == []
+    with pytest.raises(KeyError):
+        config.get_many(["a.d", "a.x"])
+
+
+def test_freeze():
+    shared = {"dim": 1}
+    config = Config({"a": shared, "b": [shared, (2, [3])], "c": "x"})
+    frozen = config.freeze()
+    assert isinstance(frozen, FrozenConfig)
+    assert frozen == config
+    assert frozen.b.l1.t1.l0 == 3
+    assert frozen.compile_path("b.l0.dim").get(frozen) == 1
+    assert copy(frozen) is frozen and frozen.freeze() is frozen
+    for mutate in [
+        lambda: frozen.__setitem__("c", "y"),
+        lambda: setattr(frozen.a, "dim", 2),
+        lambda: frozen.b.append(4),
+        lambda: frozen.b.l1.t1.__setitem__(0, 4),
+    ]:
+        with pytest.raises(TypeError):
+            mutate()
+    config.a.dim = 2
+    assert frozen.a.dim == 1
+    # Configs shared by references stay shared once frozen.
+    frozen = parse("a:\n  dim: 1\nb: a\n").freeze()
+    assert frozen.b is frozen.a
+
+
+def test_frozen_hash():
+    first = Config({"a": {"b": [1, 2]}, "c": 3}).freeze()
+    second = Config({"c": 3, "a": {"b": [1, 2]}}).freeze()
+    assert first == second and hash(first) == hash(second)
+    assert first != Config({"a": {"b": [1, 3]}, "c": 3}).freeze()
+    assert len({first, second, first.a}) == 2
+    thawed = first.thaw()
+    assert type(thawed) is Config and thawed == first
+    thawed.a.b.append(3)
+    assert first.a.b == [1, 2]
+
+
+def test_with_overrides():
+    base = Config({"optim": {"lr": 0.1, "betas": (0.9, [0.99])}, "data": {"n": 1}})
+    config = base.with_overrides(
+        {"optim.lr": 3e-4, "optim.betas.t1.l0": 0.5, "data": {"n": 2}}
+    )
+    assert config.optim.lr == 3e-4 and config.optim.betas == (0.9, [0.5])
+    assert config.data == Config({"n": 2})
+    assert base.optim.lr == 0.1 and base.optim.betas == (0.9, [0.99])
+    assert base.data.n == 1
+    config = base.with_overrides({"optim.lr": 1.0})
+    assert config.data is base.data and config.optim.betas is base.optim.betas
+    assert base.with_overrides({}) == base
+    with pytest.raises(KeyError):
+        base.with_overrides({"optim.momentum": 0.9})
+
+
+def test_with_overrides_many():
+    base = Config({"a": {"b": 1}, "c": [1, 2]}).freeze()
+    variants = base.with_overrides_many([{"a.b": 2}, {"c.l1": {"d": 3}}])
+    assert [variant.a.b for variant in variants] == [2, 1]
+    assert isinstance(variants[1].c.l1, FrozenConfig)
+    assert variants[1].a is base.a and hash(variants[0]) != hash(base)
+    with pytest.raises(TypeError):
+        variants[0].a["b"] = 3
+
+
+def test_compact_nodes():
+    first = parse("a:\n    lr: 0.5\n    betas: (0.9, x)\nb:\n    lr: 0.5\n")
+    second = parse("c:\n    lr: 0.5\n    betas: (0.9, x)\n")
+    for node in [first, first.a.betas, Config({"a": [1]}).a, first.freeze()]:
+        assert type(node).__dictoffset__ == 0
+    # Keys are interned across configs, equal scalars and tuples are shared.
+    assert list(first.a.keys())[0] is list(second.c.keys())[0]
+    assert first.a.lr is first.b.lr
+    assert first.a.betas is not second.c.betas and first.a.betas == second.c.betas
+    config = parse("a: (1, 2)\nb: (1, 2)\nc: (1.0, 2)\n")
+    assert config.a is config.b and type(config.c.t0) is float
+    tables = [new_table(("x", "y")) for _ in range(3)]
+    for table in tables:
+        table.update(x=1, y=2)
+    tables[1]["z"] = 3
+    del tables[2]["x"]
+    assert tables == [{"x": 1, "y": 2}, {"x": 1, "y": 2, "z": 3}, {"y": 2}]
+
+
+def test_pickle():
+    config = parse("a:\n    b: [1, (2, 3)]\nc: a\n")
+    for value in [config, config.freeze()]:
+        copied = pickle.loads(pickle.dumps(value))
+        assert type(copied) is type(value) and copied == value
+        assert copied.c is copied.a
@@ -0,0 +1,95 @@
+import pytest
+
+from mlconf.distributions import Choice, LogUniform, RandInt, RandomState
+from mlconf.errors import InvalidDistributionError
+from mlconf.parser import parse
+
+SEARCH = """
+optim:
+    lr: loguniform(1e-5, 1e-2)
+    momentum: uniform(0.8, 0.99)
+    warmup: randint(0, 10)
+    noise: normal(0, 1)
+model:
+    dropout: choice(0.1, 0.2, 0.3)
+    layers: [choice(small, large), 4]
+lr: optim.lr
+"""
+
+
+def test_resolve_distributions():
+    config = parse(SEARCH)
+    assert config.optim.lr == LogUniform(1e-5, 1e-2)
+    assert config.model.dropout == Choice(0.1, 0.2, 0.3)
+    assert config.model.layers.l0 == Choice("small", "large")
+    assert config.lr is config.optim.lr
+    assert parse(SEARCH, lazy=True) == config
+    assert repr(config.optim.warmup) == "randint(0, 10)"
+
+
+def test_sample():
+    config = parse(SEARCH)
+    samples = config.sample(100, seed=0)
+    assert len(samples) == 100
+    assert samples == config.sample(100, seed=0)
+    assert samples != config.sample(100, seed=1)
+    for sample in samples:
+        assert 1e-5 <= sample.optim.lr <= 1e-2
+        assert 0.8 <= sample.optim.momentum <= 0.99
+        assert sample.optim.warmup in range(10)
+        assert isinstance(sample.optim.noise, float)
+        assert sample.model.dropout in (0.1, 0.2, 0.3)
+        assert sample.model.layers == [sample.model.layers.l0, 4]
+        assert sample.lr == sample.optim.lr
+    assert {sample.model.layers.l0 for sample in samples} == {"small", "large"}
+    assert config.sample(0) == []
+    assert parse("a: 1\n").sample(2) == [parse("a: 1\n")] * 2
+
+
+def test_random_state():
+    values = RandomState(0).integers(2, 5, 1000)
+    assert values == RandomState(0).integers(2, 5, 1000)
+    assert set(values) == {2, 3, 4}
+
+
+def test_random_state_numpy():
+    numpy = pytest.importorskip("numpy")
+    state = RandomState(0)
+    assert state.generator is not None
+    values = state.integers(2, 5, 100)
+    assert values == numpy.random.default_rng(0).integers(2, 5, 100).tolist()
+    samples = [
+        values,
+        state.uniform(0.5, 1.0, 100),
+        state.loguniform(1e-5, 1e-2, 100),
+        state.normal(0, 1, 100),
+    ]
+    # Configs get Python numbers, not NumPy scalars.
+    assert {type(value) for value in samples[0]} == {int}
+    assert {type(value) for sample in samples[1:] for value in sample} == {float}
+    assert all(0.5 <= value < 1.0 for value in samples[1])
+    assert all(1e-5 <= value <= 1e-2 for value in samples[2])
+    config = parse(SEARCH)
+    assert config.sample(10, seed=0) == config.sample(10, seed=0)
+
+
+@pytest.mark.parametrize(
+    "string",
+    [
+        "a: gaussian(0, 1)\n",
+        "a: uniform(0, x)\n",
+        "a: loguniform(0, 1)\n",
+        "a: randint(2, 1)\n",
+    ],
+)
+def test_invalid_distribution(string):
+    with pytest.raises(InvalidDistributionError):
+        parse(string)
+
+
+def test_distribution_arguments():
+    assert RandInt(0, 2) == RandInt(0, 2) and RandInt(0, 2) != RandInt(0, 3)
+    with pytest.raises(InvalidDistributionError):
+        RandInt(0.5, 2)
+    with pytest.raises(InvalidDistributionError):
+        Choice()
@@ -0,0 +1,73 @@
+import io
+
+import pytest
+
+from mlconf import load
+from mlconf.config import Config
+from mlconf.errors import UnsupportedValueError
+from mlconf.parser import parse
+
+
+def test_dump_round_trip(test1_config_str, config_dir):
+    for lazy in [False, True]:
+        config = parse(test1_config_str, lazy=lazy)
+        string = config.dumps()
+        assert parse(string) == config
+        assert parse(string).dumps() == string
+    config = load(config_dir / "test_var.conf")
+    assert parse(config.dumps()) == config
+    # Blocks in lists are written as a reference to the shared block.
+    config = parse("a:\n    b: 1\nc: [a, 2]\n")
+    assert config.dumps() == "a:\n    b: 1\nc: [a, 2]\n"
+    # Exponents only read back in call arguments, floats are written without.
+    config = Config({"a": 1e-05, "b": [1e16, -2.5e-7], "c": 1e300})
+    assert config.dumps().startswith(
+        "a: 0.00001\nb: [10000000000000000.0, -0.00000025]"
+    )
+    assert parse(config.dumps()) == config
+
+
+def test_dump_syntax():
+    config = parse(
+        'a: "x$${y}"\n'
+        'b: choice("${z}", \'q"\', [1, 2])\n'
+        "c: [0.00001, -0.0, (1), [(2, 3)]]\n"
+        "d:\n    - 1\n    - e: None\n    f: 'it\"s'\n"
+    )
+    assert config.dumps() == (
+        'a: "x$${y}"\n'
+        'b: choice("${z}", \'q"\', [1, 2])\n'
+        "c:\n    - 0.00001\n    - -0.0\n    - (1)\n    - [(2, 3)]\n"
+        "d:\n    - 1\n    - e: None\n    f: 'it\"s'\n"
+    )
+    assert parse(config.dumps()) == config
+
+
+def test_dump_streams(monkeypatch):
+    monkeypatch.setattr("mlconf.dump.CHUNK_LINES", 10)
+    config = Config({f"key{i}": {"a": i, "b": [i, str(i)]} for i in range(100)})
+    fp = io.StringIO()
+    writes = []
+    monkeypatch.setattr(fp, "write", lambda text: writes.append(text))
+    config.dump(fp)
+    assert len(writes) > 10
+    assert parse("".join(writes)) == config
+
+
+@pytest.mark.parametrize(
+    "config",
+    [
+        {"a": []},
+        {"a": {}},
+        {"a": float("nan")},
+        {"a": "both ' and \""},
+        {"a": "line\n# comment"},
+        {"a b": 1},
+        {"import": 1},
+        {"a": [Config({"b": 1}), 2]},
+        {"a": object()},
+    ],
+)
+def test_dump_unsupported(config):
+    with pytest.raises(UnsupportedValueError):
+        Config(config).dumps()
@@ -0,0 +1,130 @@
+import re
+
+import pytest
+
+from mlconf.incremental import IncrementalParser
+from mlconf.parser import parse
+
+SOURCE = """# header comment
+a1: hello
+a2:
+    b1: world
+    b2: [1, 2, (3, 4)]
+    b3: a1
+a3: a2.b1
+a4:
+    - a3
+    - x
+a5: 5
+"""
+
+
+def edited(string, start, end, text):
+    lines = string.split("\n")
+    lines[start:end] = text.splitlines()
+    return "\n".join(lines)
+
+
+@pytest.mark.parametrize(
+    "start, end, text",
+    [
+        (3, 4, "    b1: there"),
+        (1, 2, "a1: bye"),
+        (10, 11, "a5: 6\na6: a5"),
+        (7, 10, ""),
+        (5, 5, "    b4:\n        c1: a2.b1"),
+        (6, 7, "    a3: a2.b1"),
+        (1, 2, ""),
+        (0, 1, "a0: 0"),
+        (11, 11, "a6:\n  - a4\n  - a1"),
+        (10, 11, "    - y"),
+    ],
+)
+def test_edit_matches_parse(start, end, text):
+    parser = IncrementalParser(SOURCE)
+    assert parser.config == parse(SOURCE)
+    expected = edited(SOURCE, start, end, text)
+    config = parser.edit(start, end, text)
+    assert parser.source == expected
+    assert config == parse(expected)
+    assert list(config.keys()) == list(parse(expected).keys())
+
+
+def test_edit_reparses_only_affected_blocks():
+    parser = IncrementalParser(SOURCE)
+    a2, a4 = parser.config.a2, parser.config.a4
+    blocks = list(parser.blocks)
+    parser.edit(10, 11, "a5: 6")
+    assert parser.config.a5 == 6
+    assert parser.config.a2 is a2
+    assert parser.config.a4 is a4
+    assert [block is old for block, old in zip(parser.blocks, blocks)] == [
+        True,
+        True,
+        True,
+        True,
+        True,
+        False,
+    ]
+
+
+def test_dependent_blocks_are_reresolved():
+    parser = IncrementalParser(SOURCE)
+    parser.edit(3, 4, "    b1: there")
+    assert parser.config.a3 == "there"
+    assert parser.config.a4 == ["there", "x"]
+    parser.edit(2, 6, "")
+    assert "a2" not in parser.config
+    assert parser.config.a3 == "a2.b1"
+    assert parser.config == parse(parser.source)
+
+
+def test_update_uses_line_diff(test1_config_str):
+    parser = IncrementalParser(test1_config_str)
+    assert parser.config == parse(test1_config_str)
+    string = test1_config_str.replace("a2: 2", "a2: 22")
+    parser.update(string)
+    assert parser.config.a2 == 22
+    assert parser.config == parse(string)
+    for string in [SOURCE, "a: 1", "  a: 1\n  b: a\n"]:
+        parser.update(string)
+        assert parser.source == string
+        assert parser.config == parse(string)
+    assert len(parser.update("# nothing left")) == 0
+
+
+def test_duplicate_keys_fall_back_to_parse():
+    string = "a: 1\nb: a\na: 2\n"
+    parser = IncrementalParser(string)
+    assert parser.config == parse(string)
+    parser.edit(2, 3, "c: 3")
+    assert parser.config == parse(parser.source)
+
+
+def test_failed_edit_keeps_parser():
+    parser = IncrementalParser(SOURCE)
+    with pytest.raises(Exception, match="Expected"):
+        parser.edit(7, 10, "a4:\n    - [a3\n    - x\n    - y")
+    assert parser.source == SOURCE
+    config = parser.edit(10, 11, "a5: 6\na6: a5")
+    expected = edited(SOURCE, 10, 11, "a5: 6\na6: a5")
+    assert config == parse(expected)
+    assert list(config.keys()) == list(parse(expected).keys())
+    # Blocks after an edit report the lines they moved to.
+    with pytest.raises(Exception) as error:
+        parse(edited(expected, 11, 12, "a6: [a5"))
+    with pytest.raises(Exception, match=f"^{re.escape(str(error.value))}$"):
+        parser.edit(11, 12, "a6: [a5")
+
+
+@pytest.mark.parametrize(
+    "text", ["    b1: [1, 2\n", "    b1: 1\n   b4: 2\n", "    b1: 1 ;\n"]
+)
+def test_errors_report_source_lines(text):
+    expected = edited(SOURCE, 3, 4, text)
+    with pytest.raises(Exception) as error:
+        parse(expected)
+    with pytest.raises(type(error.value), match=f"^{re.escape(str(error.value))}$"):
+        IncrementalParser(expected)
+    with pytest.raises(type(error.value), match=f"^{re.escape(str(error.value))}$"):
+        IncrementalParser(SOURCE).edit(3, 4, text)
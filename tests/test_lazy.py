@@ -0,0 +1,90 @@
+import copy
+
+import pytest
+
+from mlconf import Config, LoadStats
+from mlconf.errors import ReferenceCycleError
+from mlconf.parser import build_config, parse, parse_source
+from mlconf.template import EnvironmentSnapshot
+
+REFERENCES = """
+a: 1
+b: [a, 2, b.l1, (a, b.t0)]
+c:
+    d: b.l2
+    e: c.d
+    f: g.t0
+g: (3, g.t0, [g.t0])
+h:
+    - z
+    - a
+    - x: h.l1
+"""
+
+
+def test_lazy_matches_eager(test1_config_str, test1_var_str):
+    for string in [test1_config_str, test1_var_str, REFERENCES]:
+        eager = parse(string)
+        lazy = parse(string, lazy=True)
+        assert lazy == eager
+        assert eager == lazy
+        assert repr(lazy) == repr(eager)
+
+
+def test_lazy_resolves_on_access():
+    conf = parse(REFERENCES, lazy=True)
+    assert conf._pending == set(conf.keys())
+    assert conf.c.e == 2
+    assert conf._pending == {"a", "b", "g", "h"}
+    assert conf.c._pending == {"f"}
+    assert conf.c.f == 3
+    assert conf.g == (3, 3, [3])
+    assert conf.b.l3.t1 == "b.t0"
+    assert conf.get_item_from_dot_notation("h.l2.x") == 1
+
+
+def test_lazy_resolve_all():
+    conf = parse(REFERENCES, lazy=True)
+    assert conf.resolve_all() is conf
+    assert not conf._pending and not conf.c._pending and not conf.h.l2._pending
+    assert conf._config == parse(REFERENCES)._config
+    plain = Config({"a": 1})
+    assert plain.resolve_all() is plain
+
+
+def test_lazy_copy_and_assignment():
+    conf = parse(REFERENCES, lazy=True)
+    assert conf.b.l0 == 1
+    conf.a = 5
+    conf["c"] = {"d": 1}
+    assert conf.a == 5
+    assert conf.b.l0 == 1
+    assert conf.c == Config({"d": 1})
+    copied = copy.deepcopy(parse(REFERENCES, lazy=True))
+    assert type(copied) is Config
+    assert copied == parse(REFERENCES)
+
+
+def test_lazy_reference_cycle():
+    conf = parse("a: 1\nb:\n    c: d\nd: [b]\n", lazy=True)
+    assert conf.a == 1
+    with pytest.raises(ReferenceCycleError) as exc_info:
+        conf.b.c
+    assert str(exc_info.value) == "Reference cycle: b.c -> d -> d.l0 -> b -> b.c"
+
+
+def test_lazy_environment_and_stats(monkeypatch):
+    monkeypatch.setenv("DATA_DIR", "/data")
+    environment = EnvironmentSnapshot()
+    assert environment["DATA_DIR"] == "/data"
+    monkeypatch.setenv("DATA_DIR", "/scratch")
+    _, ast = parse_source('a: $DATA_DIR\nb: "${DATA_DIR}/x"\nc: a\n')
+    config = build_config(ast, lazy=True, environment=environment)
+    assert (config.a, config.b) == ("/data", "/data/x")
+
+    stats, eager = LoadStats(), LoadStats()
+    parse(REFERENCES, lazy=True, stats=stats).resolve_all()
+    parse(REFERENCES, stats=eager)
+    assert stats.counts["nodes"] == eager.counts["nodes"]
+    assert stats.counts["references"] == eager.counts["references"] > 0
+    assert stats.resolver_calls
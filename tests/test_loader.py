@@ -0,0 +1,58 @@
+import pytest
+
+from mlconf import Config, load
+from mlconf.errors import ImportCycleError, InvalidImportLocationError
+from mlconf.loader import Loader, parse_file
+from mlconf.parser import parse
+
+
+def test_load_imports(config_dir):
+    conf = load(config_dir / "test_imports/test.conf")
+    assert conf.a == "Hello from level 2 nested dir"
+    assert conf.b.c == "Hello from same dir"
+    assert conf.b.d == "Hello from level 1 nested dir"
+    assert conf.imp3 == Config({"a1": "Hello from level 2 nested dir"})
+
+
+def test_load_without_imports(config_dir, test1_var_str):
+    assert load(config_dir / "test_var.conf") == parse(test1_var_str)
+
+
+def test_load_deduplicates_imports(config_dir, monkeypatch):
+    parsed = []
+
+    def counting_parse_file(path, cache=None, stats=None):
+        parsed.append(path.name)
+        return parse_file(path, cache, stats)
+
+    monkeypatch.setattr("mlconf.loader.parse_file", counting_parse_file)
+    conf = Loader(max_workers=4).load(config_dir / "test_imports/diamond.conf")
+    assert conf.a == "base"
+    assert conf.b == 0.01
+    assert conf.c == 0.01
+    assert sorted(parsed) == ["base.conf", "diamond.conf", "left.conf", "right.conf"]
+    conf.left.base.name = "changed"
+    assert conf.base.name == "base"
+
+
+def test_load_import_cycle(config_dir):
+    with pytest.raises(ImportCycleError) as exc_info:
+        load(config_dir / "test_import_cycle/a.conf")
+    message = str(exc_info.value)
+    assert message.count("a.conf") == 2
+    assert "b.conf" in message and "c.conf" in message
+
+
+def test_load_missing_import(tmp_path):
+    (tmp_path / "a.conf").write_text("import missing as m\nx: 1\n")
+    with pytest.raises(FileNotFoundError):
+        load(tmp_path / "a.conf")
+
+
+def test_import_location(tmp_path):
+    (tmp_path / "b.conf").write_text("y: 1\n")
+    (tmp_path / "a.conf").write_text("x: 1\nimport b as b\n")
+    with pytest.raises(InvalidImportLocationError):
+        load(tmp_path / "a.conf")
+    with pytest.raises(InvalidImportLocationError):
+        parse("import b as b\nx: 1\n")
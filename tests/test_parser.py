@@ -2,7 +2,17 @@ import os
 
 import pytest
 
-from mlconf.parser import parse
+from mlconf.config import Config
+from mlconf.errors import ReferenceCycleError
+from mlconf.parser import (
+    ImportValue,
+    parse,
+    parse_block,
+    parse_imports,
+    parse_source,
+)
+from mlconf.tokenizer import ParseTokenStream, TokenTable
+from mlconf.word import Call, Word
 
 
 def pretty_print(items: list) -> None:
@@ -60,7 +70,7 @@ def test_test1_config(test1_config_str):
     assert conf.a8.b8[0] == conf.a1.b4.c5.d5
     assert conf.a8.b8[1] == conf.a1.b4.c5.d4.l1
     assert conf.a8.b8[2] == conf.a4.b7.c9[2].list.c.e[1][1][0]
-    # assert conf.a8.b9 == conf.a1.b4.c5.d3
+    assert conf.a8.b9 == conf.a1.b4.c5.d3
 
 
 def test_test1_var(test1_var_str):
@@ -81,14 +91,82 @@ def test_bad_indent(bad_indent_config: str) -> None:
     assert "Error at line 7:" in str(exc_info.value)
 
 
-# def test_parse_import_config(test_import_config: str) -> None:
-#     # from mlconf.tokenizer import get_raw_tokens, get_tokens
-#     from mlconf.parser import parse_imports, ParseTokenStream, ImportValue
+def test_parse_import_config(test_import_config: str) -> None:
+    stream = ParseTokenStream(test_import_config)
+    imports = parse_imports(stream)
+    assert imports == [
+        ImportValue("imp", "imp_same_dir"),
+        ImportValue("b.imp2", "imp_nested_dir"),
+        ImportValue("b.c.imp3", "imp3"),
+    ]
 
-#     stream = ParseTokenStream(test_import_config)
-#     imports = parse_imports(stream)
-#     assert imports == [
-#         ImportValue("imp", "imp_same_dir"),
-#         ImportValue("b.imp2", "imp_nested_dir"),
-#         ImportValue("b.c.imp3", "imp3"),
-#     ]
+
+def test_parse_token_table(test1_config_str):
+    table = TokenTable.from_string(test1_config_str)
+    from_table = parse_block(ParseTokenStream(table))
+    from_string = parse_block(ParseTokenStream(test1_config_str))
+    assert repr(from_table) == repr(from_string)
+
+
+def test_forward_references():
+    conf = parse(
+        "a: b.c\nb:\n    c: d.l1\n    e: b.c.x\nd: [1, (2, b.e)]\nf: d\ng: f.l0\n"
+    )
+    assert conf.a == (2, "b.c.x")
+    assert conf.b.e == "b.c.x"
+    assert conf.f == [1, (2, "b.c.x")]
+    assert conf.f is not conf.d
+    assert conf.g == "f.l0"
+
+
+def test_reference_cycle():
+    with pytest.raises(ReferenceCycleError) as exc_info:
+        parse("a: b\nb: c.l0\nc: [a]\n")
+    assert str(exc_info.value) == "Reference cycle: a -> b -> c.l0 -> a"
+    with pytest.raises(ReferenceCycleError):
+        parse("a: b\nb: a\n")
+    # A value naming its own path or a block holding it stays a string.
+    assert parse("a:\n    b: a\n") == Config({"a": {"b": "a"}})
+    assert parse("a: a\n").a == "a"
+    assert parse("train:\n    name: train\n").train.name == "train"
+    assert parse("model:\n    type: model\n", lazy=True).model.type == "model"
+    assert parse('a:\n    b: "x${a.b}"\n').a.b == "x${a.b}"
+
+
+def test_long_reference_chain():
+    lines = [f"x{i}: x{i + 1}" for i in range(20000)] + ["x20000: 1"]
+    conf = parse("\n".join(lines) + "\n")
+    assert conf.x0 == 1
+
+
+def test_calls_and_exponents():
+    _, ast = parse_source("a: f(1e-5, [x, -2.5E-3], g)\nb: [1e5, 2e+3]\n")
+    assert repr(ast) == repr(
+        {
+            "a": Call("f", [Word("1e-5"), [Word("x"), Word("-2.5E-3")], Word("g")]),
+            "b": [Word("1e5"), Word("2e+3")],
+        }
+    )
+    # Only call arguments read exponents, elsewhere they stay strings as
+    # before calls were added.
+    conf = parse("a: choice(1e5, [2E-3])\nb: [1e5, 2e+3]\nc: 1.5E+3\n")
+    assert conf.a.args == (100000.0, [0.002])
+    assert conf.b == ["1e5", "2e+3"] and conf.c == "1.5E+3"
+    with pytest.raises(Exception, match="Expected WORD or NEWLINE"):
+        parse("b: 1e-5\n")
+
+
+def test_unicode_digits():
+    # Only ASCII digits are numbers, other digits need quotes and are strings.
+    assert parse('a: "\u0663"\n').a == "\u0663"
+    with pytest.raises(Exception, match="Unknown character"):
+        parse("a: \u0663\n")
+
+
+def test_yaml_list_followed_by_keys():
+    conf = parse("a:\n    b:\n        - 1\n        - 2\n    c: 3\nd: 4\n")
+    assert conf == parse("a:\n    b: [1, 2]\n    c: 3\nd: 4\n")
+    # A block item ends the list, its first key follows the "- ".
+    conf = parse("a:\n    - 1\n    - b: 1\n    c:\n        d: 2\ne: 3\n")
+    assert conf.a == [1, Config({"b": 1, "c": {"d": 2}})]
+    assert conf.e == 3
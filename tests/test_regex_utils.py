@@ -1,6 +1,11 @@
 import re
 
-from mlconf.regex_utils import REGEX_FLOAT_MATCH, REGEX_INT_MATCH
+from mlconf.regex_utils import (
+    REGEX_EXPONENT_FLOAT_MATCH,
+    REGEX_FLOAT_MATCH,
+    REGEX_INT_MATCH,
+    REGEX_NUMBER_MATCH,
+)
 
 
 def test_regex_int_match():
@@ -32,4 +37,24 @@ def test_regex_float_match():
     assert float("01.") == 1.0
 
     assert not re.match(REGEX_FLOAT_MATCH, "123.0.0")
+    assert not re.match(REGEX_FLOAT_MATCH, "1e5")
     assert not re.match(REGEX_FLOAT_MATCH, "1 1 1")
+
+
+def test_regex_exponent_float_match():
+    assert re.match(REGEX_EXPONENT_FLOAT_MATCH, "1e-5")
+    assert float("1e-5") == 0.00001
+    assert re.match(REGEX_EXPONENT_FLOAT_MATCH, "-2.5E+3")
+    assert float("-2.5E+3") == -2500.0
+    assert re.match(REGEX_EXPONENT_FLOAT_MATCH, "01.")
+    assert not re.match(REGEX_EXPONENT_FLOAT_MATCH, "1e")
+    assert not re.match(REGEX_EXPONENT_FLOAT_MATCH, "e5")
+
+
+def test_regex_number_match():
+    for text in ["123", "-123", "+123", "012"]:
+        assert re.fullmatch(REGEX_NUMBER_MATCH, text).lastgroup == "int"
+    for text in ["123.0", "01.", ".01", "-2.5"]:
+        assert re.fullmatch(REGEX_NUMBER_MATCH, text).lastgroup is None
+    for text in ["", "+", ".", "1e5", "1e-5", "123.0.0", "1_000", "0x10"]:
+        assert not re.fullmatch(REGEX_NUMBER_MATCH, text)
@@ -0,0 +1,105 @@
+import pytest
+
+from mlconf.parser import parse
+from mlconf.resolver import (
+    EnvironmentVariableResolver,
+    PythonDataTypeResolver,
+    Resolver,
+    ResolverRegistry,
+    default_registry,
+)
+from mlconf.word import Word
+
+
+class SecretResolver(Resolver):
+    prefixes = ("@secret/",)
+
+    def __init__(self, secrets):
+        self.secrets = secrets
+
+    def resolve(self, value):
+        return self.secrets.get(value.text[len("@secret/") :], value)
+
+
+class TagResolver(Resolver):
+    pattern = r"[A-Z]+-\d+"
+
+    def __init__(self, tag):
+        self.tag = tag
+
+    def resolve(self, value):
+        return f"{self.tag}:{value.text}"
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("12", 12),
+        ("-3", -3),
+        ("+0", 0),
+        ("1.5", 1.5),
+        (".5", 0.5),
+        ("true", True),
+        ("False", False),
+        ("null", None),
+        ("None", None),
+    ],
+)
+def test_python_datatype_resolver(text, expected):
+    value = PythonDataTypeResolver().resolve(Word(text))
+    assert type(value) is type(expected) and value == expected
+
+
+@pytest.mark.parametrize(
+    "text", ["", "-", "+x", ".hidden", "1.2.3", "1e5", "2e-3", "Nil", "relu"]
+)
+def test_python_datatype_resolver_keeps_words(text):
+    value = PythonDataTypeResolver().resolve(Word(text))
+    assert isinstance(value, Word) and value.text == text
+    assert PythonDataTypeResolver().resolve(3) == 3
+
+
+def test_registry_routes_by_prefix_and_pattern():
+    registry = ResolverRegistry()
+    registry.register(PythonDataTypeResolver(), 100)
+    registry.register(SecretResolver({"db": "hunter2"}))
+    registry.register(TagResolver("ticket"))
+    resolve = registry.compile().resolve
+    assert resolve(Word("@secret/db")) == "hunter2"
+    assert resolve(Word("@secret/api")).text == "@secret/api"
+    assert resolve(Word("@other")).text == "@other"
+    assert resolve(Word("ML-12")) == "ticket:ML-12"
+    assert resolve(Word("ml-12")).text == "ml-12"
+    assert resolve(Word("12")) == 12
+    assert set(registry.compile().table) == {"@"}
+
+
+def test_registry_order(monkeypatch):
+    monkeypatch.setenv("TRUE", "yes")
+    registry = ResolverRegistry()
+    registry.register(TagResolver("first"), 10)
+    registry.register(TagResolver("second"), 10)
+    registry.register(EnvironmentVariableResolver(), 200)
+    registry.register(PythonDataTypeResolver(), 100)
+    resolve = registry.compile().resolve
+    assert resolve(Word("AB-1")) == "first:AB-1"
+    assert resolve(Word("$TRUE")) == "yes"
+    assert resolve(Word("true")) is True
+    registry.unregister(next(iter(registry)))
+    assert resolve(Word("AB-1")) == "first:AB-1"
+    assert registry.compile().resolve(Word("AB-1")) == "second:AB-1"
+    empty = SecretResolver({})
+    empty.prefixes = ("",)
+    with pytest.raises(ValueError):
+        registry.register(empty)
+
+
+def test_default_registry():
+    secrets = default_registry.register(SecretResolver({"db": "hunter2"}))
+    try:
+        config = parse("db: @secret/db\nuser: [@secret/db, 1]\n")
+        assert config.db == "hunter2"
+        assert config.user == ["hunter2", 1]
+    finally:
+        default_registry.unregister(secrets)
+    assert parse("db: @secret/db\n").db == "@secret/db"
@@ -0,0 +1,57 @@
+import multiprocessing
+import pickle
+
+import pytest
+
+from mlconf import SharedConfig
+from mlconf.config import Config
+from mlconf.extended_list_and_tuple import FrozenList
+
+CONFIG = Config(
+    {
+        "model": {"name": "resnet", "layers": [1, 2, 3], "shape": (3, 224)},
+        "data": {"path": "/data", "batch": 32, "shuffle": None},
+    }
+)
+
+
+def read_path(shared: SharedConfig, path: str) -> object:
+    # Runs in a worker, the handle attached when it was unpickled.
+    with shared:
+        assert not shared.owner
+        return shared.config.get_item_from_dot_notation(path)
+
+
+def test_shared_config_lifecycle():
+    with SharedConfig.create(CONFIG) as shared:
+        assert shared.owner
+        assert shared.config == CONFIG
+        attached = SharedConfig.attach(shared.name)
+        assert attached.config.model.layers == [1, 2, 3]
+        assert type(attached.config.model.layers) is FrozenList
+        with pytest.raises(TypeError):
+            attached.config.model.name = "vit"
+        with pytest.raises(TypeError):
+            attached.config["data"] = {}
+        # Values decoded before closing stay usable, the rest cannot be read.
+        model = attached.config.model
+        name = model.name
+        attached.close()
+        with pytest.raises(ValueError):
+            model.shape
+        assert name == "resnet"
+        copy = pickle.loads(pickle.dumps(shared))
+        assert not copy.owner and copy.config.data.batch == 32
+        copy.close()
+    # Leaving the block of the owner unlinks the segment.
+    with pytest.raises(FileNotFoundError):
+        SharedConfig.attach(shared.name)
+
+
+def test_shared_config_workers():
+    context = multiprocessing.get_context("spawn")
+    paths = ["model.name", "model.layers.l2", "model.shape.t1", "data.shuffle"]
+    with SharedConfig.create(CONFIG) as shared:
+        with context.Pool(2) as pool:
+            values = pool.starmap(read_path, [(shared, path) for path in paths])
+    assert values == ["resnet", 3, 224, None]
@@ -0,0 +1,51 @@
+from mlconf import LoadStats, load, profile
+from mlconf.cache import ParseCache
+from mlconf.parser import parse
+
+CONFIG = """
+model:
+    dim: 64
+    act: relu
+    layers: [1, 2, 3]
+head:
+    dim: model.dim
+    home: $HOME
+"""
+
+
+def test_parse_stats():
+    stats = LoadStats()
+    config = parse(CONFIG, stats=stats)
+    assert config == parse(CONFIG)
+    assert config.head.dim == 64
+    assert stats.counts["sources"] == 1
+    assert stats.counts["chars"] == len(CONFIG)
+    assert stats.counts["lines"] == 7
+    assert stats.counts["tokens"] > 20
+    assert stats.counts["nodes"] == 10
+    assert stats.counts["references"] == 1
+    assert stats.resolver_calls == {
+        "PythonDataTypeResolver": 7,
+        "EnvironmentVariableResolver": 1,
+    }
+    for name in ["total", "lines", "tokens", "indentation", "parse", "resolve"]:
+        assert stats.times[name] > 0
+    assert stats.times["total"] >= stats.times["resolve"]
+    assert stats.as_dict()["count.nodes"] == 10
+    assert stats.as_dict()["resolver_calls.EnvironmentVariableResolver"] == 1
+
+
+def test_profile_hook(config_dir, tmp_path):
+    exported = []
+    cache = ParseCache(tmp_path / "cache")
+    for _ in range(2):
+        with profile(exported.append) as stats:
+            load(config_dir / "test_imports/diamond.conf", max_workers=4, cache=cache)
+        assert exported[-1] is stats
+    first, second = exported
+    assert first.counts["sources"] == second.counts["sources"] == 4
+    assert first.counts["cache_misses"] == second.counts["cache_hits"] == 4
+    assert first.counts["tokens"] > 0 and second.counts["tokens"] == 0
+    assert second.times["read"] > 0 and second.times["copy"] > 0
+    parse(CONFIG)
+    assert second.counts["sources"] == 4
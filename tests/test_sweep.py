@@ -0,0 +1,86 @@
+from operator import attrgetter
+
+import pytest
+
+from mlconf import Sweep
+from mlconf.errors import InvalidSweepError
+
+SWEEP = """
+optim:
+    lr: 0.1
+    name: sgd
+data:
+    batch_size: 32
+    size: 10
+sweep:
+    grid:
+        optim.lr: [0.1, 0.01, 0.001]
+        data.batch_size: (32, 64)
+    zip:
+        optim.name: [sgd, adam]
+        data.size: [10, 20]
+"""
+
+
+def hash_in_worker(variant):
+    # String hashes differ between processes, so hashes are only compared
+    # within the worker.
+    return hash(variant) == hash(variant.thaw().freeze()), variant.optim.lr
+
+
+def test_sweep():
+    sweep = Sweep.from_string(SWEEP)
+    assert len(sweep) == 12
+    assert "sweep" not in sweep.base
+    variants = list(sweep)
+    assert len(variants) == 12
+    assert variants[0].optim == sweep.base.optim
+    assert variants[1].optim.name == "adam" and variants[1].data.size == 20
+    assert variants[2].data.batch_size == 64 and variants[2].optim.lr == 0.1
+    assert variants[-1] == sweep[11] == sweep[-1]
+    assert sweep.overrides(-1) == {
+        "optim.name": "adam",
+        "data.size": 20,
+        "data.batch_size": 64,
+        "optim.lr": 0.001,
+    }
+    assert sweep[4].data is not sweep.base.data
+    assert sweep[4].optim.lr == 0.01 and sweep.base.optim.lr == 0.1
+    with pytest.raises(IndexError):
+        sweep[12]
+
+
+def test_large_sweep():
+    base = Sweep.from_string(SWEEP).base
+    sweep = Sweep(base, {"optim.lr": list(range(1000)), "data.size": list(range(200))})
+    assert len(sweep) == 200000
+    assert sweep[123456].optim.lr == 617 and sweep[123456].data.size == 56
+    assert sweep[123456].data.batch_size == 32
+
+
+def test_sweep_map():
+    sweep = Sweep.from_string(SWEEP)
+    results = list(sweep.map(attrgetter("optim.lr"), max_workers=2, chunksize=5))
+    assert results == [variant.optim.lr for variant in sweep]
+    frozen = Sweep(sweep.base.freeze(), {"optim.lr": [1, 2]})
+    assert list(frozen.map(hash_in_worker, max_workers=1)) == [(True, 1), (True, 2)]
+
+
+@pytest.mark.parametrize(
+    "string",
+    [
+        "a: 1\n",
+        "a: 1\nsweep: 2\n",
+        "a: 1\nsweep:\n    random:\n        a: [1, 2]\n",
+        "a: 1\nsweep:\n    grid:\n        a: 1\n",
+        "a: 1\nb: 1\nsweep:\n    zip:\n        a: [1, 2]\n        b: [1]\n",
+    ],
+)
+def test_invalid_sweep(string):
+    with pytest.raises(InvalidSweepError):
+        Sweep.from_string(string)
+
+
+def test_unknown_sweep_path():
+    with pytest.raises(KeyError):
+        Sweep.from_string("a: 1\nsweep:\n    grid:\n        b: [1, 2]\n")
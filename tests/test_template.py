@@ -0,0 +1,170 @@
+import pytest
+
+from mlconf import load
+from mlconf.errors import MissingEnvironmentVariableError, ReferenceCycleError
+from mlconf.incremental import IncrementalParser
+from mlconf.parser import parse
+from mlconf.template import Placeholder, compile_template
+
+SOURCE = """paths:
+    data: "${DATA_DIR:-/data}/${USER}/runs"
+    home: $HOME
+model:
+    name: resnet
+    dim: 64
+run:
+    out: paths.data
+"""
+
+REFERENCES = """exp:
+    name: "${model.name}-${model.dim}"
+    dir: "${paths.root}/runs/${exp.name}/ckpt"
+paths:
+    root: "${DATA_DIR:-/data}"
+model:
+    name: resnet
+    dim: 64
+    layers: [1, 2]
+"""
+
+
+def test_compile_template():
+    template = compile_template("${ROOT}/runs/${NAME:-default}/${ROOT}")
+    assert template is compile_template("${ROOT}/runs/${NAME:-default}/${ROOT}")
+    assert [type(segment) for segment in template.segments] == [
+        Placeholder,
+        str,
+        Placeholder,
+        str,
+        Placeholder,
+    ]
+    assert template.names == ("ROOT", "NAME")
+    assert template.render({"ROOT": "/r"}) == "/r/runs/default//r"
+    assert template.render({"ROOT": "/r", "NAME": ""}) == "/r/runs/default//r"
+    assert compile_template("$${ROOT}/x").render({}) == "${ROOT}/x"
+    assert compile_template("${a.l0.b}").names == ("a.l0.b",)
+    for string in ["plain", "$ROOT", "${a..b}", "${}", "${a-b}"]:
+        assert compile_template(string) is None
+
+
+def test_environment_interpolation(monkeypatch):
+    monkeypatch.setenv("USER", "ada")
+    monkeypatch.setenv("HOME", "/home/ada")
+    monkeypatch.delenv("DATA_DIR", raising=False)
+    config = parse(SOURCE)
+    assert config.paths.data == "/data/ada/runs"
+    assert config.paths.home == "/home/ada"
+    assert config.run.out == "/data/ada/runs"
+    assert parse('a: "${DATA_DIR:-x}-$${USER}"\n').a == "x-${USER}"
+    monkeypatch.delenv("USER")
+    with pytest.raises(MissingEnvironmentVariableError):
+        parse(SOURCE)
+
+
+def test_update_environment():
+    environment = {"USER": "ada", "HOME": "/home/ada"}
+    parser = IncrementalParser(SOURCE, environment)
+    config = parser.config
+    model = config.model
+    assert config.run.out == "/data/ada/runs"
+    assert parser.key_blocks["paths"].variables == {"DATA_DIR", "USER", "HOME"}
+    assert parser.key_blocks["model"].variables == set()
+
+    assert parser.update_environment({**environment, "EDITOR": "vi"}) is config
+    assert config.run.out == "/data/ada/runs"
+    changed = {**environment, "DATA_DIR": "/scratch"}
+    parser.update_environment(changed)
+    assert config.paths.data == "/scratch/ada/runs"
+    assert config.run.out == "/scratch/ada/runs"
+    assert config.model is model
+    assert config == IncrementalParser(SOURCE, changed).config
+
+
+@pytest.mark.parametrize("lazy", [False, True])
+def test_config_references(monkeypatch, lazy):
+    monkeypatch.delenv("DATA_DIR", raising=False)
+    config = parse(REFERENCES, lazy=lazy)
+    assert config.exp.name == "resnet-64"
+    assert config.exp.dir == "/data/runs/resnet-64/ckpt"
+    source = """a: "${b}/${b.c}/${b.c:-x}/${USER_MISSING:-y}/${c.l1}"
+b: 1
+c: [1, 2]
+"""
+    assert parse(source, lazy=lazy).a == "1/${b.c}/x/y/2"
+    with pytest.raises(ReferenceCycleError):
+        parse('a: "${b}"\nb: "x${a}"\n', lazy=lazy).a
+
+
+def test_update_templates():
+    parser = IncrementalParser(REFERENCES, {})
+    config = parser.config
+    paths = config.paths
+    assert parser.key_blocks["exp"].references >= {"model", "paths", "exp"}
+    parser.update(REFERENCES.replace("dim: 64", "dim: 128"))
+    assert config.exp.dir == "/data/runs/resnet-128/ckpt"
+    assert config.paths is paths
+    parser.update_environment({"DATA_DIR": "/scratch"})
+    assert config.exp.dir == "/scratch/runs/resnet-128/ckpt"
+
+
+@pytest.mark.parametrize("lazy", [False, True])
+def test_with_overrides_templates(monkeypatch, lazy):
+    monkeypatch.delenv("DATA_DIR", raising=False)
+    config = parse(REFERENCES, lazy=lazy)
+    changed = config.with_overrides({"paths.root": "/scratch", "model.dim": 128})
+    assert changed.exp.name == "resnet-128"
+    assert changed.exp.dir == "/scratch/runs/resnet-128/ckpt"
+    assert config.exp.dir == "/data/runs/resnet-64/ckpt"
+    changed = changed.with_overrides({"model": {"name": "vit", "dim": 16}})
+    assert changed.exp.dir == "/scratch/runs/vit-16/ckpt"
+    # An overridden template keeps its value, templates using it re-render.
+    changed = changed.with_overrides({"exp.name": "run", "model.dim": 32})
+    assert changed.exp.dir == "/scratch/runs/run/ckpt"
+    assert changed.freeze().with_overrides({"exp.name": "x"}).exp.dir == (
+        "/scratch/runs/x/ckpt"
+    )
+
+
+def test_with_overrides_imported_templates(monkeypatch, tmp_path):
+    monkeypatch.delenv("DATA_DIR", raising=False)
+    (tmp_path / "base.conf").write_text(REFERENCES)
+    (tmp_path / "main.conf").write_text(
+        'import base as base\nout: "${base.exp.dir}!"\n'
+    )
+    config = load(tmp_path / "main.conf")
+    changed = config.with_overrides({"base.model.name": "vit"})
+    assert changed.base.exp.dir == "/data/runs/vit-64/ckpt"
+    assert changed.out == "/data/runs/vit-64/ckpt!"
+    assert config.out == "/data/runs/resnet-64/ckpt!"
+
+
+def test_template_tuple_references():
+    source = """a: (1, 2)
+b:
+    x: [(3, 4), 5]
+    y: a
+c: "${a} ${b}"
+d: "${b.x}"
+"""
+    config = parse(source)
+    assert config.c == "(1, 2) {'x': [(3, 4), 5], 'y': (1, 2)}"
+    assert config.d == "[(3, 4), 5]"
+    assert parse(source, lazy=True) == config
+
+
+@pytest.mark.parametrize("lazy", [False, True])
+def test_config_keys_shadow_variables(monkeypatch, lazy):
+    monkeypatch.setenv("HOME", "/home/ada")
+    config = parse('HOME: /srv\na: "${HOME}/x"\nb: $HOME\n', lazy=lazy)
+    assert config.a == "/srv/x"
+    assert config.b == "/home/ada"
+    assert parse('a: "${HOME}/x"\n', lazy=lazy).a == "/home/ada/x"
+
+
+@pytest.mark.parametrize("lazy", [False, True])
+def test_missing_variables(monkeypatch, lazy):
+    monkeypatch.delenv("MISSING", raising=False)
+    assert parse("a: $MISSING\n", lazy=lazy).a == "$MISSING"
+    assert parse('a: "x${MISSING:-}"\n', lazy=lazy).a == "x"
+    with pytest.raises(MissingEnvironmentVariableError, match="'MISSING'"):
+        parse('a: "x${MISSING}"\n', lazy=lazy).a
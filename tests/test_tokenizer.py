@@ -0,0 +1,154 @@
+import re
+
+import pytest
+
+from mlconf.char import CharStream
+from mlconf.tokenizer import (
+    ParseTokenStream,
+    Scanner,
+    TokenStream,
+    TokenTable,
+    TokenType,
+    get_raw_tokens,
+    get_tokens,
+    process_tokens,
+)
+
+
+def legacy_raw_tokens(string: str) -> list:
+    charstream = CharStream(string)
+    tokenstream = TokenStream(charstream)
+    tokens = []
+    while not charstream.is_eof():
+        tokens.append(tokenstream.get_next())
+    return tokens
+
+
+def as_tuples(tokens: list) -> list:
+    return [(token.token_type, token.value, token.line) for token in tokens]
+
+
+def legacy_error(string: str) -> str:
+    with pytest.raises(Exception) as exc_info:
+        legacy_raw_tokens(string)
+    return str(exc_info.value)
+
+
+@pytest.mark.parametrize(
+    "string",
+    [
+        "a: 1",
+        "a: 1 ",
+        "a: 1 # trailing comment",
+        "a: 1\n# trailing comment line\n",
+        "  a: 1\n  b:\n    c: [1, (2, 3)]\n",
+        "a: 'multi\nline'\nb: \"x\"",
+        "a: ''\nb: \"\"",
+        "import x.y as z\nIMPORT q As r\nimports: as1\nextends: b",
+        "a:b,c\n-x\n  - y#z",
+        "a: -1\nb: $HOME\nc: !@#%\n",
+    ],
+)
+def test_scanner_matches_token_stream(string):
+    assert as_tuples(get_raw_tokens(string)) == as_tuples(legacy_raw_tokens(string))
+
+
+def test_scanner_matches_token_stream_on_corpus(config_dir):
+    paths = sorted(config_dir.glob("**/*.conf"))
+    assert paths
+    for path in paths:
+        string = path.read_text()
+        assert as_tuples(get_raw_tokens(string)) == as_tuples(
+            legacy_raw_tokens(string)
+        ), path
+
+
+@pytest.mark.parametrize("string", ["a: 'unterminated\nb: 1", "a: \t1", "a: {1}"])
+def test_scanner_errors_match_token_stream(string):
+    with pytest.raises(Exception) as exc_info:
+        list(Scanner(string))
+    assert str(exc_info.value) == legacy_error(string)
+
+
+def legacy_tokens(string: str) -> list:
+    return list(process_tokens(legacy_raw_tokens(string)))
+
+
+def test_get_tokens_matches_token_stream(config_dir):
+    strings = [path.read_text() for path in sorted(config_dir.glob("**/*.conf"))]
+    strings += [
+        "a:\n  b:\n    c: 1\n  d: 2\ne: 3",
+        "  a:\n      b: 'x\ny'\n  c: [1,\n 2]",
+        "import a as b\n# c\n\nd:\n  - e\n  - f: g\n",
+        "a:\n    b:\n        c: 1\n",
+    ]
+    for string in strings:
+        if "\t" in string:
+            continue
+        try:
+            expected = legacy_tokens(string)
+        except Exception as error:
+            with pytest.raises(type(error), match=re.escape(str(error))):
+                get_tokens(string)
+            continue
+        assert as_tuples(get_tokens(string)) == as_tuples(expected), string
+        table = TokenTable.from_string(string)
+        assert as_tuples(table) == as_tuples(expected)
+
+
+@pytest.mark.parametrize("string", ["a:\n    b: 1\n  c: 2", "  a: 1\nb: 2"])
+def test_get_tokens_indent_errors(string):
+    with pytest.raises(IndentationError) as exc_info:
+        legacy_tokens(string)
+    with pytest.raises(IndentationError, match=f"^{re.escape(str(exc_info.value))}$"):
+        get_tokens(string)
+
+
+def test_get_tokens_indent_dedent():
+    tokens = get_tokens("a:\n  b: 1\nc: 2 # done")
+    assert [token.token_type for token in tokens] == [
+        TokenType.WORD,
+        TokenType.PUNC,
+        TokenType.NEWLINE,
+        TokenType.INDENT,
+        TokenType.WORD,
+        TokenType.PUNC,
+        TokenType.WORD,
+        TokenType.NEWLINE,
+        TokenType.DEDENT,
+        TokenType.WORD,
+        TokenType.PUNC,
+        TokenType.WORD,
+    ]
+
+
+def test_parse_token_stream_is_lazy(test1_config_str):
+    stream = ParseTokenStream(test1_config_str)
+    expected = get_tokens(test1_config_str)
+    seen = []
+    while not stream.is_eof():
+        if len(seen) + 1 < len(expected):
+            assert stream.peek_next() == expected[len(seen) + 1]
+        assert len(stream.lookahead) <= 2
+        seen.append(stream.peek())
+        stream.next()
+    assert seen == expected
+
+
+def test_token_table_matches_get_tokens(config_dir):
+    for path in sorted(config_dir.glob("**/*.conf")):
+        string = path.read_text()
+        if "test_bad_indent" in path.name:
+            continue
+        table = TokenTable.from_string(string)
+        assert len(table) == len(get_tokens(string))
+        assert as_tuples(table) == as_tuples(get_tokens(string)), path
+
+
+def test_token_table_raw_tokens():
+    string = "import a as b\nx:\n    y: 'z'"
+    scanner = Scanner(string)
+    table = TokenTable(scanner)
+    table.extend(Scanner(string))
+    assert as_tuples(table) == as_tuples(get_raw_tokens(string))
+    assert table.kinds.itemsize == 1
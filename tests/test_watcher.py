@@ -0,0 +1,104 @@
+import threading
+
+import pytest
+
+from mlconf import ConfigWatcher, load
+from mlconf.loader import parse_file
+from mlconf.parser import parse
+from mlconf.watcher import get_changed_paths
+
+
+def test_get_changed_paths():
+    old = parse("a:\n    b: 1\n    c: [1, 2, (3, 4)]\nd: x\n")
+    new = parse("a:\n    b: 2\n    c: [1, 5, (3, 6), 7]\ne: x\n")
+    assert get_changed_paths(old, old) == []
+    assert get_changed_paths(old, new) == [
+        "a.b",
+        "a.c.l1",
+        "a.c.l2.t1",
+        "a.c.l3",
+        "d",
+        "e",
+    ]
+    assert get_changed_paths(parse("a: 1\n"), parse("a: 1.0\n")) == ["a"]
+
+
+def test_watcher_publishes_changed_paths(tmp_path):
+    path = tmp_path / "train.conf"
+    path.write_text("optimizer:\n    lr: 0.1\n    name: adam\nepochs: 10\n")
+    watcher = ConfigWatcher(path, debounce=0)
+    changes = []
+    watcher.subscribe(changes.append)
+    assert watcher.poll() is None
+
+    path.write_text("optimizer:\n    lr: 0.01\n    name: adam\nepochs: 10\n")
+    change = watcher.poll()
+    assert changes == [change]
+    assert change.paths == ["optimizer.lr"]
+    assert change.files == [path.resolve()]
+    assert change.config.optimizer.lr == 0.01
+    assert watcher.config is change.config
+    assert "optimizer.lr" in change and "optimizer" in change
+    assert "optimizer.name" not in change and "epochs" not in change
+
+    path.write_text(
+        "optimizer:\n    lr: 0.01\n    name: adam\n# a comment\nepochs: 10\n"
+    )
+    assert watcher.poll() is None
+    assert len(changes) == 1
+
+
+def test_watcher_reloads_only_changed_files(tmp_path, monkeypatch):
+    (tmp_path / "base.conf").write_text("lr: 0.1\n")
+    (tmp_path / "other.conf").write_text("name: adam\n")
+    root = tmp_path / "train.conf"
+    root.write_text("import base as base\nimport other as other\nepochs: 10\n")
+    watcher = ConfigWatcher(root, debounce=0)
+    parsed = []
+
+    def counting_parse_file(path, cache=None, stats=None):
+        parsed.append(path.name)
+        return parse_file(path, cache, stats)
+
+    monkeypatch.setattr("mlconf.loader.parse_file", counting_parse_file)
+    (tmp_path / "base.conf").write_text("lr: 0.001\n")
+    change = watcher.poll()
+    assert parsed == ["base.conf"]
+    assert change.paths == ["base.lr"]
+    assert change.config == load(root)
+
+    parsed.clear()
+    (tmp_path / "extra.conf").write_text("seed: 1\n")
+    root.write_text("import base as base\nimport extra as extra\nepochs: 10\n")
+    change = watcher.poll()
+    assert sorted(parsed) == ["extra.conf", "train.conf"]
+    assert change.paths == ["other", "extra"]
+    assert set(watcher.signatures) == {
+        (tmp_path / name).resolve()
+        for name in ["base.conf", "extra.conf", "train.conf"]
+    }
+
+
+def test_watcher_keeps_config_on_error(tmp_path):
+    path = tmp_path / "train.conf"
+    path.write_text("lr: 0.1\n")
+    watcher = ConfigWatcher(path, debounce=0)
+    path.write_text("import missing as m\nlr: 0.2\n")
+    with pytest.raises(FileNotFoundError):
+        watcher.poll()
+    assert watcher.config.lr == 0.1
+    assert watcher.poll() is None
+    path.write_text("lr: 0.25\n")
+    assert watcher.poll().paths == ["lr"]
+
+
+def test_watcher_thread(tmp_path):
+    path = tmp_path / "train.conf"
+    path.write_text("lr: 0.1\n")
+    changed = threading.Event()
+    with ConfigWatcher(path, interval=0.01, debounce=0.01) as watcher:
+        watcher.subscribe(lambda change: changed.set())
+        path.write_text("lr: 0.01\n")
+        assert changed.wait(5)
+    assert watcher.thread is None
+    assert watcher.config.lr == 0.01